@@ -0,0 +1 @@
+"""Synthetic benchmarks for storage, pairing and command hot paths."""
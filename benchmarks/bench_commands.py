@@ -0,0 +1,76 @@
+"""Benchmarks for commands and the full DM vote round trip."""
+
+import asyncio
+import random
+from typing import Dict, List
+
+from benchmarks.common import measure
+
+from commands import RevealCommand
+from handlers import DMHandler
+from ranking import EloRanking
+from storage import JSONStore
+
+
+class NullClient:
+    """Stands in for AsyncClient; records sends instead of hitting the network."""
+    
+    def __init__(self):
+        self.sent = 0
+    
+    async def room_send(self, room_id, message_type, content, **kwargs):
+        self.sent += 1
+
+
+def run(data_dir: str, dataset: Dict, budget: float, seed: int = 0) -> List[Dict]:
+    """
+    Time RevealCommand.execute and a full DM vote round trip.
+    
+    The round trip is DMHandler.handle_dm answering an outstanding prompt:
+    session lookup, vote + Elo writes, session clear, confirmation send and
+    sending the next pair (precomputed between iterations, as it would be
+    while the user thinks).
+    
+    Args:
+        data_dir: Data directory produced by datagen.generate_dataset
+        dataset: Description of the dataset (used as result params)
+        budget: Time budget per case in seconds
+        seed: Random seed
+        
+    Returns:
+        List of result dicts
+    """
+    random.seed(seed)
+    rng = random.Random(seed)
+    store = JSONStore(data_dir)
+    results = []
+    
+    reveal = RevealCommand(store)
+    stats = measure(reveal.execute, min_iterations=3, time_budget=budget)
+    results.append({"name": "reveal", "params": dict(dataset), **stats})
+    
+    client = NullClient()
+    dm = DMHandler(client, store, EloRanking(k_factor=32.0))
+    loop = asyncio.new_event_loop()
+    
+    # Fresh voters so nobody runs out of pairs mid-benchmark
+    voters = [f"@voter{i}:bench.local" for i in range(100)]
+    for voter in voters:
+        loop.run_until_complete(dm.handle_dm(f"!dm-{voter}", voter, "hi"))
+    
+    def pick_voter():
+        # Let the next-pair precomputation run, as it would while the user thinks
+        loop.run_until_complete(asyncio.sleep(0))
+        voter = rng.choice(voters)
+        return (f"!dm-{voter}", voter, rng.choice(["1", "2"]))
+    
+    def round_trip(room_id, user_id, choice):
+        loop.run_until_complete(dm.handle_dm(room_id, user_id, choice))
+    
+    try:
+        stats = measure(round_trip, setup=pick_voter, min_iterations=3, time_budget=budget)
+        results.append({"name": "vote_round_trip", "params": dict(dataset), **stats})
+    finally:
+        loop.close()
+    
+    return results
@@ -0,0 +1,48 @@
+"""Benchmarks for pair selection."""
+
+import random
+from typing import Dict, List
+
+from benchmarks.common import measure
+
+from ranking import PairSelector
+from storage import JSONStore
+
+
+def run(data_dir: str, dataset: Dict, budget: float, seed: int = 0) -> List[Dict]:
+    """
+    Time PairSelector.get_next_pair (balanced and top-k) for users with
+    existing vote history.
+    
+    Items and voted pairs are loaded once up front so this measures selection
+    only, not storage.
+    
+    Args:
+        data_dir: Data directory produced by datagen.generate_dataset
+        dataset: Description of the dataset (used as result params)
+        budget: Time budget per case in seconds
+        seed: Random seed
+        
+    Returns:
+        List of result dicts
+    """
+    random.seed(seed)
+    store = JSONStore(data_dir)
+    items = store.get_all_items()
+    users = [f"@user{i}:bench.local" for i in range(dataset["users"])]
+    voted = [store.get_user_voted_pairs(user) for user in users[:50]]
+    
+    def setup():
+        return (items, random.choice(voted))
+    
+    results = []
+    stats = measure(PairSelector.get_next_pair, setup=setup, min_iterations=3, time_budget=budget)
+    results.append({"name": "get_next_pair", "params": dict(dataset), **stats})
+    
+    # Top-k mode: prune to contenders, then select among them
+    def top_k_pair(items, voted_pairs):
+        return PairSelector.get_next_pair(PairSelector.top_k_contenders(items, 10), voted_pairs)
+    
+    stats = measure(top_k_pair, setup=setup, min_iterations=3, time_budget=budget)
+    results.append({"name": "get_next_pair_top10", "params": dict(dataset), **stats})
+    return results
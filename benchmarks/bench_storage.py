@@ -0,0 +1,69 @@
+"""Benchmarks for JSONStore hot paths."""
+
+import random
+from typing import Dict, List
+
+from benchmarks.common import measure
+
+from storage import JSONStore
+from storage.durability import DURABILITY_MODES
+
+
+def run(data_dir: str, dataset: Dict, budget: float, seed: int = 0) -> List[Dict]:
+    """
+    Time record_vote, update_item_elo and loading vote history against a
+    generated data directory, plus a DM vote commit under each durability mode.
+    
+    Args:
+        data_dir: Data directory produced by datagen.generate_dataset
+        dataset: Description of the dataset (used as result params)
+        budget: Time budget per case in seconds
+        seed: Random seed for picking items
+        
+    Returns:
+        List of result dicts
+    """
+    rng = random.Random(seed)
+    store = JSONStore(data_dir)
+    items = store.get_all_items()
+    results = []
+    
+    def pick_pair():
+        a, b = rng.sample(items, 2)
+        user = f"@bench{rng.randrange(1000)}:bench.local"
+        return (user, a.id, b.id)
+    
+    def record_vote(user, a_id, b_id):
+        store.record_vote(user_id=user, item_a_id=a_id, item_b_id=b_id, winner_id=a_id)
+    
+    stats = measure(record_vote, setup=pick_pair, time_budget=budget)
+    results.append({"name": "record_vote", "params": dict(dataset), **stats})
+    
+    def pick_item():
+        return (rng.choice(items).id, 1500.0 + rng.uniform(-200, 200))
+    
+    stats = measure(store.update_item_elo, setup=pick_item, time_budget=budget)
+    results.append({"name": "update_item_elo", "params": dict(dataset), **stats})
+    
+    # Loading vote history: Vote objects vs the columnar log (fresh stores so
+    # neither is served from cache)
+    stats = measure(lambda: JSONStore(data_dir).get_all_votes(), min_iterations=3, time_budget=budget)
+    results.append({"name": "load_votes", "params": dict(dataset), **stats})
+    
+    stats = measure(lambda: JSONStore(data_dir).get_vote_log(), min_iterations=3, time_budget=budget)
+    results.append({"name": "load_vote_log", "params": dict(dataset), **stats})
+    
+    # One vote as DMHandler commits it (vote + both ratings in a transaction)
+    for mode in DURABILITY_MODES:
+        durable_store = JSONStore(data_dir, durability=mode)
+        
+        def commit_vote(user, a_id, b_id):
+            with durable_store.transaction():
+                durable_store.record_vote(user_id=user, item_a_id=a_id, item_b_id=b_id, winner_id=a_id)
+                durable_store.update_item_elos([(a_id, 1516.0), (b_id, 1484.0)])
+        
+        stats = measure(commit_vote, setup=pick_pair, time_budget=budget)
+        durable_store.sync()
+        results.append({"name": f"commit_vote_{mode}", "params": dict(dataset), **stats})
+    
+    return results
@@ -0,0 +1,140 @@
+"""Shared timing harness for the benchmark suite."""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Make the bot's modules importable the same way run.sh does
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+if str(SRC_DIR) not in sys.path:
+    sys.path.insert(0, str(SRC_DIR))
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def measure(fn: Callable, setup: Optional[Callable] = None,
+            min_iterations: int = 5, max_iterations: int = 1000,
+            time_budget: float = 2.0, track_memory: bool = True) -> Dict:
+    """
+    Time a function repeatedly and summarize the samples.
+    
+    Runs at least min_iterations times, then keeps going until either
+    max_iterations or time_budget seconds is reached. Peak memory is measured
+    on one extra run under tracemalloc so tracing overhead doesn't skew timings.
+    
+    Args:
+        fn: Function to time; called with whatever setup() returns
+        setup: Optional untimed per-iteration setup returning a tuple of args
+        min_iterations: Minimum number of timed runs
+        max_iterations: Maximum number of timed runs
+        time_budget: Seconds after which to stop once min_iterations is reached
+        track_memory: Whether to measure peak memory with tracemalloc
+        
+    Returns:
+        Dict with iterations, p50/p99/mean latency (ms), throughput (ops/s)
+        and peak traced memory (bytes)
+    """
+    samples = []
+    started = time.perf_counter()
+    
+    while len(samples) < max_iterations:
+        if len(samples) >= min_iterations and time.perf_counter() - started >= time_budget:
+            break
+        args = setup() if setup else ()
+        t0 = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - t0)
+    
+    peak = None
+    if track_memory:
+        args = setup() if setup else ()
+        tracemalloc.start()
+        try:
+            fn(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    
+    total = sum(samples)
+    return {
+        "iterations": len(samples),
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "mean_ms": total / len(samples) * 1000,
+        "ops_per_sec": len(samples) / total if total > 0 else 0.0,
+        "peak_mem_bytes": peak
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Current git commit hash, if available."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=SRC_DIR.parent,
+            stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_results(results: List[Dict], meta: Dict, output: Optional[str] = None) -> Path:
+    """
+    Write benchmark results as JSON.
+    
+    Args:
+        results: One dict per benchmark case
+        meta: Run metadata (preset, seed, ...)
+        output: Output path; defaults to results/<commit>.json
+        
+    Returns:
+        Path the results were written to
+    """
+    commit = git_commit()
+    meta = dict(meta)
+    meta.update({
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": datetime.now().isoformat()
+    })
+    
+    if output:
+        path = Path(output)
+    else:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f"{commit or 'unknown'}.json"
+    
+    with open(path, 'w') as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+    
+    return path
+
+
+def format_row(result: Dict) -> str:
+    """Format a result as a single line for the console."""
+    params = " ".join(f"{k}={v}" for k, v in result["params"].items())
+    peak = result.get("peak_mem_bytes")
+    peak_str = f"{peak / 1024 / 1024:8.1f} MiB" if peak is not None else "       n/a"
+    return (
+        f"{result['name']:<22} {params:<40} "
+        f"p50 {result['p50_ms']:10.3f} ms  p99 {result['p99_ms']:10.3f} ms  "
+        f"{result['ops_per_sec']:10.1f} ops/s  peak {peak_str}"
+    )
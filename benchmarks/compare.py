@@ -0,0 +1,44 @@
+"""
+Compare two benchmark result files.
+
+Usage:
+    python -m benchmarks.compare benchmarks/results/abc123.json benchmarks/results/def456.json
+"""
+
+import argparse
+import json
+
+
+def key(result):
+    """Identify a benchmark case across runs."""
+    return (result["name"], tuple(sorted(result["params"].items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--metric", default="p50_ms", choices=["p50_ms", "p99_ms", "mean_ms", "ops_per_sec", "peak_mem_bytes"])
+    args = parser.parse_args()
+    
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    
+    before = {key(r): r for r in baseline["results"]}
+    print(f"{args.metric}: {baseline['meta'].get('commit')} -> {candidate['meta'].get('commit')}")
+    
+    for result in candidate["results"]:
+        old = before.get(key(result))
+        if not old or old.get(args.metric) is None or result.get(args.metric) is None:
+            continue
+        
+        old_value, new_value = old[args.metric], result[args.metric]
+        change = (new_value - old_value) / old_value * 100 if old_value else 0.0
+        params = " ".join(f"{k}={v}" for k, v in result["params"].items())
+        print(f"{result['name']:<22} {params:<40} {old_value:14.3f} -> {new_value:14.3f}  ({change:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
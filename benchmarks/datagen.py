@@ -0,0 +1,103 @@
+"""Seeded synthetic data for benchmarks."""
+
+import json
+import random
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict
+
+from benchmarks import common  # noqa: F401  (puts src/ on sys.path)
+
+from ranking import EloRanking
+from storage import RankedItem, Vote
+
+
+def generate_dataset(data_dir: str, num_items: int, num_votes: int,
+                     num_users: int, seed: int = 0) -> Dict:
+    """
+    Write a synthetic but internally consistent data directory.
+    
+    Items get a hidden "true" strength; votes are drawn so stronger items tend
+    to win, and Elo ratings, vote counts and per-user voted pairs are derived
+    from the generated vote log exactly as the bot would have produced them.
+    Each user votes on a pair at most once, so num_votes is capped at 90%
+    of num_users * (number of pairs).
+    
+    Args:
+        data_dir: Directory to write items/votes/user_votes/sessions into
+        num_items: Number of items
+        num_votes: Requested number of votes
+        num_users: Number of distinct voters
+        seed: Random seed
+        
+    Returns:
+        Dict describing what was generated (including the actual vote count)
+    """
+    rng = random.Random(seed)
+    path = Path(data_dir)
+    path.mkdir(parents=True, exist_ok=True)
+    
+    started = datetime(2024, 1, 1)
+    items = [
+        RankedItem(
+            id=str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            name=f"item {i}",
+            added_by=f"@user{i % max(num_users, 1)}:bench.local",
+            added_at=started.isoformat()
+        )
+        for i in range(num_items)
+    ]
+    strength = {item.id: rng.gauss(0.0, 1.0) for item in items}
+    users = [f"@user{i}:bench.local" for i in range(num_users)]
+    
+    # Leave some headroom so rejection sampling doesn't stall near saturation
+    total_pairs = num_items * (num_items - 1) // 2
+    num_votes = min(num_votes, int(total_pairs * num_users * 0.9))
+    
+    elo = EloRanking(k_factor=32.0)
+    by_id = {item.id: item for item in items}
+    user_pairs = {user: set() for user in users}
+    votes = []
+    
+    while len(votes) < num_votes:
+        user = users[rng.randrange(num_users)]
+        voted = user_pairs[user]
+        if len(voted) >= total_pairs:
+            continue
+        
+        a, b = rng.sample(items, 2)
+        pair = tuple(sorted([a.id, b.id]))
+        if pair in voted:
+            continue
+        voted.add(pair)
+        
+        p_a = 1.0 / (1.0 + pow(10, strength[b.id] - strength[a.id]))
+        winner = a if rng.random() < p_a else b
+        timestamp = started + timedelta(seconds=len(votes) * 30)
+        
+        votes.append(Vote(
+            user_id=user,
+            item_a_id=a.id,
+            item_b_id=b.id,
+            winner_id=winner.id,
+            timestamp=timestamp.isoformat()
+        ))
+        
+        new_a, new_b = elo.update_ratings(a.elo, b.elo, winner is a)
+        a.elo, b.elo = new_a, new_b
+        a.votes_count += 1
+        b.votes_count += 1
+    
+    user_votes = {user: [list(p) for p in pairs] for user, pairs in user_pairs.items() if pairs}
+    
+    def dump(name, data):
+        with open(path / name, 'w') as f:
+            json.dump(data, f, indent=2)
+    
+    dump("items.json", [item.to_dict() for item in by_id.values()])
+    dump("votes.json", [vote.to_dict() for vote in votes])
+    dump("user_votes.json", user_votes)
+    dump("sessions.json", {})
+    
+    return {"items": num_items, "votes": len(votes), "users": num_users, "seed": seed}
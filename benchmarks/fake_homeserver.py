@@ -0,0 +1,324 @@
+"""
+In-process stand-in for a Matrix homeserver.
+
+Implements just enough of the client-server API for RankingBot/AsyncClient:
+login, whoami, filter upload, long-polling sync, send and set display name.
+Sends can be rate limited with 429/M_LIMIT_EXCEEDED responses. Test code
+injects user messages directly and can subscribe to everything sent to a room.
+
+Built on aiohttp, which matrix-nio already depends on.
+"""
+
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+
+class _TokenBucket:
+    """Refilling token bucket used for send rate limiting."""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+    
+    def take(self) -> float:
+        """Take a token. Returns 0 on success, else seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class FakeHomeserver:
+    """A single-process fake homeserver holding rooms and events in memory."""
+    
+    def __init__(self, server_name: str = "localhost",
+                 send_rate: Optional[float] = None, send_burst: int = 10):
+        """
+        Args:
+            server_name: Server name used in user, room and event IDs
+            send_rate: Sends per second allowed per user (None disables rate limiting)
+            send_burst: Bucket size for send rate limiting
+        """
+        self.server_name = server_name
+        self.send_rate = send_rate
+        self.send_burst = send_burst
+        
+        self.rooms: Dict[str, Dict] = {}         # room_id -> {"members": [...], "events": [...], "created": pos}
+        self.passwords: Dict[str, str] = {}      # user_id -> password
+        self.tokens: Dict[str, str] = {}         # access token -> user_id
+        self.filters: Dict[str, Dict] = {}       # filter_id -> definition
+        self.buckets: Dict[str, _TokenBucket] = {}
+        self.listeners: Dict[str, List[asyncio.Queue]] = {}
+        
+        # Global stream position; sync tokens are "s<pos>". user_pos is the
+        # latest position that touched one of the user's rooms, so long-polls
+        # only wake up for events the user can see.
+        self.pos = 0
+        self.user_pos: Dict[str, int] = {}
+        self._new_events = asyncio.Condition()
+        
+        # Counters for load tests, and the filter argument of every sync as
+        # (user_id, filter) for tests
+        self.stats = {"syncs": 0, "sends": 0, "rate_limited": 0, "filters_uploaded": 0}
+        self.sync_filters: List[tuple] = []
+        
+        self.app = web.Application()
+        prefix = "/_matrix/client/{version}"
+        self.app.router.add_get("/_matrix/client/versions", self._versions)
+        self.app.router.add_post(prefix + "/login", self._login)
+        self.app.router.add_get(prefix + "/account/whoami", self._whoami)
+        self.app.router.add_post(prefix + "/user/{user_id}/filter", self._upload_filter)
+        self.app.router.add_get(prefix + "/sync", self._sync)
+        self.app.router.add_put(prefix + "/rooms/{room_id}/send/{event_type}/{txn_id}", self._send)
+        self.app.router.add_put(prefix + "/profile/{user_id}/displayname", self._set_displayname)
+        
+        self._runner = None
+        self.url = None
+    
+    # Lifecycle
+    
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving; returns the base URL."""
+        # Abandoned long-polls would otherwise hold up stop() for their full timeout
+        self._runner = web.AppRunner(self.app, shutdown_timeout=0.5)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{port}"
+        return self.url
+    
+    async def stop(self):
+        """Stop serving."""
+        if self._runner:
+            await self._runner.cleanup()
+    
+    # Test-side API
+    
+    def register(self, localpart: str, password: str = "password") -> str:
+        """Register a user; returns the user ID."""
+        user_id = f"@{localpart}:{self.server_name}"
+        self.passwords[user_id] = password
+        return user_id
+    
+    def create_room(self, members: List[str]) -> str:
+        """Create a room with the given joined members; returns the room ID."""
+        room_id = f"!room{len(self.rooms)}:{self.server_name}"
+        # Creation takes a stream position so the next sync includes the room's state
+        self.pos += 1
+        self.rooms[room_id] = {"members": list(members), "events": [], "created": self.pos}
+        return room_id
+    
+    async def inject_message(self, room_id: str, sender: str, body: str) -> Dict:
+        """Post a text message as if a client had sent it; returns the event."""
+        return await self._append(room_id, sender, "m.room.message", {"msgtype": "m.text", "body": body})
+    
+    async def inject_event(self, room_id: str, sender: str, event_type: str, content: Dict) -> Dict:
+        """Post an event of any type as if a client had sent it; returns the event."""
+        return await self._append(room_id, sender, event_type, content)
+    
+    def subscribe(self, room_id: str) -> asyncio.Queue:
+        """Get a queue receiving every event appended to a room from now on."""
+        queue = asyncio.Queue()
+        self.listeners.setdefault(room_id, []).append(queue)
+        return queue
+    
+    # Internals
+    
+    async def _append(self, room_id: str, sender: str, event_type: str, content: Dict) -> Dict:
+        async with self._new_events:
+            self.pos += 1
+            event = {
+                "event_id": f"${self.pos}:{self.server_name}",
+                "sender": sender,
+                "type": event_type,
+                "content": content,
+                "origin_server_ts": int(time.time() * 1000),
+                "unsigned": {"age": 0},
+                "_pos": self.pos
+            }
+            self.rooms[room_id]["events"].append(event)
+            for member in self.rooms[room_id]["members"]:
+                self.user_pos[member] = self.pos
+            self._new_events.notify_all()
+        
+        for queue in self.listeners.get(room_id, []):
+            queue.put_nowait(event)
+        return event
+    
+    def _auth(self, request) -> str:
+        header = request.headers.get("Authorization", "")
+        token = header[len("Bearer "):] if header.startswith("Bearer ") else request.query.get("access_token")
+        user_id = self.tokens.get(token)
+        if not user_id:
+            raise web.HTTPUnauthorized(
+                text=json.dumps({"errcode": "M_UNKNOWN_TOKEN", "error": "Unknown access token"}),
+                content_type="application/json"
+            )
+        return user_id
+    
+    def _member_event(self, room_id: str, user_id: str) -> Dict:
+        return {
+            "event_id": f"$member-{user_id}-{room_id}",
+            "sender": user_id,
+            "state_key": user_id,
+            "type": "m.room.member",
+            "content": {"membership": "join", "displayname": user_id.split(":")[0].lstrip("@")},
+            "origin_server_ts": 0,
+            "unsigned": {}
+        }
+    
+    def _resolve_filter(self, value: Optional[str]) -> Dict:
+        if not value:
+            return {}
+        if value.startswith("{"):
+            return json.loads(value)
+        return self.filters.get(value, {})
+    
+    # Handlers
+    
+    async def _versions(self, request):
+        return web.json_response({"versions": ["r0.6.1", "v1.1", "v1.2", "v1.3"]})
+    
+    async def _login(self, request):
+        body = await request.json()
+        identifier = body.get("identifier", {})
+        user = identifier.get("user") or body.get("user", "")
+        user_id = user if user.startswith("@") else f"@{user}:{self.server_name}"
+        
+        if self.passwords.get(user_id) != body.get("password"):
+            return web.json_response({"errcode": "M_FORBIDDEN", "error": "Invalid password"}, status=403)
+        
+        token = f"token-{len(self.tokens)}-{user_id}"
+        self.tokens[token] = user_id
+        return web.json_response({
+            "user_id": user_id,
+            "access_token": token,
+            "device_id": body.get("device_id") or "FAKEDEVICE"
+        })
+    
+    async def _whoami(self, request):
+        return web.json_response({"user_id": self._auth(request)})
+    
+    async def _upload_filter(self, request):
+        self._auth(request)
+        filter_id = str(len(self.filters))
+        self.filters[filter_id] = await request.json()
+        self.stats["filters_uploaded"] += 1
+        return web.json_response({"filter_id": filter_id})
+    
+    async def _set_displayname(self, request):
+        self._auth(request)
+        return web.json_response({})
+    
+    async def _send(self, request):
+        user_id = self._auth(request)
+        room_id = request.match_info["room_id"]
+        if room_id not in self.rooms or user_id not in self.rooms[room_id]["members"]:
+            return web.json_response({"errcode": "M_FORBIDDEN", "error": "Not in room"}, status=403)
+        
+        if self.send_rate:
+            bucket = self.buckets.setdefault(user_id, _TokenBucket(self.send_rate, self.send_burst))
+            wait = bucket.take()
+            if wait:
+                self.stats["rate_limited"] += 1
+                return web.json_response({
+                    "errcode": "M_LIMIT_EXCEEDED",
+                    "error": "Too many requests",
+                    "retry_after_ms": int(wait * 1000) + 1
+                }, status=429)
+        
+        content = await request.json()
+        event = await self._append(room_id, user_id, request.match_info["event_type"], content)
+        self.stats["sends"] += 1
+        return web.json_response({"event_id": event["event_id"]})
+    
+    async def _sync(self, request):
+        user_id = self._auth(request)
+        self.stats["syncs"] += 1
+        
+        since = request.query.get("since")
+        since_pos = int(since[1:]) if since else None
+        timeout = int(request.query.get("timeout", "0")) / 1000.0
+        full_state = request.query.get("full_state") == "true"
+        self.sync_filters.append((user_id, request.query.get("filter")))
+        sync_filter = self._resolve_filter(request.query.get("filter"))
+        
+        if since_pos is not None and timeout > 0 and self.user_pos.get(user_id, 0) <= since_pos:
+            async with self._new_events:
+                try:
+                    await asyncio.wait_for(
+                        self._new_events.wait_for(lambda: self.user_pos.get(user_id, 0) > since_pos),
+                        timeout
+                    )
+                except asyncio.TimeoutError:
+                    pass
+        
+        room_filter = sync_filter.get("room", {})
+        timeline_filter = room_filter.get("timeline", {})
+        types = timeline_filter.get("types")
+        limit = timeline_filter.get("limit", 10)
+        lazy_members = room_filter.get("state", {}).get("lazy_load_members", False)
+        
+        joined = {}
+        for room_id, room in self.rooms.items():
+            if user_id not in room["members"]:
+                continue
+            
+            new_room = since_pos is None or room["created"] > since_pos
+            events = [e for e in room["events"] if since_pos is None or e["_pos"] > since_pos]
+            if types is not None:
+                events = [e for e in events if e["type"] in types]
+            limited = len(events) > limit
+            events = events[-limit:]
+            
+            if not events and not new_room and not full_state:
+                continue
+            
+            # Like Synapse, state and the member summary only come with
+            # initial, full-state or gappy syncs (membership never changes here)
+            if new_room or full_state or limited:
+                members = room["members"]
+                if lazy_members:
+                    senders = {e["sender"] for e in events} | {user_id}
+                    members = [m for m in members if m in senders]
+                state = [self._member_event(room_id, m) for m in members]
+                summary = {
+                    "m.joined_member_count": len(room["members"]),
+                    "m.invited_member_count": 0
+                }
+            else:
+                state = []
+                summary = {}
+            
+            joined[room_id] = {
+                "timeline": {
+                    "events": [{k: v for k, v in e.items() if k != "_pos"} for e in events],
+                    "limited": limited,
+                    "prev_batch": f"s{since_pos or 0}"
+                },
+                "state": {"events": state},
+                "summary": summary,
+                "ephemeral": {"events": []},
+                "account_data": {"events": []},
+                "unread_notifications": {"notification_count": 0, "highlight_count": 0}
+            }
+        
+        return web.json_response({
+            "next_batch": f"s{self.pos}",
+            "rooms": {"join": joined, "invite": {}, "leave": {}},
+            "presence": {"events": []},
+            "account_data": {"events": []},
+            "to_device": {"events": []},
+            "device_lists": {"changed": [], "left": []},
+            "device_one_time_keys_count": {}
+        })
@@ -0,0 +1,212 @@
+"""
+End-to-end load generator: the real RankingBot against a local fake homeserver.
+
+Simulates N users voting in DMs and M rooms issuing commands, and measures
+vote-to-reply latency (user message injected -> first bot reply in that room)
+and sustained votes per second.
+
+Usage (from the repository root):
+    python -m benchmarks.loadgen --dm-users 50 --vote-rate 1 --duration 30
+    python -m benchmarks.loadgen --dm-users 20 --rooms 2 --room-users 5 --send-rate 5
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import tempfile
+import time
+from typing import Dict, List
+
+from benchmarks import common
+from benchmarks.datagen import generate_dataset
+from benchmarks.fake_homeserver import FakeHomeserver
+
+# Prompts end with this; anything else after a vote is the confirmation
+PROMPT_MARKER = "Reply with"
+
+
+async def next_bot_message(queue: asyncio.Queue, bot_id: str, timeout: float) -> Dict:
+    """Wait for the next event from the bot on a room subscription."""
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        event = await asyncio.wait_for(queue.get(), remaining)
+        if event["sender"] == bot_id:
+            return event
+
+
+async def dm_user(hs: FakeHomeserver, bot_id: str, user_id: str, rate: float,
+                  stop_at: float, latencies: List[float], rng: random.Random, timeout: float):
+    """One user voting in a DM at roughly `rate` votes per second."""
+    room_id = hs.create_room([user_id, bot_id])
+    queue = hs.subscribe(room_id)
+    
+    await hs.inject_message(room_id, user_id, "hi")
+    prompt = await next_bot_message(queue, bot_id, timeout)
+    if PROMPT_MARKER not in prompt["content"]["body"]:
+        return
+    
+    while time.monotonic() < stop_at:
+        # Exponential think time gives a Poisson arrival process per user
+        await asyncio.sleep(rng.expovariate(rate))
+        
+        t0 = time.perf_counter()
+        await hs.inject_message(room_id, user_id, rng.choice(["1", "2"]))
+        await next_bot_message(queue, bot_id, timeout)
+        latencies.append(time.perf_counter() - t0)
+        
+        # Wait for the next prompt (or the "all done" message)
+        reply = await next_bot_message(queue, bot_id, timeout)
+        if PROMPT_MARKER not in reply["content"]["body"]:
+            return
+
+
+async def room_user(hs: FakeHomeserver, bot_id: str, bot_name: str, room_id: str, user_id: str,
+                    lock: asyncio.Lock, rate: float, stop_at: float, latencies: List[float],
+                    rng: random.Random, timeout: float):
+    """One user mentioning the bot in a shared room at roughly `rate` commands per second."""
+    queue = hs.subscribe(room_id)
+    
+    while time.monotonic() < stop_at:
+        await asyncio.sleep(rng.expovariate(rate))
+        
+        # One outstanding command per room so replies can be attributed
+        async with lock:
+            while not queue.empty():
+                queue.get_nowait()
+            t0 = time.perf_counter()
+            await hs.inject_message(room_id, user_id, f"@{bot_name} reveal")
+            await next_bot_message(queue, bot_id, timeout)
+            latencies.append(time.perf_counter() - t0)
+
+
+def summarize(name: str, latencies: List[float], duration: float, params: Dict) -> Dict:
+    """Summarize end-to-end latencies in the same shape as the micro-benchmarks."""
+    total = len(latencies)
+    return {
+        "name": name,
+        "params": params,
+        "iterations": total,
+        "p50_ms": common.percentile(latencies, 50) * 1000,
+        "p99_ms": common.percentile(latencies, 99) * 1000,
+        "mean_ms": sum(latencies) / total * 1000 if total else 0.0,
+        "ops_per_sec": total / duration if duration > 0 else 0.0,
+        "peak_mem_bytes": None
+    }
+
+
+async def run_load(args) -> List[Dict]:
+    hs = FakeHomeserver(send_rate=args.send_rate, send_burst=args.send_burst)
+    url = await hs.start()
+    bot_id = hs.register("rankbot", "botpass")
+    bot_name = "rankbot"
+    rng = random.Random(args.seed)
+    
+    with tempfile.TemporaryDirectory(prefix="rankbot-load-") as data_dir:
+        generate_dataset(data_dir, args.items, 0, 1, seed=args.seed)
+        
+        # Config reads the environment at import time, so set it up first
+        os.environ.update({
+            "MATRIX_HOMESERVER": url,
+            "MATRIX_USER_ID": bot_id,
+            "MATRIX_PASSWORD": "botpass",
+            "DATA_DIR": data_dir,
+            "ALLOWED_USERS": ""
+        })
+        os.environ.pop("MATRIX_ACCESS_TOKEN", None)
+        if not args.admission:
+            # Measure the bot itself, not its rate limits
+            os.environ.update({"USER_MESSAGES_PER_MINUTE": "0", "ROOM_MESSAGES_PER_MINUTE": "0"})
+        from bot import RankingBot
+        
+        # The bot logs every event at INFO; keep the console readable under load
+        logging.getLogger().setLevel(args.log_level)
+        
+        bot = RankingBot()
+        bot_task = asyncio.create_task(bot.run())
+        
+        started = time.monotonic()
+        while not bot.ready:
+            if bot_task.done() or time.monotonic() - started > args.timeout:
+                raise RuntimeError("Bot failed to start against the fake homeserver")
+            await asyncio.sleep(0.05)
+        
+        stop_at = time.monotonic() + args.duration
+        vote_latencies: List[float] = []
+        command_latencies: List[float] = []
+        tasks = []
+        
+        for i in range(args.dm_users):
+            user_id = hs.register(f"voter{i}")
+            tasks.append(dm_user(hs, bot_id, user_id, args.vote_rate, stop_at,
+                                 vote_latencies, random.Random(rng.random()), args.timeout))
+        
+        for r in range(args.rooms):
+            members = [hs.register(f"room{r}user{i}") for i in range(args.room_users)]
+            room_id = hs.create_room(members + [bot_id])
+            lock = asyncio.Lock()
+            for user_id in members:
+                tasks.append(room_user(hs, bot_id, bot_name, room_id, user_id, lock, args.command_rate,
+                                       stop_at, command_latencies, random.Random(rng.random()), args.timeout))
+        
+        t0 = time.monotonic()
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        duration = time.monotonic() - t0
+        errors = [o for o in outcomes if isinstance(o, BaseException)]
+        
+        # Graceful shutdown, as on SIGTERM
+        bot.request_shutdown()
+        await bot_task
+    
+    await hs.stop()
+    
+    params = {
+        "items": args.items, "dm_users": args.dm_users, "vote_rate": args.vote_rate,
+        "rooms": args.rooms, "room_users": args.room_users, "send_rate": args.send_rate
+    }
+    results = [summarize("e2e_vote", vote_latencies, duration, params)]
+    if args.rooms:
+        results.append(summarize("e2e_room_command", command_latencies, duration, params))
+    
+    print(f"# {duration:.1f}s, homeserver stats {hs.stats}, {len(errors)} user errors")
+    for error in errors[:5]:
+        print(f"#   {type(error).__name__}: {error}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test RankingBot against a fake homeserver")
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--dm-users", type=int, default=20, help="Users voting in DMs")
+    parser.add_argument("--vote-rate", type=float, default=1.0, help="Votes per second per DM user")
+    parser.add_argument("--rooms", type=int, default=0, help="Shared rooms issuing commands")
+    parser.add_argument("--room-users", type=int, default=3, help="Users per shared room")
+    parser.add_argument("--command-rate", type=float, default=0.2, help="Commands per second per room user")
+    parser.add_argument("--send-rate", type=float, default=None, help="Homeserver send rate limit per user (429s above it)")
+    parser.add_argument("--send-burst", type=int, default=10)
+    parser.add_argument("--admission", action="store_true",
+                        help="Keep the bot's admission control limits (disabled by default)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to generate load")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for any single reply")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="WARNING", help="Log level for the bot while under load")
+    parser.add_argument("--output", help="Also write JSON results to this path")
+    args = parser.parse_args()
+    
+    if args.rooms and args.room_users < 2:
+        parser.error("--room-users must be at least 2 (two-member rooms are treated as DMs)")
+    
+    results = asyncio.run(run_load(args))
+    for result in results:
+        print(common.format_row(result))
+    
+    if args.output:
+        common.write_results(results, {"loadgen": vars(args)}, args.output)
+
+
+if __name__ == "__main__":
+    main()
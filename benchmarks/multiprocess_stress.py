@@ -0,0 +1,118 @@
+"""
+Multi-process stress test for the data directory lock.
+
+Several writer processes apply votes the way DMHandler does (read ratings,
+record the vote, write both ratings, all in one store.transaction()) while
+reader processes keep loading the rankings. Afterwards the data must show
+every vote exactly once: no lost updates from interleaved read-modify-write.
+
+Usage (from the repository root):
+    python -m benchmarks.multiprocess_stress --writers 4 --votes 50 --readers 2
+"""
+
+import argparse
+import multiprocessing
+import random
+import sys
+import tempfile
+import time
+from typing import Dict
+
+from benchmarks.datagen import generate_dataset
+
+from ranking import EloRanking
+from storage import JSONStore
+
+
+def writer(data_dir: str, worker: int, num_votes: int, seed: int):
+    """Apply num_votes random votes, one transaction each."""
+    store = JSONStore(data_dir)
+    elo = EloRanking(k_factor=32.0)
+    rng = random.Random(seed + worker)
+    item_ids = [item.id for item in store.get_all_items()]
+    user_id = f"@stress{worker}:bench.local"
+    
+    for _ in range(num_votes):
+        a_id, b_id = rng.sample(item_ids, 2)
+        with store.transaction():
+            item_a = store.get_item_by_id(a_id)
+            item_b = store.get_item_by_id(b_id)
+            store.record_vote(user_id=user_id, item_a_id=a_id, item_b_id=b_id, winner_id=a_id)
+            new_a, new_b = elo.update_ratings(item_a.elo, item_b.elo, True)
+            store.update_item_elo(a_id, new_a)
+            store.update_item_elo(b_id, new_b)
+
+
+def reader(data_dir: str):
+    """Load the rankings in a loop until terminated."""
+    store = JSONStore(data_dir)
+    while True:
+        store.get_items_sorted_by_elo()
+        store.get_all_votes()
+
+
+def stress(data_dir: str, num_items: int, num_writers: int, num_votes: int,
+           num_readers: int, seed: int = 0) -> Dict:
+    """
+    Run the writers and readers against a fresh data directory.
+    
+    Returns:
+        Expected and actual vote and votes_count totals, failed writer
+        exit codes and the duration
+    """
+    generate_dataset(data_dir, num_items, 0, 1, seed=seed)
+    
+    # Readers run until the writers are done
+    t0 = time.monotonic()
+    writers = [multiprocessing.Process(target=writer, args=(data_dir, i, num_votes, seed))
+               for i in range(num_writers)]
+    readers = [multiprocessing.Process(target=reader, args=(data_dir,))
+               for _ in range(num_readers)]
+    for p in writers + readers:
+        p.start()
+    for p in writers:
+        p.join()
+    duration = time.monotonic() - t0
+    for p in readers:
+        p.terminate()
+        p.join()
+    
+    store = JSONStore(data_dir)
+    expected = num_writers * num_votes
+    return {
+        "expected_votes": expected,
+        "votes": len(store.get_all_votes()),
+        "expected_votes_count": 2 * expected,
+        "votes_count": sum(item.votes_count for item in store.get_all_items()),
+        "failed": [p.exitcode for p in writers if p.exitcode != 0],
+        "duration": duration
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stress the JSONStore data directory lock from several processes")
+    parser.add_argument("--items", type=int, default=30)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--votes", type=int, default=50, help="Votes per writer")
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory(prefix="rankbot-stress-") as data_dir:
+        result = stress(data_dir, args.items, args.writers, args.votes, args.readers, args.seed)
+    
+    expected, duration = result["expected_votes"], result["duration"]
+    print(f"{expected} votes from {args.writers} writers in {duration:.1f}s "
+          f"({expected / duration:.0f} votes/s), {args.readers} concurrent readers")
+    print(f"votes recorded: {result['votes']} (expected {expected})")
+    print(f"sum of votes_count: {result['votes_count']} (expected {result['expected_votes_count']})")
+    
+    if (result["failed"] or result["votes"] != expected
+            or result["votes_count"] != result["expected_votes_count"]):
+        print("FAILED: lost or duplicated updates", file=sys.stderr)
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Run the benchmark suite and write JSON results.
+
+Usage (from the repository root):
+    python -m benchmarks.run --preset quick
+    python -m benchmarks.run --preset full --only storage,pairing
+    python -m benchmarks.compare results/old.json results/new.json
+"""
+
+import argparse
+import itertools
+import tempfile
+import time
+
+from benchmarks import common
+from benchmarks.datagen import generate_dataset
+
+# (items, votes, users) grids; votes are capped per dataset, see generate_dataset
+PRESETS = {
+    "quick": {"items": [10, 100], "votes": [10_000], "users": [100]},
+    "default": {"items": [10, 100, 1000], "votes": [10_000, 100_000], "users": [1000]},
+    "full": {"items": [10, 100, 1000, 5000], "votes": [10_000, 100_000, 1_000_000], "users": [1000]},
+}
+
+SUITES = ["storage", "pairing", "commands"]
+
+
+def load_suite(name: str):
+    """Import a benchmark module lazily (commands needs the full bot dependencies)."""
+    if name == "storage":
+        from benchmarks import bench_storage as module
+    elif name == "pairing":
+        from benchmarks import bench_pairing as module
+    elif name == "commands":
+        from benchmarks import bench_commands as module
+    else:
+        raise ValueError(f"Unknown suite: {name}")
+    return module
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ranking bot benchmarks")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="quick")
+    parser.add_argument("--only", default=",".join(SUITES),
+                        help="Comma-separated suites to run (storage,pairing,commands)")
+    parser.add_argument("--budget", type=float, default=2.0,
+                        help="Time budget per case in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Output JSON path (default: benchmarks/results/<commit>.json)")
+    args = parser.parse_args()
+    
+    preset = PRESETS[args.preset]
+    suites = [s.strip() for s in args.only.split(",") if s.strip()]
+    modules = [(name, load_suite(name)) for name in suites]
+    results = []
+    
+    for num_items, num_votes, num_users in itertools.product(preset["items"], preset["votes"], preset["users"]):
+        for name, module in modules:
+            # Fresh data per suite: the storage and command cases mutate the store
+            with tempfile.TemporaryDirectory(prefix="rankbot-bench-") as data_dir:
+                t0 = time.perf_counter()
+                dataset = generate_dataset(data_dir, num_items, num_votes, num_users, seed=args.seed)
+                print(f"# {name}: generated {dataset} in {time.perf_counter() - t0:.1f}s")
+                
+                for result in module.run(data_dir, dataset, args.budget, seed=args.seed):
+                    print(common.format_row(result))
+                    results.append(result)
+    
+    path = common.write_results(results, {"preset": args.preset, "seed": args.seed, "budget": args.budget}, args.output)
+    print(f"\nResults written to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,22 +3,39 @@
 Matrix Pairwise Ranking Bot - A Matrix bot for collaborative ranking using pairwise comparisons.
 """
 
+import time
+
+# Process start as seen by --measure-startup (imports are its first phase)
+_STARTED = time.perf_counter()
+
+import argparse
 import asyncio
+import importlib
 import logging
+import signal
 import sys
+from typing import Optional
 
+# Only what login and sync need up front (storage loads metrics and tracing
+# itself); the handlers and commands are imported in a thread while the
+# login request is in flight (see run())
 from nio import (
     AsyncClient,
     AsyncClientConfig,
     RoomMessageText,
     LoginError,
-    SyncError
+    SyncError,
+    UploadFilterError,
+    WhoamiError
 )
 
 from config import Config
-from storage import JSONStore
+from storage import JSONStore, Lease
 from ranking import EloRanking
-from handlers import MessageHandler
+from metrics import MetricsServer, SYNC_LATENCY, SYNC_EVENTS, EVENTS_IN_FLIGHT
+from tracing import Profiler, StartupTimer, start_trace
+
+_IMPORTED = time.perf_counter()
 
 # Configure logging
 logging.basicConfig(
@@ -35,25 +52,79 @@ logger = logging.getLogger(__name__)
 class RankingBot:
     """Main bot class."""
     
-    def __init__(self):
-        """Initialize the bot."""
+    def __init__(self, startup: Optional[StartupTimer] = None, measure_startup: bool = False):
+        """
+        Initialize the bot.
+        
+        Args:
+            startup: Timer for the startup phases (one starting now if not given)
+            measure_startup: Log the phase timings and shut down once ready
+        """
+        self.startup = startup or StartupTimer()
+        self.measure_startup = measure_startup
+        
         # Validate configuration
-        Config.validate()
+        with self.startup.phase("config"):
+            Config.validate()
         
-        # Initialize storage
-        self.store = JSONStore(Config.DATA_DIR)
+        # Initialize storage. Opening it only creates missing files; the data
+        # itself is parsed by the warmup that overlaps login and sync.
+        with self.startup.phase("store open"):
+            self.store = JSONStore(
+                Config.DATA_DIR,
+                session_ttl=Config.SESSION_TTL,
+                durability=Config.DURABILITY,
+                fsync_interval=Config.FSYNC_INTERVAL_MS / 1000
+            )
+        
+        # Background store warmup, started by run(), and the sync state it
+        # read first (so sync_forever doesn't wait on the warmup for it)
+        self._warmup: Optional[asyncio.Task] = None
+        self._sync_state = None
+        
+        # Held while running so a second instance can't sync the same data
+        self.lease = None
         
         # Initialize Elo ranking
-        self.elo = EloRanking(k_factor=32.0)
+        # (with the K-factor and decay of the last rerank, if any)
+        params = self.store.get_ranking_params()
+        self.elo = EloRanking(
+            k_factor=params.get('k_factor') or Config.ELO_K_FACTOR,
+            half_life=params.get('half_life')
+        )
         
-        # Track when bot started - only respond to messages after this
-        self.start_time = None
+        # Whether to respond to messages yet. Stays False during the very first
+        # sync on a fresh data directory so we don't answer old history.
         self.ready = False
         
+        # Last next_batch token persisted to storage
+        self._saved_next_batch = None
+        
+        # Shutdown: set by SIGTERM/SIGINT; while set, new events are left for
+        # the next run (and the sync token isn't moved past them)
+        self._stopping = asyncio.Event()
+        self._skipped_events = False
+        
+        # Events being handled right now; _idle is set whenever there are none
+        self._in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        
+        # Server-side sync filter (uploaded filter ID, or the inline definition)
+        self.sync_filter = None
+        
+        # Ask for full room state on the next sync. Set when resuming: nio
+        # starts with no rooms, and an incremental sync only carries member
+        # counts for rooms whose membership changed, so DMs wouldn't be recognized.
+        self._full_state_next = False
+        
+        client_start = time.perf_counter()
+        
         # Initialize Matrix client
         client_config = AsyncClientConfig(
             store_sync_tokens=True,
             encryption_enabled=False,  # Simplified - enable if needed
+            max_limit_exceeded=0,  # Surface 429s so sends can count and retry them
         )
         
         self.client = AsyncClient(
@@ -63,15 +134,27 @@ class RankingBot:
             store_path=Config.STORE_DIR
         )
         
-        # Initialize message handler
-        self.message_handler = MessageHandler(
+        # On-demand profiler (armed via `@bot profile` or SIGUSR1)
+        self.profiler = Profiler(Config.DATA_DIR)
+        
+        # Message handler, created by _setup_handlers() once logged in
+        self.message_handler = None
+        
+        # Optional Prometheus metrics endpoint
+        self.metrics_server = None
+        if Config.METRICS_PORT:
+            self.metrics_server = MetricsServer(Config.METRICS_HOST, int(Config.METRICS_PORT))
+        self.startup.record("client", client_start)
+    
+    def _setup_handlers(self, handlers):
+        """Create the message handler from the imported `handlers` package and start taking events."""
+        self.message_handler = handlers.MessageHandler(
             self.client,
             self.store,
             self.elo,
-            Config.USER_ID
+            Config.USER_ID,
+            profiler=self.profiler
         )
-        
-        # Register callbacks
         self.client.add_event_callback(self._handle_message, RoomMessageText)
     
     async def _handle_message(self, room, event: RoomMessageText):
@@ -82,13 +165,24 @@ class RankingBot:
                 logger.debug(f"Ignoring old message {event.event_id} (bot not ready yet)")
                 return
             
-            # Only process messages sent after the bot started
-            if self.start_time and event.server_timestamp < self.start_time:
-                logger.debug(f"Ignoring old message {event.event_id} (timestamp {event.server_timestamp} < start {self.start_time})")
+            # Shutting down: leave it for the next run
+            if self._stopping.is_set():
+                self._skipped_events = True
                 return
             
             logger.info(f"Received event {event.event_id} in room {room.room_id} from {event.sender}")
-            await self.message_handler.handle_message(room, event)
+            EVENTS_IN_FLIGHT.inc()
+            self._in_flight += 1
+            self._idle.clear()
+            try:
+                with start_trace("event", Config.SLOW_EVENT_MS, event_id=event.event_id, room=room.room_id), \
+                        self.profiler.profile_event():
+                    await self.message_handler.handle_message(room, event)
+            finally:
+                EVENTS_IN_FLIGHT.dec()
+                self._in_flight -= 1
+                if not self._in_flight:
+                    self._idle.set()
         except Exception as e:
             logger.error(f"Error handling message: {e}", exc_info=True)
     
@@ -103,11 +197,12 @@ class RankingBot:
             self.client.access_token = Config.ACCESS_TOKEN
             self.client.user_id = Config.USER_ID
             
-            # Verify the token works by doing a simple sync
+            # Verify the token works. Use whoami rather than a sync so the
+            # saved sync position isn't skipped past before we resume from it.
             try:
-                sync_response = await self.client.sync(timeout=1000)
-                if isinstance(sync_response, SyncError):
-                    logger.error(f"Failed to authenticate with access token: {sync_response.message}")
+                whoami_response = await self.client.whoami()
+                if isinstance(whoami_response, WhoamiError):
+                    logger.error(f"Failed to authenticate with access token: {whoami_response.message}")
                     return False
                 logger.info("Access token authentication successful!")
             except Exception as e:
@@ -138,46 +233,273 @@ class RankingBot:
         
         return True
     
+    def _save_sync_state(self):
+        """Persist the sync token and dedup store after a handled sync."""
+        next_batch = self.client.next_batch
+        if self._skipped_events:
+            # Events in the current batch were left unhandled: keep the old
+            # position so they're redelivered (dedup skips the handled ones)
+            next_batch = self._saved_next_batch
+        if not next_batch or (next_batch == self._saved_next_batch and not self._stopping.is_set()):
+            return
+        
+        self.store.save_sync_state(next_batch, self.message_handler.get_processed_events())
+        self._saved_next_batch = next_batch
+    
+    async def setup_sync_filter(self):
+        """Upload the configured sync filter so every sync only fetches what we handle."""
+        filter_def = Config.get_sync_filter()
+        if filter_def is None:
+            logger.info("Sync filter disabled")
+            return
+        
+        response = await self.client.upload_filter(
+            event_fields=filter_def.get("event_fields"),
+            presence=filter_def.get("presence"),
+            account_data=filter_def.get("account_data"),
+            room=filter_def.get("room")
+        )
+        
+        if isinstance(response, UploadFilterError):
+            # Servers also accept the filter inline on each sync
+            logger.warning(f"Failed to upload sync filter ({response.message}), sending it inline")
+            self.sync_filter = filter_def
+        else:
+            logger.info(f"Using sync filter {response.filter_id}")
+            self.sync_filter = response.filter_id
+    
     async def sync_forever(self):
         """Sync messages forever."""
         logger.info("Starting sync loop...")
         
-        # Record start time (in milliseconds since epoch, like Matrix timestamps)
-        import time
-        self.start_time = int(time.time() * 1000)
+        with self.startup.phase("sync setup"):
+            await self.setup_sync_filter()
+            
+            # Resume from where we left off, if we've synced before
+            next_batch, processed_events = self._sync_state or self.store.get_sync_state()
+            self.message_handler.load_processed_events(processed_events)
         
-        # Initial sync to get current state (don't respond to old messages)
-        sync_response = await self.client.sync(timeout=30000, full_state=True)
+        if next_batch:
+            # Messages sent while we were down arrive in the first sync and are
+            # handled normally; anything already handled is skipped by dedup
+            self.client.next_batch = next_batch
+            self._saved_next_batch = next_batch
+            self._full_state_next = True
+            await self._become_ready()
+            logger.info("Resuming from saved sync position. Bot is ready!")
+        else:
+            # First run: initial sync to get current state (don't respond to old messages)
+            with self.startup.phase("initial sync"):
+                sync_response = await self.client.sync(
+                    timeout=30000,
+                    sync_filter=self.sync_filter,
+                    full_state=True
+                )
+            
+            if isinstance(sync_response, SyncError):
+                logger.error(f"Initial sync failed: {sync_response.message}")
+                return
+            
+            # Mark bot as ready - now we'll respond to new messages. Saving
+            # waits for this: the warmup thread holds the store lock until then.
+            await self._become_ready()
+            self._save_sync_state()
+            logger.info("Initial sync complete. Bot is ready and will respond to new messages!")
         
-        if isinstance(sync_response, SyncError):
-            logger.error(f"Initial sync failed: {sync_response.message}")
-            return
+        # Sync loop
+        stop = asyncio.ensure_future(self._stopping.wait())
+        try:
+            while not self._stopping.is_set():
+                if not await self._sync_once(stop):
+                    # Back off, but wake up for a shutdown
+                    await asyncio.wait({stop}, timeout=5)
+        finally:
+            stop.cancel()
+    
+    async def _warm_store(self):
+        """Build the store's in-memory views and check them in a thread, overlapping login and the first sync."""
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._warm_and_check)
+        except Exception as e:
+            # Not fatal: whatever failed is built on first use instead
+            logger.warning(f"Store warmup failed: {e}", exc_info=True)
+    
+    def _warm_and_check(self):
+        with self.startup.phase("store warmup"):
+            self.store.warmup()
         
-        # Mark bot as ready - now we'll respond to new messages
+        if Config.CHECK_ON_STARTUP == "off":
+            return
+        with self.startup.phase("consistency check"):
+            report = self.store.check_consistency(repair=Config.CHECK_ON_STARTUP == "repair")
+        if report.repaired:
+            logger.warning(f"Repaired the data directory: {report.summary()}")
+        elif not report.ok:
+            logger.warning(f"Data directory is inconsistent (fix with `manage.py check --repair`): {report.summary()}")
+    
+    async def _become_ready(self):
+        """Start responding once the warmup is done; with --measure-startup, report and stop."""
+        if self._warmup:
+            with self.startup.phase("await warmup"):
+                await self._warmup
         self.ready = True
-        logger.info("Initial sync complete. Bot is ready and will respond to new messages!")
         
-        # Sync loop
-        while True:
+        elapsed = time.perf_counter() - self.startup.started
+        logger.info(f"Ready {elapsed * 1000:.0f} ms after start")
+        if self.measure_startup:
+            logger.info("Startup time by phase:\n" + self.startup.report())
+            self.request_shutdown()
+    
+    async def _sync_once(self, stop: asyncio.Future) -> bool:
+        """
+        Run one sync and its event callbacks, abandoning the long-poll on shutdown.
+        
+        Returns:
+            False if the sync failed (the caller backs off)
+        """
+        t0 = time.monotonic()
+        full_state = self._full_state_next
+        sync = asyncio.ensure_future(self.client.sync(
+            timeout=30000,
+            sync_filter=self.sync_filter,
+            since=self.client.next_batch,
+            full_state=full_state
+        ))
+        try:
+            await asyncio.wait({sync, stop}, return_when=asyncio.FIRST_COMPLETED)
+            if not sync.done():
+                # Shutting down. Handlers already running get until the
+                # deadline to finish; a sync still waiting on the server is dropped.
+                await self._finish_running_events(sync)
+                return True
+            
+            SYNC_LATENCY.observe(time.monotonic() - t0)
             try:
-                sync_response = await self.client.sync(timeout=30000)
+                sync_response = sync.result()
                 
                 if isinstance(sync_response, SyncError):
                     logger.error(f"Sync error: {sync_response.message}")
-                    await asyncio.sleep(5)
-                    continue
+                    return False
+                
+                SYNC_EVENTS.set(sum(
+                    len(room.timeline.events) for room in sync_response.rooms.join.values()
+                ))
+                if full_state:
+                    self._full_state_next = False
+                
+                # Callbacks have run for this batch, so it's safe to move past it
+                self._save_sync_state()
+                return True
                 
             except Exception as e:
                 logger.error(f"Sync loop error: {e}", exc_info=True)
-                await asyncio.sleep(5)
+                return False
+        finally:
+            if not sync.done():
+                sync.cancel()
+    
+    async def _finish_running_events(self, sync: asyncio.Future):
+        """
+        Wait up to SHUTDOWN_TIMEOUT for the sync's running handlers, then cancel it.
+        
+        There's no send queue to flush: each handler awaits its own replies,
+        so a finished handler has nothing left outbound.
+        """
+        try:
+            await asyncio.wait_for(self._idle.wait(), Config.SHUTDOWN_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self._in_flight} event(s) still running after {Config.SHUTDOWN_TIMEOUT:g}s; abandoning them")
+        
+        # Once nio has taken a batch, cancelling may cut its remaining callbacks
+        # short; keep the old sync position so the batch comes back next run
+        if self._in_flight or self.client.next_batch != self._saved_next_batch:
+            self._skipped_events = True
+        sync.cancel()
+    
+    def request_shutdown(self):
+        """Begin a graceful shutdown (SIGTERM/SIGINT): stop taking events, finish running ones, flush, exit."""
+        if not self._stopping.is_set():
+            logger.info("Shutting down: finishing events in progress...")
+            self._stopping.set()
+    
+    async def _shutdown(self, session_flusher: asyncio.Task):
+        """Finish or cancel background work and flush everything to disk."""
+        if session_flusher:
+            session_flusher.cancel()
+        
+        # A rerank in progress is worth finishing; speculation isn't
+        if self.message_handler:
+            try:
+                await asyncio.wait_for(self.message_handler.finish_background_work(), Config.SHUTDOWN_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("Background work still running at shutdown; abandoning it")
+            self.message_handler.close()
+        
+        # Final flush: sync position, sessions, then fsync whatever is pending
+        for step in (self._save_sync_state, self.store.flush_sessions, self.store.sync):
+            try:
+                step()
+            except Exception as e:
+                logger.error(f"Shutdown step {step.__name__} failed: {e}", exc_info=True)
+    
+    async def _flush_sessions_periodically(self):
+        """Expire idle voting sessions and persist the rest every SESSION_FLUSH_INTERVAL seconds."""
+        # Store calls from the loop would block on the lock the warmup holds
+        if self._warmup:
+            await self._warmup
+        while True:
+            await asyncio.sleep(Config.SESSION_FLUSH_INTERVAL)
+            try:
+                self.store.flush_sessions()
+            except Exception as e:
+                logger.error(f"Failed to save voting sessions: {e}", exc_info=True)
     
     async def run(self):
-        """Run the bot."""
+        """Run the bot until request_shutdown() (SIGTERM/SIGINT) or a fatal error."""
+        session_flusher = None
+        started = False
         try:
-            # Login
-            if not await self.login():
+            # Two bots on one data directory would answer every event twice
+            self.lease = Lease(self.store.data_dir / "bot.lease")
+            if not self.lease.acquire():
+                logger.error(f"Another bot instance (pid {self.lease.holder()}) is using {Config.DATA_DIR}. Exiting.")
+                return
+            
+            # Parse the data files while we wait on the homeserver. The sync
+            # state is read first: the warmup holds the store lock for a while.
+            self._sync_state = self.store.get_sync_state()
+            self._warmup = asyncio.create_task(self._warm_store())
+            
+            if self.metrics_server:
+                await self.metrics_server.start()
+            
+            # SIGUSR1 profiles the next PROFILE_EVENTS events
+            try:
+                asyncio.get_running_loop().add_signal_handler(
+                    signal.SIGUSR1, self.profiler.arm, Config.PROFILE_EVENTS
+                )
+            except (NotImplementedError, AttributeError):
+                pass  # Not available on this platform
+            
+            # SIGTERM (supervisor stop) and SIGINT (Ctrl-C) shut down gracefully
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                try:
+                    asyncio.get_running_loop().add_signal_handler(sig, self.request_shutdown)
+                except (NotImplementedError, AttributeError, RuntimeError):
+                    pass  # Not available on this platform (or not the main thread)
+            
+            started = True
+            session_flusher = asyncio.create_task(self._flush_sessions_periodically())
+            
+            # Login, importing the handlers and commands meanwhile
+            with self.startup.phase("login"):
+                handlers = asyncio.get_running_loop().run_in_executor(None, importlib.import_module, "handlers")
+                logged_in = await self.login()
+            if not logged_in:
                 logger.error("Failed to login. Exiting.")
                 return
+            with self.startup.phase("handlers"):
+                self._setup_handlers(await handlers)
             
             # Sync forever
             await self.sync_forever()
@@ -187,22 +509,36 @@ class RankingBot:
         except Exception as e:
             logger.error(f"Fatal error: {e}", exc_info=True)
         finally:
-            # Cleanup
+            # Cleanup. The final flush needs the store lock, so let the warmup finish first.
+            if self._warmup:
+                await self._warmup
+            if started:
+                await self._shutdown(session_flusher)
+            if self.metrics_server:
+                await self.metrics_server.close()
             await self.client.close()
+            if self.lease:
+                self.lease.release()
     
     async def close(self):
         """Clean up resources."""
         await self.client.close()
 
 
-async def main():
+async def main(measure_startup: bool = False):
     """Main entry point."""
-    bot = RankingBot()
+    startup = StartupTimer(_STARTED)
+    startup.record("imports", _STARTED, _IMPORTED)
+    bot = RankingBot(startup, measure_startup=measure_startup)
     await bot.run()
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Matrix pairwise ranking bot")
+    parser.add_argument("--measure-startup", action="store_true",
+                        help="Log how long each startup phase took, then exit once ready")
+    args = parser.parse_args()
     try:
-        asyncio.run(main())
+        asyncio.run(main(args.measure_startup))
     except KeyboardInterrupt:
         logger.info("Bot stopped by user.")
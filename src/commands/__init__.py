@@ -3,5 +3,10 @@
 from .add import AddCommand
 from .reveal import RevealCommand
 from .reset import ResetCommand
+from .metrics import MetricsCommand
+from .profile import ProfileCommand
+from .merge import MergeCommand
+from .stats import StatsCommand
+from .rerank import RerankCommand
 
-__all__ = ['AddCommand', 'RevealCommand', 'ResetCommand']
+__all__ = ['AddCommand', 'RevealCommand', 'ResetCommand', 'MetricsCommand', 'ProfileCommand', 'MergeCommand', 'StatsCommand', 'RerankCommand']
@@ -1,9 +1,9 @@
 """Command: Add a new item to rank."""
 
 import re
-from typing import Optional
+from typing import List, Optional
 
-from storage import JSONStore
+from storage import JSONStore, RankedItem
 from config import Terminology
 
 
@@ -13,39 +13,50 @@ class AddCommand:
     def __init__(self, store: JSONStore):
         self.store = store
     
-    def parse_command(self, message: str, bot_name: str) -> Optional[str]:
+    def parse_command(self, message: str, bot_name: str) -> Optional[List[str]]:
         """
         Parse an add command from a message.
         
         Expected formats:
         - @botname add Some item name
         - @botname: add Some item name
+        - @botname add first; second; third
+        - @botname add
+          first
+          second
+        
+        Items can be separated by newlines, ';' or '|'. Leading list markers
+        ("- ", "* ", "• ") are stripped.
         
         Args:
             message: The message text
             bot_name: The bot's name/localpart
             
         Returns:
-            The item name to add, or None if not a valid add command
+            The item names to add, or None if not a valid add command
         """
         # Pattern: @botname add <item>
         # Allow optional colon after mention
         pattern = rf'@{re.escape(bot_name)}:?\s+add\s+(.+)'
-        match = re.search(pattern, message, re.IGNORECASE)
+        match = re.search(pattern, message, re.IGNORECASE | re.DOTALL)
         
         if match:
-            item_name = match.group(1).strip()
-            return item_name if item_name else None
+            names = []
+            for part in re.split(r'[\n;|]', match.group(1)):
+                name = re.sub(r'^\s*(?:[-*•]\s+)?', '', part).strip()
+                if name:
+                    names.append(name)
+            return names if names else None
         
         return None
     
-    def execute(self, item_name: str, user_id: str) -> str:
+    def execute(self, item_names: List[str], user_id: str) -> str:
         """
-        Add an item to rank.
+        Add one or more items to rank.
         
         Args:
-            item_name: Name of the item to add
-            user_id: User ID who is adding it
+            item_names: Names of the items to add
+            user_id: User ID who is adding them
             
         Returns:
             Response message
@@ -53,16 +64,57 @@ class AddCommand:
         term = Terminology.load()
         item_singular = term.get('item_name', 'item')
         
-        if not item_name:
+        if not item_names:
             return f"Please provide a {item_singular} name."
         
-        item = self.store.add_item(item_name, user_id)
+        # One read and one write for the whole batch
+        added, existing = self.store.add_items(item_names, user_id)
+        warnings = self._near_duplicate_warnings(added)
+        repeated = _repeated_names(item_names)
         
-        # Check if it was already added
-        existing = self.store.get_all_items()
-        is_duplicate = len([p for p in existing if p.name.lower() == item_name.lower()]) > 1
+        if len(item_names) == 1:
+            if existing:
+                return Terminology.get('messages.add_duplicate', item=existing[0].name)
+            return "\n".join([Terminology.get('messages.add_success', item=added[0].name)] + warnings)
         
-        if is_duplicate:
-            return Terminology.get('messages.add_duplicate', item=item.name)
+        item_plural = term.get('item_name_plural', 'items')
+        lines = [f"Added {len(added)} {item_plural if len(added) != 1 else item_singular}."]
+        if added:
+            lines.append(", ".join(f"**{item.name}**" for item in added))
+        if existing:
+            lines.append("")
+            lines.append(f"Already in the list: {', '.join(item.name for item in existing)}")
+        if repeated:
+            lines.append("")
+            lines.append(f"Listed more than once: {', '.join(repeated)}")
+        if warnings:
+            lines.append("")
+            lines.extend(warnings)
         
-        return Terminology.get('messages.add_success', item=item.name)
+        return "\n".join(lines)
+    
+    def _near_duplicate_warnings(self, added: List[RankedItem]) -> List[str]:
+        """Warn about new items that look like ones already in the list."""
+        added_ids = {item.id for item in added}
+        warnings = []
+        for item in added:
+            matches = self.store.find_similar_items(item.name, exclude=added_ids)
+            if matches:
+                match = matches[0][0]
+                warnings.append(
+                    f"⚠️ **{item.name}** looks like **{match.name}**. "
+                    f"If they're the same, an admin can `merge {item.name} into {match.name}`"
+                )
+        return warnings
+
+
+def _repeated_names(names: List[str]) -> List[str]:
+    """Names that repeat an earlier one in the same list (case-insensitively)."""
+    seen = set()
+    repeated = []
+    for name in names:
+        key = name.lower()
+        if key in seen:
+            repeated.append(name)
+        seen.add(key)
+    return repeated
@@ -0,0 +1,77 @@
+"""Command: Merge a duplicate item into another (admins only)."""
+
+import re
+from typing import Optional, Tuple
+
+from storage import JSONStore
+from ranking import EloRanking
+from config import Config, Terminology
+from .rerank import RerankCommand
+
+
+class MergeCommand:
+    """Handle the 'merge' command."""
+    
+    def __init__(self, store: JSONStore, elo: EloRanking, rerank: RerankCommand):
+        self.store = store
+        self.elo = elo
+        self.rerank = rerank
+    
+    def parse_command(self, message: str, bot_name: str) -> Optional[Tuple[str, str]]:
+        """
+        Parse a merge command from a message.
+        
+        Expected formats:
+        - @bot merge the matrix (1999) into The Matrix
+        
+        Args:
+            message: The message text
+            bot_name: The bot's name/localpart
+            
+        Returns:
+            (duplicate name, name to keep), or None if not a merge command
+        """
+        pattern = rf'@{re.escape(bot_name)}:?\s+merge\s+(.+?)\s+into\s+(.+?)\s*$'
+        match = re.search(pattern, message, re.IGNORECASE | re.DOTALL)
+        if match:
+            return match.group(1), match.group(2)
+        return None
+    
+    async def execute(self, source_name: str, target_name: str, user_id: str) -> str:
+        """
+        Fold one item's votes into another and recompute ratings.
+        
+        The merged history changes every rating it touches, so it's replayed
+        like a rerank with the live K-factor and decay: off the event loop
+        and outside the store lock, with votes cast meanwhile caught up on
+        when the ratings are swapped in.
+        
+        Args:
+            source_name: The duplicate to remove
+            target_name: The item to keep
+            user_id: User ID who asked
+            
+        Returns:
+            Response message
+        """
+        if not Config.is_user_admin(user_id):
+            return "⚠️ Only admins can merge"
+        
+        term = Terminology.load()
+        item_singular = term.get('item_name', 'item')
+        
+        source = self.store.find_item_by_name(source_name)
+        target = self.store.find_item_by_name(target_name)
+        if not source or not target:
+            missing = source_name if not source else target_name
+            return f"❌ Couldn't find a {item_singular} called '{missing}'"
+        if source.id == target.id:
+            return f"❌ '{source.name}' and '{target.name}' are the same {item_singular}"
+        
+        moved = self.store.merge_items(source.id, target.id)
+        await self.rerank.recompute(self.elo.k_factor, self.elo.half_life)
+        
+        return (
+            f"🔀 Merged **{source.name}** into **{target.name}** "
+            f"({moved} vote{'s' if moved != 1 else ''} moved, ratings recomputed)"
+        )
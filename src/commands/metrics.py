@@ -0,0 +1,42 @@
+"""Command: Show a metrics summary (admins only)."""
+
+import re
+
+import metrics
+from config import Config
+
+
+class MetricsCommand:
+    """Handle the 'metrics' command."""
+    
+    def parse_command(self, message: str, bot_name: str) -> bool:
+        """
+        Check if message is a metrics command.
+        
+        Expected formats:
+        - @bot metrics
+        
+        Args:
+            message: The message text
+            bot_name: The bot's name/localpart
+            
+        Returns:
+            True if this is a metrics command
+        """
+        pattern = rf'@{re.escape(bot_name)}:?\s+metrics\s*$'
+        return bool(re.search(pattern, message, re.IGNORECASE))
+    
+    def execute(self, user_id: str) -> str:
+        """
+        Generate the metrics summary.
+        
+        Args:
+            user_id: User ID who asked
+            
+        Returns:
+            Response message
+        """
+        if not Config.is_user_admin(user_id):
+            return "⚠️ Only admins can view metrics"
+        
+        return metrics.summary()
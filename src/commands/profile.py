@@ -0,0 +1,59 @@
+"""Command: Profile the next N events (admins only)."""
+
+import re
+from typing import Optional
+
+from config import Config
+from tracing import Profiler
+
+
+class ProfileCommand:
+    """Handle the 'profile' command."""
+    
+    def __init__(self, profiler: Profiler):
+        self.profiler = profiler
+    
+    def parse_command(self, message: str, bot_name: str) -> Optional[int]:
+        """
+        Parse a profile command from a message.
+        
+        Expected formats:
+        - @bot profile
+        - @bot profile 50
+        
+        Args:
+            message: The message text
+            bot_name: The bot's name/localpart
+            
+        Returns:
+            Number of events to profile, or None if not a profile command
+        """
+        pattern = rf'@{re.escape(bot_name)}:?\s+profile(?:\s+(\d+))?\s*$'
+        match = re.search(pattern, message, re.IGNORECASE)
+        
+        if match:
+            return int(match.group(1)) if match.group(1) else Config.PROFILE_EVENTS
+        
+        return None
+    
+    def execute(self, num_events: int, user_id: str) -> str:
+        """
+        Start profiling.
+        
+        Args:
+            num_events: How many events to profile
+            user_id: User ID who asked
+            
+        Returns:
+            Response message
+        """
+        if not Config.is_user_admin(user_id):
+            return "⚠️ Only admins can start the profiler"
+        
+        if num_events < 1:
+            return "Please give a number of events to profile (at least 1)."
+        
+        if not self.profiler.arm(num_events):
+            return "⚠️ A profile is already in progress"
+        
+        return f"🔬 Profiling the next {num_events} event{'s' if num_events != 1 else ''}. The .pstats file will be written to the data directory."
@@ -0,0 +1,164 @@
+"""Command: Recompute ratings from the vote history with new parameters."""
+
+import asyncio
+import logging
+import re
+import time
+from typing import Awaitable, Callable, Optional, Tuple
+
+from storage import JSONStore, VoteLog
+from ranking import EloRanking
+from config import Config, parse_duration
+
+logger = logging.getLogger(__name__)
+
+class RerankCommand:
+    """
+    Handle `rerank k=<K> decay=<half-life>`.
+    
+    Unlike a plain `rerank`, no votes are deleted: ratings are replayed from
+    the vote log in a worker thread while voting carries on, then swapped in
+    under the store lock together with any votes cast in the meantime.
+    """
+    
+    def __init__(self, store: JSONStore, elo: EloRanking):
+        self.store = store
+        self.elo = elo
+        self._task: Optional[asyncio.Task] = None
+    
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+    
+    async def wait(self):
+        """Wait for a running rerank to finish (cancelled rerank leaves ratings untouched)."""
+        if self.running:
+            await asyncio.shield(self._task)
+    
+    def parse_command(self, message: str, bot_name: str) -> Optional[Tuple[Optional[float], Optional[float]]]:
+        """
+        Parse a parameterized rerank command from a message.
+        
+        Expected formats:
+        - @bot rerank k=16
+        - @bot rerank decay=30d
+        - @bot rerank k=24 decay=2w
+        
+        Args:
+            message: The message text
+            bot_name: The bot's name/localpart
+            
+        Returns:
+            (K-factor or None, decay half-life in seconds or None), or None if
+            this isn't a parameterized rerank (a bare `rerank` is ResetCommand's)
+        """
+        pattern = rf'@{re.escape(bot_name)}:?\s+rerank((?:\s+\w+\s*=\s*\S+)+)\s*$'
+        match = re.search(pattern, message, re.IGNORECASE)
+        if not match:
+            return None
+        
+        k_factor = half_life = None
+        for key, value in re.findall(r'(\w+)\s*=\s*(\S+)', match.group(1)):
+            key = key.lower()
+            if key == 'k':
+                k_factor = _parse_number(value)
+                if k_factor is None or k_factor <= 0:
+                    return None
+            elif key == 'decay':
+                half_life = parse_duration(value)
+                if half_life is None:
+                    return None
+            else:
+                return None
+        return k_factor, half_life
+    
+    def execute(self, k_factor: Optional[float], half_life: Optional[float], user_id: str,
+                notify: Callable[[str], Awaitable]) -> str:
+        """
+        Start recomputing ratings in the background.
+        
+        Args:
+            k_factor: New K-factor (None keeps the current one)
+            half_life: Votes lose half their weight every this many seconds (None: no decay)
+            user_id: User ID who asked
+            notify: Coroutine function that posts the result when done
+            
+        Returns:
+            Response message
+        """
+        if not Config.is_user_admin(user_id):
+            return "⚠️ Only admins can rerank with new parameters"
+        if self.running:
+            return "⏳ A rerank is already running"
+        
+        k_factor = k_factor or self.elo.k_factor
+        self._task = asyncio.create_task(self._run(k_factor, half_life, notify))
+        return f"🔄 Recomputing ratings ({_describe(k_factor, half_life)}); voting stays open"
+    
+    async def _run(self, k_factor: float, half_life: Optional[float], notify: Callable[[str], Awaitable]):
+        """Replay in a worker thread, then swap the ratings in."""
+        try:
+            t0 = time.monotonic()
+            votes = await self.recompute(k_factor, half_life)
+            await notify(
+                f"✅ Ratings recomputed from {votes} vote{'s' if votes != 1 else ''} "
+                f"({_describe(k_factor, half_life)}) in {time.monotonic() - t0:.1f}s"
+            )
+        except Exception:
+            logger.exception("Rerank failed")
+            await notify("❌ Rerank failed, ratings are unchanged")
+    
+    async def recompute(self, k_factor: float, half_life: Optional[float]) -> int:
+        """
+        Recompute every rating and make k_factor (and half_life, for later
+        replays) the live parameters, persisted so they survive a restart.
+        
+        The replay runs off the event loop against a prefix of the vote log
+        (votes are only ever appended to a given VoteLog object). The swap
+        then replays whatever was appended since, under the store lock, so
+        no vote is missed. If the log was rebuilt meanwhile (reset, merge,
+        another process), the replay starts over on the new one.
+        
+        Returns:
+            Number of votes replayed
+        """
+        elo = EloRanking(k_factor=k_factor)
+        now = time.time()
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            log = self.store.get_vote_log()
+            replayed = len(log)
+            item_ids = [item.id for item in self.store.get_all_items()]
+            ratings = await loop.run_in_executor(
+                None, _replay, elo, log, item_ids, half_life, now, 0, replayed, None
+            )
+            
+            with self.store.transaction():
+                if self.store.get_vote_log() is not log:
+                    continue
+                item_ids = [item.id for item in self.store.get_all_items()]
+                ratings = _replay(elo, log, item_ids, half_life, now, replayed, len(log), ratings)
+                self.store.set_item_ratings(ratings)
+                self.store.save_ranking_params(k_factor, half_life)
+                self.elo.k_factor = k_factor
+                self.elo.half_life = half_life
+                return len(log)
+
+
+def _replay(elo: EloRanking, log: VoteLog, item_ids, half_life: Optional[float], now: float,
+            start: int, stop: int, ratings):
+    weights = log.decay_weights(half_life, now, start, stop) if half_life else None
+    return elo.replay(log.outcomes(start, stop), item_ids, weights=weights, ratings=ratings)
+
+
+def _parse_number(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def _describe(k_factor: float, half_life: Optional[float]) -> str:
+    decay = f"half-life {half_life / 86400:g} days" if half_life else "no decay"
+    return f"k={k_factor:g}, {decay}"
@@ -1,17 +1,37 @@
 """Command: Reveal current rankings."""
 
+import asyncio
+import os
 import re
-from typing import Optional
+import time
+from typing import TYPE_CHECKING, List, Optional, Tuple
 
 from storage import JSONStore
-from config import Terminology
+from storage.time_views import standings
+from ranking import EloRanking
+from ranking.bootstrap import bootstrap_ranks, rank_intervals, split_seeds
+from config import Config, Terminology, parse_duration
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
 
 
 class RevealCommand:
     """Handle the 'reveal' command."""
     
-    def __init__(self, store: JSONStore):
+    def __init__(self, store: JSONStore, elo: EloRanking = None):
         self.store = store
+        self.elo = elo or EloRanking()
+        
+        # Bootstrap workers, started on the first `reveal ci`
+        self._pool: Optional["ProcessPoolExecutor"] = None
+        self._workers = 1
+        
+        # (snapshot signature, rank intervals by item ID), and the computation in progress.
+        # Keyed by the signature, not the version: the version is a sum of
+        # counters that restart with a new lock file, so it can repeat.
+        self._intervals: Optional[Tuple[Tuple, dict]] = None
+        self._intervals_task: Optional[Tuple[Tuple, asyncio.Future]] = None
     
     def parse_command(self, message: str, bot_name: str) -> bool:
         """
@@ -22,6 +42,9 @@ class RevealCommand:
         - @bot reveal
         - @bot ranking
         - @bot rankings
+        - @bot reveal recent [7d]
+        - @bot reveal decayed [2w]
+        - @bot reveal ci
         
         Args:
             message: The message text
@@ -30,18 +53,50 @@ class RevealCommand:
         Returns:
             True if this is a reveal command
         """
-        pattern = rf'@{re.escape(bot_name)}:?\s+(reveal|ranking|rankings)\s*$'
-        return bool(re.search(pattern, message, re.IGNORECASE))
+        return self.parse_view(message, bot_name) is not None
     
-    def execute(self) -> str:
+    def parse_view(self, message: str, bot_name: str) -> Optional[Tuple[str, Optional[float]]]:
+        """
+        Parse which ranking a reveal command asks for.
+        
+        Returns:
+            (view, seconds): view is "all", "ci", "recent" or "decayed";
+            seconds is the window or half-life given, or None for the
+            configured one. None if not a reveal command.
+        """
+        pattern = (rf'@{re.escape(bot_name)}:?\s+(?:reveal|ranking|rankings)'
+                   rf'(?:\s+(all|ci|recent|decayed)(?:\s+(\S+))?)?\s*$')
+        match = re.search(pattern, message, re.IGNORECASE)
+        if not match:
+            return None
+        view = (match.group(1) or 'all').lower()
+        if match.group(2) is None:
+            return view, None
+        seconds = parse_duration(match.group(2))
+        if seconds is None or view in ('all', 'ci'):
+            return None
+        return view, seconds
+    
+    def execute(self, view: str = 'all', seconds: Optional[float] = None) -> str:
         """
         Generate the rankings display.
         
+        Args:
+            view: "all" for Elo over every vote, "recent" for win rates over
+                  the last `seconds`, "decayed" for win rates with votes
+                  halving in weight every `seconds`
+            seconds: Window or half-life (defaults from config)
+            
         Returns:
             Response message with rankings
         """
+        if view != 'all':
+            return self._execute_time_view(view, seconds)
+        
         term = Terminology.load()
-        items = self.store.get_items_sorted_by_elo()
+        # One consistent view, even while votes keep arriving
+        snapshot = self.store.ranking_snapshot()
+        items = snapshot.items
         
         if not items:
             return Terminology.get('messages.reveal_empty')
@@ -66,9 +121,144 @@ class RevealCommand:
             lines.append(f"{i}. {medal}**{item.name}** (elo: {elo_str}, {votes_str})")
         
         # Add footer
-        total_votes = self.store.get_all_votes()
         lines.append("")
-        lines.append(f"_total comparisons: {len(total_votes)}_")
+        lines.append(f"_total comparisons: {snapshot.total_votes}_")
         lines.append(f"_dm me to participate in ranking_")
         
         return "\n".join(lines)
+    
+    async def execute_ci(self) -> str:
+        """
+        Rankings with a 95% bootstrap interval on each item's rank.
+        
+        The resamples run in a process pool and the result is cached until
+        the next committed write, so repeated requests are free and the
+        event loop never waits on the replay.
+        
+        Returns:
+            Response message with rankings
+        """
+        snapshot = self.store.ranking_snapshot()
+        if not snapshot.items:
+            return Terminology.get('messages.reveal_empty')
+        
+        intervals = await self._rank_intervals(snapshot)
+        
+        lines = [Terminology.get('messages.reveal_header'), ""]
+        for i, item in enumerate(snapshot.items, 1):
+            best, worst = intervals[item.id]
+            rank_range = f"#{best}" if best == worst else f"#{best}–{worst}"
+            lines.append(f"{i}. **{item.name}** (elo: {item.elo:.0f}, likely rank {rank_range})")
+        
+        lines.append("")
+        lines.append(f"_likely rank: 95% of {Config.BOOTSTRAP_SAMPLES} rankings replayed from "
+                     f"resampled votes; overlapping ranges aren't a clear difference_")
+        return "\n".join(lines)
+    
+    async def _rank_intervals(self, snapshot) -> dict:
+        """Rank intervals for this snapshot, from the cache, a computation already running, or a new one."""
+        if self._intervals is not None and self._intervals[0] == snapshot.signature:
+            return self._intervals[1]
+        if self._intervals_task is None or self._intervals_task[0] != snapshot.signature:
+            future = asyncio.ensure_future(self._compute_intervals(snapshot))
+            self._intervals_task = (snapshot.signature, future)
+        signature, future = self._intervals_task
+        
+        try:
+            intervals = await asyncio.shield(future)
+        except Exception:
+            # Let the next request try again
+            if self._intervals_task and self._intervals_task[1] is future:
+                self._intervals_task = None
+            raise
+        self._intervals = (signature, intervals)
+        return intervals
+    
+    async def _compute_intervals(self, snapshot) -> dict:
+        log = self.store.get_vote_log()
+        
+        # Copy the columns: the log keeps growing while the workers run
+        count = len(log)
+        columns = (log.item_a[:count], log.item_b[:count], log.b_won[:count])
+        index = {item.id: i for i, item in enumerate(snapshot.items)}
+        remap = [index.get(item_id, -1) for item_id in log.item_ids]
+        
+        pool = self._get_pool()
+        from concurrent.futures.process import BrokenProcessPool  # loaded with the pool
+        loop = asyncio.get_running_loop()
+        chunks = split_seeds(snapshot.version, Config.BOOTSTRAP_SAMPLES, self._workers)
+        try:
+            results = await asyncio.gather(*(
+                loop.run_in_executor(pool, bootstrap_ranks, *columns, remap, len(snapshot.items),
+                                     self.elo.k_factor, seeds)
+                for seeds in chunks
+            ))
+        except BrokenProcessPool:
+            # A worker died (OOM killer, crash): a broken pool refuses all
+            # further work, so drop it and let the next call start a new one
+            if self._pool is pool:
+                self.close()
+            raise
+        
+        samples: List[List[int]] = [ranks for chunk in results for ranks in chunk]
+        intervals = rank_intervals(samples, len(snapshot.items))
+        return {item.id: intervals[i] for i, item in enumerate(snapshot.items)}
+    
+    def _get_pool(self) -> "ProcessPoolExecutor":
+        if self._pool is None:
+            # Imported on first use: most runs never start the pool
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            
+            # spawn: forking a process that runs threads (executor, fsync timer) isn't safe
+            self._workers = Config.BOOTSTRAP_WORKERS or os.cpu_count() or 1
+            self._pool = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._pool
+    
+    def close(self):
+        """Stop the bootstrap workers."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def _execute_time_view(self, view: str, seconds: Optional[float]) -> str:
+        """Rankings by win rate over recent votes."""
+        snapshot = self.store.ranking_snapshot()
+        if not snapshot.items:
+            return Terminology.get('messages.reveal_empty')
+        
+        if view == 'recent':
+            seconds = seconds or Config.RANKING_WINDOW
+            counts = self.store.get_time_view('window', seconds).counts(time.time())
+            title = f"last {_format_duration(seconds)}"
+        else:
+            seconds = seconds or Config.RANKING_HALF_LIFE
+            counts = self.store.get_time_view('decay', seconds).counts(time.time())
+            title = f"votes halving in weight every {_format_duration(seconds)}"
+        
+        ranked = [row for row in standings(counts) if snapshot.get_item(row[0])]
+        if not ranked:
+            return f"📊 No votes in the {title}" if view == 'recent' else "📊 No votes yet"
+        
+        lines = [f"📊 **Rankings, {title}** 📊", ""]
+        for i, (item_id, score, wins, losses) in enumerate(ranked, 1):
+            name = snapshot.get_item(item_id).name
+            if view == 'recent':
+                lines.append(f"{i}. **{name}** ({wins:.0f}–{losses:.0f}, score {score:.0%})")
+            else:
+                lines.append(f"{i}. **{name}** (score {score:.0%}, {wins + losses:.1f} weighted votes)")
+        
+        lines.append("")
+        lines.append("_score: win rate, counting one extra win and loss_")
+        return "\n".join(lines)
+
+
+def _format_duration(seconds: float) -> str:
+    if seconds < 86400:
+        hours = seconds / 3600
+        return f"{hours:g} hour{'s' if hours != 1 else ''}"
+    days = seconds / 86400
+    return f"{days:g} day{'s' if days != 1 else ''}"
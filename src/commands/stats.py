@@ -0,0 +1,119 @@
+"""Commands: Per-item stats and head-to-head records."""
+
+import re
+from typing import Optional, Tuple
+
+from storage import JSONStore
+from ranking import EloRanking
+from config import Terminology
+
+# How many opponents to list under an item's stats
+MAX_OPPONENTS = 5
+
+
+class StatsCommand:
+    """Handle the 'stats' and 'vs' commands."""
+    
+    def __init__(self, store: JSONStore, elo: EloRanking):
+        self.store = store
+        self.elo = elo
+    
+    def parse_stats_command(self, message: str, bot_name: str) -> Optional[str]:
+        """
+        Parse a stats command from a message.
+        
+        Expected formats:
+        - @bot stats Pizza
+        
+        Returns:
+            The item name, or None if not a stats command
+        """
+        pattern = rf'@{re.escape(bot_name)}:?\s+stats\s+(.+?)\s*$'
+        match = re.search(pattern, message, re.IGNORECASE | re.DOTALL)
+        return match.group(1) if match else None
+    
+    def parse_vs_command(self, message: str, bot_name: str) -> Optional[str]:
+        """
+        Parse a vs command from a message.
+        
+        Expected formats:
+        - @bot vs Pizza Tacos
+        - @bot vs The Matrix; Pizza
+        - @bot vs The Matrix vs Pizza
+        
+        Returns:
+            The text naming both items, or None if not a vs command
+        """
+        pattern = rf'@{re.escape(bot_name)}:?\s+vs\.?\s+(.+?)\s*$'
+        match = re.search(pattern, message, re.IGNORECASE | re.DOTALL)
+        return match.group(1) if match else None
+    
+    def _split_pair(self, text: str) -> Optional[Tuple]:
+        """Find the two items named in `text`, trying explicit separators first, then every word boundary."""
+        parts = re.split(r'\s*(?:[;,|]|\s+vs\.?\s+)\s*', text, flags=re.IGNORECASE)
+        candidates = [parts] if len(parts) == 2 else []
+        
+        words = text.split()
+        candidates += [(" ".join(words[:i]), " ".join(words[i:])) for i in range(1, len(words))]
+        
+        for name_a, name_b in candidates:
+            item_a = self.store.find_item_by_name(name_a)
+            item_b = self.store.find_item_by_name(name_b)
+            if item_a and item_b:
+                return item_a, item_b
+        return None
+    
+    def execute_stats(self, name: str) -> str:
+        """
+        Show an item's rating, rank and win/loss record.
+        
+        Answered from the head-to-head matrix: O(number of opponents).
+        """
+        term = Terminology.load()
+        item = self.store.find_item_by_name(name)
+        if not item:
+            return f"❌ Couldn't find a {term.get('item_name', 'item')} called '{name}'"
+        
+        snapshot = self.store.ranking_snapshot()
+        rank = snapshot.rank_of(item.id)
+        matrix = self.store.get_win_matrix()
+        wins, losses = matrix.record_of(item.id)
+        total = wins + losses
+        
+        lines = [
+            f"📊 **{item.name}**",
+            "",
+            f"elo {item.elo:.0f}, rank {rank} of {len(snapshot.items)}",
+            f"{wins} win{'s' if wins != 1 else ''}, {losses} loss{'es' if losses != 1 else ''}"
+            + (f" ({wins / total:.0%})" if total else "")
+        ]
+        
+        opponents = matrix.opponents(item.id)
+        if opponents:
+            lines.append("")
+            lines.append("**most compared with**")
+            for opponent_id, (won, lost) in sorted(opponents.items(), key=lambda o: -sum(o[1]))[:MAX_OPPONENTS]:
+                opponent = snapshot.get_item(opponent_id)
+                if opponent:
+                    lines.append(f"- {opponent.name}: {won}–{lost}")
+        
+        return "\n".join(lines)
+    
+    def execute_vs(self, text: str) -> str:
+        """
+        Show the head-to-head record of two items (O(1) from the matrix).
+        """
+        pair = self._split_pair(text)
+        if not pair:
+            item_plural = Terminology.load().get('item_name_plural', 'items')
+            return f"❌ Couldn't find two {item_plural} in '{text}' (separate names with `;` if needed)"
+        
+        item_a, item_b = pair
+        a_wins, b_wins = self.store.get_win_matrix().head_to_head(item_a.id, item_b.id)
+        expected = self.elo.expected_score(item_a.elo, item_b.elo)
+        
+        return (
+            f"⚔️ **{item_a.name}** vs **{item_b.name}**: {a_wins}–{b_wins}\n"
+            f"elo {item_a.elo:.0f} vs {item_b.elo:.0f}, "
+            f"{item_a.name} expected to win {expected:.0%} of the time"
+        )
@@ -2,72 +2,196 @@
 
 import os
 import json
+import logging
+import re
+import string
+import time
 from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Seconds per unit accepted by parse_duration
+_DURATION_UNITS = {'h': 3600, 'd': 86400, 'w': 7 * 86400}
+
+
+def parse_duration(value: str) -> Optional[float]:
+    """'30d', '12h', '2w' or a bare number of days -> seconds (None if invalid)."""
+    match = re.fullmatch(r'(\d+(?:\.\d+)?)\s*([hdw]?)', value.strip().lower())
+    if not match or float(match.group(1)) <= 0:
+        return None
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2) or 'd']
+
+
+class _Template:
+    """A format string parsed once with string.Formatter, rendered without re-parsing."""
+    
+    _formatter = string.Formatter()
+    
+    __slots__ = ('raw', 'parts')
+    
+    def __init__(self, raw: str):
+        self.raw = raw
+        # (literal_text, field_name, format_spec, conversion) tuples
+        self.parts = tuple(self._formatter.parse(raw))
+    
+    def render(self, kwargs: dict) -> str:
+        """Render with keyword substitutions (same result as str.format(**kwargs))."""
+        formatter = self._formatter
+        out = []
+        for literal, field_name, format_spec, conversion in self.parts:
+            if literal:
+                out.append(literal)
+            if field_name is None:
+                continue
+            
+            value, _ = formatter.get_field(field_name, (), kwargs)
+            value = formatter.convert_field(value, conversion)
+            if format_spec and '{' in format_spec:
+                # Nested replacement fields in the spec are rare; let Formatter handle them
+                format_spec = formatter.vformat(format_spec, (), kwargs)
+            out.append(format(value, format_spec or ''))
+        return ''.join(out)
+
 
 class Terminology:
     """Load and manage custom terminology for the bot."""
     
-    _terminology = None
+    # (raw terminology dict, flattened lookup table, source signature). Swapped
+    # as a single tuple on reload so readers never see a half-built table.
+    _state = None
     
-    @classmethod
-    def load(cls):
-        """Load terminology from JSON file."""
-        if cls._terminology is not None:
-            return cls._terminology
-        
+    # Earliest time.monotonic() at which to stat the terminology file again
+    _next_check = 0.0
+    
+    # How often (seconds) to check terminology.json for edits
+    RELOAD_INTERVAL = float(os.getenv("TERMINOLOGY_RELOAD_INTERVAL", "5"))
+    
+    # Absolute fallback if no terminology files exist
+    _DEFAULT = {
+        "item_name": "item",
+        "item_name_plural": "items",
+        "item_name_capitalized": "Item",
+        "messages": {
+            "add_success": "Added '{item}' to the ranking list.",
+            "add_duplicate": "'{item}' is already in the list.",
+            "reveal_header": "📊 **Current rankings** 📊",
+            "reveal_empty": "No items to rank yet. Add some with `@{bot_name} add <item>`",
+            "reset_all_confirm": "Reset complete. All items, votes, and rankings have been cleared.",
+            "rerank_confirm": "Rankings reset. All votes cleared, but items remain in the system.",
+            "vote_intro": "Let's rank these items. Which one do you prefer?",
+            "vote_option_format": "**{number}.** {item}",
+            "vote_progress": "Progress: {done}/{total} comparisons completed",
+            "vote_complete": "All comparisons complete! Rankings are now up to date.",
+            "vote_invalid": "Please enter 1 or 2 to make your selection.",
+            "help_text": "Available commands:\n\n**In rooms:**\n- `@{bot_name} add <item>` - Add a new item to rank\n- `@{bot_name} reveal` - Display current rankings\n- `@{bot_name} reveal recent [30d]` / `reveal decayed [30d]` - Rankings from recent votes only, or with older votes counting less\n- `@{bot_name} reveal ci` - Rankings with a likely rank range for each item\n- `@{bot_name} reset all` - Clear all data (items, votes, rankings)\n- `@{bot_name} rerank` - Reset votes and rankings (keeps items)\n- `@{bot_name} rerank k=16 decay=30d` - Recompute rankings from the votes with a new K-factor and/or vote half-life (admins)\n\n**In direct messages:**\n- Message me to start pairwise ranking comparisons\n- Send `batch [n]` to vote on several pairs per message, `single` to go back\n\nRankings are calculated using the Elo rating algorithm."
+        }
+    }
+    
+    @staticmethod
+    def _find_path() -> Optional[Path]:
+        """Find the terminology file to use, if any."""
         # Try to load terminology.json from project root
         terminology_path = Path("terminology.json")
         if not terminology_path.exists():
             # Fall back to example/default
             terminology_path = Path("terminology.example.json")
         
-        if terminology_path.exists():
-            with open(terminology_path, 'r') as f:
-                cls._terminology = json.load(f)
+        return terminology_path if terminology_path.exists() else None
+    
+    @staticmethod
+    def _signature(path: Optional[Path]) -> Optional[tuple]:
+        """Cheap change detection: path, inode, mtime and size."""
+        if path is None:
+            return None
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        return (str(path), st.st_ino, st.st_mtime_ns, st.st_size)
+    
+    @classmethod
+    def _compile(cls, terminology: dict) -> dict:
+        """
+        Flatten nested keys into a single lookup table.
+        
+        Strings become pre-parsed templates; nested dicts stay reachable under
+        their own key too (e.g. both "messages" and "messages.add_success").
+        """
+        table = {}
+        
+        def walk(prefix: str, node: dict):
+            for k, v in node.items():
+                key = f"{prefix}.{k}" if prefix else k
+                if isinstance(v, dict):
+                    table[key] = v
+                    walk(key, v)
+                elif isinstance(v, str):
+                    table[key] = _Template(v)
+                else:
+                    table[key] = v
+        
+        walk("", terminology)
+        return table
+    
+    @classmethod
+    def _current(cls) -> tuple:
+        """Get the current state, reloading if the file changed (checked at most once per interval)."""
+        state = cls._state
+        now = time.monotonic()
+        if state is not None and now < cls._next_check:
+            return state
+        cls._next_check = now + cls.RELOAD_INTERVAL
+        
+        path = cls._find_path()
+        signature = cls._signature(path)
+        if state is not None and signature == state[2]:
+            return state
+        
+        if path is None:
+            terminology = cls._DEFAULT
         else:
-            # Absolute fallback if no files exist
-            cls._terminology = {
-                "item_name": "item",
-                "item_name_plural": "items",
-                "item_name_capitalized": "Item",
-                "messages": {
-                    "add_success": "Added '{item}' to the ranking list.",
-                    "add_duplicate": "'{item}' is already in the list.",
-                    "reveal_header": "📊 **Current rankings** 📊",
-                    "reveal_empty": "No items to rank yet. Add some with `@{bot_name} add <item>`",
-                    "reset_all_confirm": "Reset complete. All items, votes, and rankings have been cleared.",
-                    "rerank_confirm": "Rankings reset. All votes cleared, but items remain in the system.",
-                    "vote_intro": "Let's rank these items. Which one do you prefer?",
-                    "vote_option_format": "**{number}.** {item}",
-                    "vote_progress": "Progress: {done}/{total} comparisons completed",
-                    "vote_complete": "All comparisons complete! Rankings are now up to date.",
-                    "vote_invalid": "Please enter 1 or 2 to make your selection.",
-                    "help_text": "Available commands:\n\n**In rooms:**\n- `@{bot_name} add <item>` - Add a new item to rank\n- `@{bot_name} reveal` - Display current rankings\n- `@{bot_name} reset all` - Clear all data (items, votes, rankings)\n- `@{bot_name} rerank` - Reset votes and rankings (keeps items)\n\n**In direct messages:**\n- Message me to start pairwise ranking comparisons\n\nRankings are calculated using the Elo rating algorithm."
-                }
-            }
-        
-        return cls._terminology
+            try:
+                with open(path, 'r') as f:
+                    terminology = json.load(f)
+            except (OSError, ValueError) as e:
+                if state is not None:
+                    # Keep serving the last good terminology while the file is mid-edit
+                    logger.warning(f"Failed to reload {path}: {e}")
+                    return state
+                raise
+            
+            if state is not None:
+                logger.info(f"Reloaded terminology from {path}")
+        
+        state = (terminology, cls._compile(terminology), signature)
+        cls._state = state
+        return state
+    
+    @classmethod
+    def load(cls):
+        """Load terminology from JSON file."""
+        return cls._current()[0]
     
     @classmethod
     def get(cls, key: str, **kwargs) -> str:
         """Get a terminology value with optional formatting."""
-        term = cls.load()
+        term, table, _ = cls._current()
         
-        # Navigate nested keys (e.g., "messages.add_success")
-        value = term
-        for k in key.split('.'):
-            value = value.get(k, key)
+        # Flattened lookup of nested keys (e.g., "messages.add_success")
+        value = table.get(key, key)
         
-        # Format if kwargs provided
-        if isinstance(value, str) and kwargs:
-            # Add common substitutions
-            kwargs.setdefault('bot_name', term.get('bot_name', 'RankBot'))
-            return value.format(**kwargs)
+        if isinstance(value, _Template):
+            # Format if kwargs provided
+            if kwargs:
+                # Add common substitutions
+                kwargs.setdefault('bot_name', term.get('bot_name', 'RankBot'))
+                return value.render(kwargs)
+            return value.raw
         
         return value
 
@@ -88,12 +212,92 @@ class Config:
     # Leave empty to allow everyone
     ALLOWED_USERS = os.getenv("ALLOWED_USERS", "").strip()
     
+    # Admins: users allowed to run admin commands (e.g. metrics)
+    # Leave empty to treat every allowed user as an admin
+    ADMIN_USERS = os.getenv("ADMIN_USERS", "").strip()
+    
+    # Metrics: serve Prometheus metrics on this port (empty to disable)
+    METRICS_PORT = os.getenv("METRICS_PORT", "").strip()
+    METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+    
+    # Tracing: log a per-stage breakdown of any event slower than this (ms)
+    SLOW_EVENT_MS = float(os.getenv("SLOW_EVENT_MS", "1000"))
+    
+    # Profiler: default number of events to profile (`@bot profile` or SIGUSR1)
+    PROFILE_EVENTS = int(os.getenv("PROFILE_EVENTS", "100"))
+    
+    # Batch voting: pairs per prompt when a user DMs `batch` without a number
+    BATCH_VOTE_SIZE = int(os.getenv("BATCH_VOTE_SIZE", "5"))
+    
+    # Pair selection: "balanced" spreads votes over the whole list, "top_k"
+    # only compares items that could still reach the top TOP_K
+    PAIR_SELECTION = os.getenv("PAIR_SELECTION", "balanced").strip().lower()
+    TOP_K = int(os.getenv("TOP_K", "10"))
+    
+    # Elo K-factor: how far one vote moves a rating. The initial default only:
+    # a `rerank k=` K is saved in ranking.json and takes precedence
+    ELO_K_FACTOR = float(os.getenv("ELO_K_FACTOR", "32"))
+    
+    # Recent rankings (`@bot reveal recent` / `reveal decayed`): window length
+    # and vote half-life, e.g. "30d", "2w", "12h"
+    RANKING_WINDOW = parse_duration(os.getenv("RANKING_WINDOW", "30d")) or 30 * 86400
+    RANKING_HALF_LIFE = parse_duration(os.getenv("RANKING_HALF_LIFE", "30d")) or 30 * 86400
+    
+    # Admission control: messages per minute (and burst) allowed per user and
+    # per room. 0 disables a limit. DM votes only count against the room.
+    # Messages over a limit are dropped with an occasional "slow down" reply.
+    USER_MESSAGES_PER_MINUTE = float(os.getenv("USER_MESSAGES_PER_MINUTE", "30"))
+    USER_BURST = float(os.getenv("USER_BURST", "10"))
+    ROOM_MESSAGES_PER_MINUTE = float(os.getenv("ROOM_MESSAGES_PER_MINUTE", "120"))
+    ROOM_BURST = float(os.getenv("ROOM_BURST", "30"))
+    
+    # Voting sessions: forgotten after this many seconds without a vote, and
+    # written to disk every SESSION_FLUSH_INTERVAL seconds (and on shutdown)
+    SESSION_TTL = float(os.getenv("SESSION_TTL", str(24 * 3600)))
+    SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "30"))
+    
+    # `@bot reveal ci`: rankings replayed from this many resampled vote
+    # histories, spread over BOOTSTRAP_WORKERS processes (0: one per CPU)
+    BOOTSTRAP_SAMPLES = int(os.getenv("BOOTSTRAP_SAMPLES", "200"))
+    BOOTSTRAP_WORKERS = int(os.getenv("BOOTSTRAP_WORKERS", "0"))
+    
+    # Shutdown: seconds to let running events and background work finish on
+    # SIGTERM/SIGINT before giving up on them
+    SHUTDOWN_TIMEOUT = float(os.getenv("SHUTDOWN_TIMEOUT", "10"))
+    
+    # Durability: "strict" fsyncs every write before it's acknowledged,
+    # "batched" fsyncs at most every FSYNC_INTERVAL_MS (group commit),
+    # "relaxed" leaves it to the OS
+    DURABILITY = os.getenv("DURABILITY", "strict").strip().lower()
+    FSYNC_INTERVAL_MS = float(os.getenv("FSYNC_INTERVAL_MS", "100"))
+    
+    # Consistency check of the data files at startup: "report" logs problems,
+    # "repair" also fixes them (see `manage.py check`), "off" skips it
+    CHECK_ON_STARTUP = os.getenv("CHECK_ON_STARTUP", "report").strip().lower()
+    
     # Data directory
     DATA_DIR = os.getenv("DATA_DIR", "./data")
     
     # Store directory for matrix-nio (for encryption keys, sync tokens, etc.)
     STORE_DIR = os.path.join(DATA_DIR, "store")
     
+    # Sync filter: empty for the default below, "none" to disable filtering,
+    # or a JSON filter definition (inline or a path to a .json file)
+    SYNC_FILTER = os.getenv("SYNC_FILTER", "").strip()
+    
+    # Only fetch what the bot actually handles: message timeline events and the
+    # members needed to render them. No presence, typing, receipts or account data.
+    DEFAULT_SYNC_FILTER = {
+        "presence": {"not_types": ["*"]},
+        "account_data": {"not_types": ["*"]},
+        "room": {
+            "timeline": {"types": ["m.room.message"], "limit": 100},
+            "state": {"lazy_load_members": True},
+            "ephemeral": {"not_types": ["*"]},
+            "account_data": {"not_types": ["*"]}
+        }
+    }
+    
     @classmethod
     def validate(cls):
         """Validate that required configuration is present."""
@@ -101,11 +305,34 @@ class Config:
             raise ValueError("MATRIX_USER_ID environment variable is required")
         if not cls.PASSWORD and not cls.ACCESS_TOKEN:
             raise ValueError("Either MATRIX_PASSWORD or MATRIX_ACCESS_TOKEN environment variable is required")
+        if cls.DURABILITY not in ('strict', 'batched', 'relaxed'):
+            raise ValueError("DURABILITY must be strict, batched or relaxed")
+        if cls.CHECK_ON_STARTUP not in ('off', 'report', 'repair'):
+            raise ValueError("CHECK_ON_STARTUP must be off, report or repair")
         
         # Create directories
         Path(cls.DATA_DIR).mkdir(exist_ok=True)
         Path(cls.STORE_DIR).mkdir(exist_ok=True)
     
+    @classmethod
+    def get_sync_filter(cls) -> Optional[dict]:
+        """
+        Get the sync filter definition to upload at startup.
+        
+        Returns:
+            The filter as a dict, or None if filtering is disabled
+        """
+        if not cls.SYNC_FILTER:
+            return cls.DEFAULT_SYNC_FILTER
+        if cls.SYNC_FILTER.lower() == "none":
+            return None
+        
+        if cls.SYNC_FILTER.startswith("{"):
+            return json.loads(cls.SYNC_FILTER)
+        
+        with open(cls.SYNC_FILTER, 'r') as f:
+            return json.load(f)
+    
     @classmethod
     def get_bot_mention_pattern(cls) -> str:
         """Get a pattern to match bot mentions."""
@@ -124,3 +351,12 @@ class Config:
         
         allowed_list = [u.strip() for u in cls.ALLOWED_USERS.split(',') if u.strip()]
         return user_id in allowed_list
+    
+    @classmethod
+    def is_user_admin(cls, user_id: str) -> bool:
+        """Check if a user may run admin commands."""
+        if not cls.ADMIN_USERS:
+            return cls.is_user_allowed(user_id)
+        
+        admin_list = [u.strip() for u in cls.ADMIN_USERS.split(',') if u.strip()]
+        return user_id in admin_list
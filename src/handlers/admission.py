@@ -0,0 +1,110 @@
+"""Admission control: per-user and per-room rate limits."""
+
+import time
+from typing import Dict, Optional
+
+# Buckets kept before idle (full) ones are dropped
+_MAX_BUCKETS = 10_000
+
+
+class TokenBucket:
+    """
+    `rate` tokens per second, holding at most `burst`.
+    
+    Refilled lazily from the elapsed time when a token is taken, so an idle
+    bucket costs nothing.
+    """
+    
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+    
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+    
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def take(self, now: float) -> bool:
+        """Take a token if one is available."""
+        self.refill(now)
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class AdmissionController:
+    """
+    Decide whether to handle a message, before any storage work.
+    
+    A message needs a token from its sender's bucket and from its room's
+    bucket. A rate of 0 disables that check. Shed senders get at most one "slow down" notice
+    per `notice_interval`, so the notices can't become a flood themselves.
+    """
+    
+    def __init__(self, user_rate: float, user_burst: float, room_rate: float, room_burst: float,
+                 notice_interval: float = 30.0):
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.room_rate = room_rate
+        self.room_burst = room_burst
+        self.notice_interval = notice_interval
+        self._users: Dict[str, TokenBucket] = {}
+        self._rooms: Dict[str, TokenBucket] = {}
+        self._noticed: Dict[str, float] = {}
+    
+    def admit(self, user_id: str, room_id: str, now: Optional[float] = None,
+              per_user: bool = True) -> Optional[str]:
+        """
+        Check a message against the limits, taking tokens if it's admitted.
+        
+        Args:
+            user_id: Sender
+            room_id: Room it was sent in
+            now: Monotonic time (defaults to now)
+            per_user: False to only check the room's bucket
+            
+        Returns:
+            None if admitted, otherwise why it was shed: "user" or "room"
+        """
+        now = time.monotonic() if now is None else now
+        user = self._bucket(self._users, user_id, self.user_rate, self.user_burst, now) if per_user else None
+        room = self._bucket(self._rooms, room_id, self.room_rate, self.room_burst, now)
+        # Check the user before taking from the room, so a shed message costs neither
+        if user:
+            user.refill(now)
+            if user.tokens < 1.0:
+                return "user"
+        if room and not room.take(now):
+            return "room"
+        if user:
+            user.tokens -= 1.0
+        return None
+    
+    def should_notify(self, user_id: str, now: Optional[float] = None) -> bool:
+        """Whether a shed sender should be told to slow down (once per notice_interval)."""
+        now = time.monotonic() if now is None else now
+        if now - self._noticed.get(user_id, float('-inf')) < self.notice_interval:
+            return False
+        if len(self._noticed) >= _MAX_BUCKETS:
+            self._noticed = {u: t for u, t in self._noticed.items() if now - t < self.notice_interval}
+        self._noticed[user_id] = now
+        return True
+    
+    def _bucket(self, buckets: Dict[str, TokenBucket], key: str, rate: float, burst: float,
+                now: float) -> Optional[TokenBucket]:
+        if rate <= 0:
+            return None
+        bucket = buckets.get(key)
+        if bucket is None:
+            if len(buckets) >= _MAX_BUCKETS:
+                # A bucket that has refilled to full is the same as a new one
+                for bucket in buckets.values():
+                    bucket.refill(now)
+                for k in [k for k, b in buckets.items() if b.tokens >= b.burst]:
+                    del buckets[k]
+            bucket = buckets[key] = TokenBucket(rate, burst, now)
+        return bucket
@@ -1,12 +1,27 @@
 """Handler for DM voting interactions."""
 
-from typing import Optional
+import asyncio
+import logging
+import re
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
 
 from nio import AsyncClient, RoomMessageText
 
-from storage import JSONStore, UserVotingSession
+from storage import JSONStore, UserVotingSession, Vote
 from ranking import EloRanking, PairSelector
-from config import Terminology
+from config import Config, Terminology
+from handlers.outbound import room_send
+from metrics import COMMAND_LATENCY
+from tracing import span, annotate
+
+logger = logging.getLogger(__name__)
+
+# Largest batch a user can ask for (the prompt gets unwieldy beyond this)
+MAX_BATCH_SIZE = 10
+
+# Batch reply characters: True = first item wins, False = second, None = skip
+BATCH_CHOICES = {'a': True, '1': True, 'b': False, '2': False, '-': None}
 
 
 class DMHandler:
@@ -16,6 +31,17 @@ class DMHandler:
         self.client = client
         self.store = store
         self.elo = elo
+        
+        # Next pair per user, computed while they think about the current one:
+        # user_id -> (pair it assumes they vote on, next pair IDs)
+        self._speculative: Dict[str, Tuple[Tuple[str, str], Tuple[str, str]]] = {}
+        self._speculation_tasks: Set[asyncio.Task] = set()
+    
+    def close(self):
+        """Cancel pending speculation (it only warms a cache)."""
+        for task in list(self._speculation_tasks):
+            task.cancel()
+        self._speculative.clear()
     
     async def handle_dm(self, room_id: str, user_id: str, message: str):
         """
@@ -31,49 +57,112 @@ class DMHandler:
         # Get or create session
         session = self.store.get_session(user_id)
         
+        # `batch [n]` / `single` switch modes and start over with a fresh prompt
+        batch_size = self._parse_mode(message)
+        if batch_size is not None:
+            self._speculative.pop(user_id, None)
+            annotate(command="vote_mode")
+            with COMMAND_LATENCY.time(command="vote_mode"):
+                await self._start_voting(room_id, user_id, batch_size=batch_size)
+        
         # Check if user is responding to a voting prompt
-        if session and session.current_pair:
-            await self._handle_vote_response(room_id, user_id, message, session)
+        elif session and session.pending_pairs and session.batch_size > 1:
+            annotate(command="batch_vote")
+            with COMMAND_LATENCY.time(command="batch_vote"):
+                await self._handle_batch_response(room_id, user_id, message, session)
+        elif session and session.pending_pairs:
+            annotate(command="vote")
+            with COMMAND_LATENCY.time(command="vote"):
+                await self._handle_vote_response(room_id, user_id, message, session)
         else:
             # Start a new voting session
-            await self._start_voting(room_id, user_id)
+            self._speculative.pop(user_id, None)
+            annotate(command="start_voting")
+            with COMMAND_LATENCY.time(command="start_voting"):
+                await self._start_voting(room_id, user_id, batch_size=session.batch_size if session else 1)
     
-    async def _start_voting(self, room_id: str, user_id: str):
-        """Start or continue a voting session for a user."""
-        term = Terminology.load()
-        items = self.store.get_all_items()
-        item_plural = term.get('item_name_plural', 'items')
-        
-        if len(items) < 2:
-            await self._send_message(
-                room_id,
-                f"There aren't enough {item_plural} to compare yet! "
-                f"We need at least 2. "
-                f"Tag me with `add <{term.get('item_name', 'item')}>` to add some"
-            )
-            return
+    def _parse_mode(self, message: str) -> Optional[int]:
+        """
+        Parse a voting mode switch.
         
-        # Get pairs the user has already voted on
-        voted_pairs = self.store.get_user_voted_pairs(user_id)
+        Expected formats:
+        - batch
+        - batch 8
+        - single
         
-        # Get the next pair
-        next_pair = PairSelector.get_next_pair(items, voted_pairs)
+        Returns:
+            Pairs per prompt to switch to, or None if this isn't a mode switch
+        """
+        match = re.fullmatch(r'(?:batch(?:\s+(\d+))?|single)', message, re.IGNORECASE)
+        if not match:
+            return None
+        if message.lower() == 'single':
+            return 1
+        size = int(match.group(1)) if match.group(1) else Config.BATCH_VOTE_SIZE
+        return max(2, min(MAX_BATCH_SIZE, size))
+    
+    async def _start_voting(self, room_id: str, user_id: str, prepared: Optional[Tuple] = None,
+                            batch_size: int = 1):
+        """
+        Start or continue a voting session for a user.
         
-        if not next_pair:
-            # User has voted on all pairs!
-            await self._send_message(
-                room_id,
-                Terminology.get('messages.vote_complete')
-            )
-            return
+        Args:
+            room_id: The room ID
+            user_id: The user ID
+            prepared: (next pair, voted pair count, item count) from
+                _take_speculative_pair, skipping pair selection
+            batch_size: Pairs to show at once (1 for the classic 1/2 prompt)
+        """
+        if prepared:
+            next_pair, voted_count, num_items = prepared
+            pairs = [next_pair]
+        else:
+            term = Terminology.load()
+            items = list(self.store.ranking_snapshot().items)
+            item_plural = term.get('item_name_plural', 'items')
+            
+            if len(items) < 2:
+                await self._send_message(
+                    room_id,
+                    f"There aren't enough {item_plural} to compare yet! "
+                    f"We need at least 2. "
+                    f"Tag me with `add <{term.get('item_name', 'item')}>` to add some"
+                )
+                return
+            
+            # Get pairs the user has already voted on
+            voted_pairs = self.store.get_user_voted_pairs(user_id)
+            
+            # Get the next pair(s)
+            with span("pair_selection"):
+                pairs = self._select_pairs(items, voted_pairs, batch_size)
+            
+            if not pairs:
+                # User has voted on all pairs!
+                await self._send_message(
+                    room_id,
+                    Terminology.get('messages.vote_complete')
+                )
+                return
+            
+            voted_count, num_items = len(voted_pairs), len(items)
         
         # Save session
-        session = UserVotingSession(user_id=user_id, current_pair=(next_pair[0].id, next_pair[1].id))
+        session = UserVotingSession(
+            user_id=user_id,
+            pending_pairs=[(item_a.id, item_b.id) for item_a, item_b in pairs],
+            batch_size=batch_size
+        )
         self.store.save_session(session)
         
         # Send voting prompt
-        remaining = PairSelector.count_remaining_pairs(len(items), len(voted_pairs))
+        remaining = PairSelector.count_remaining_pairs(num_items, voted_count)
+        
+        if batch_size > 1:
+            await self._send_message(room_id, self._format_batch_prompt(pairs, remaining))
+            return
         
+        next_pair = pairs[0]
         vote_intro = Terminology.get('messages.vote_intro')
         option1 = Terminology.get('messages.vote_option_format', number="1", item=next_pair[0].name)
         option2 = Terminology.get('messages.vote_option_format', number="2", item=next_pair[1].name)
@@ -86,6 +175,83 @@ class DMHandler:
             f"Reply with **1** or **2**\n\n"
             f"_({remaining} pair{'s' if remaining != 1 else ''} remaining)_"
         )
+        
+        # Work out the pair after this one while the user decides
+        task = asyncio.create_task(self._speculate(user_id, session.current_pair))
+        self._speculation_tasks.add(task)
+        task.add_done_callback(self._speculation_tasks.discard)
+    
+    async def _speculate(self, user_id: str, pending_pair: Tuple[str, str]):
+        """Precompute the pair to offer once the user has voted on pending_pair, in a worker thread."""
+        pending = tuple(sorted(pending_pair))
+        try:
+            next_ids = await asyncio.get_running_loop().run_in_executor(
+                None, self._select_next_ids, user_id, pending
+            )
+        except Exception as e:
+            logger.warning(f"Couldn't precompute next pair for {user_id}: {e}")
+            return
+        
+        # Stale if the user answered (or started over) while it ran
+        session = self.store.get_session(user_id)
+        if next_ids and session and session.current_pair and tuple(sorted(session.current_pair)) == pending:
+            self._speculative[user_id] = (pending, next_ids)
+    
+    def _select_next_ids(self, user_id: str, pending: Tuple[str, str]) -> Optional[Tuple[str, str]]:
+        """The pair to offer after `pending`, as item IDs (runs off the event loop)."""
+        snapshot = self.store.ranking_snapshot()
+        voted_pairs = self.store.get_user_voted_pairs(user_id) | {pending}
+        pairs = self._select_pairs(list(snapshot.items), voted_pairs, 1)
+        return (pairs[0][0].id, pairs[0][1].id) if pairs else None
+    
+    def _select_pairs(self, items: List, voted_pairs: Set[Tuple[str, str]], count: int) -> List[Tuple]:
+        """
+        Pick up to `count` pairs using the configured strategy.
+        
+        With PAIR_SELECTION=top_k, only items that could still reach the top
+        TOP_K are paired. Once the user has voted on every pair among those,
+        selection falls back to the whole list so they can keep going.
+        """
+        candidate_sets = [items]
+        if Config.PAIR_SELECTION == "top_k":
+            candidate_sets.insert(0, PairSelector.top_k_contenders(items, Config.TOP_K))
+        
+        for candidates in candidate_sets:
+            if count > 1:
+                pairs = PairSelector.get_next_pairs(candidates, voted_pairs, count)
+            else:
+                next_pair = PairSelector.get_next_pair(candidates, voted_pairs)
+                pairs = [next_pair] if next_pair else []
+            if pairs:
+                return pairs
+        return []
+    
+    def _take_speculative_pair(self, user_id: str, voted_pair: Tuple[str, str]) -> Optional[Tuple]:
+        """
+        Use the precomputed pair if it is still valid after this vote.
+        
+        It was picked against the ratings of the time; other votes since then
+        only nudge which pair is closest, so it's kept as long as both items
+        still exist and the user hasn't voted on it meanwhile (e.g. in a
+        batch). The items are read fresh from the current snapshot.
+        
+        Returns:
+            (next pair, voted pair count, item count) for _start_voting, or
+            None to select pairs from scratch
+        """
+        entry = self._speculative.pop(user_id, None)
+        if entry is None or entry[0] != tuple(sorted(voted_pair)):
+            return None
+        
+        voted_pairs = self.store.get_user_voted_pairs(user_id)
+        if tuple(sorted(entry[1])) in voted_pairs:
+            return None
+        
+        snapshot = self.store.ranking_snapshot()
+        item_a, item_b = snapshot.get_item(entry[1][0]), snapshot.get_item(entry[1][1])
+        if not item_a or not item_b:
+            return None
+        return (item_a, item_b), len(voted_pairs), len(snapshot.items)
     
     async def _handle_vote_response(self, room_id: str, user_id: str, 
                                    message: str, session: UserVotingSession):
@@ -108,64 +274,160 @@ class DMHandler:
             )
             return
         
-        # Get the items from the session
-        item_a = self.store.get_item_by_id(session.current_pair[0])
-        item_b = self.store.get_item_by_id(session.current_pair[1])
+        # Read the ratings and apply the vote without another process
+        # (e.g. manage.py) writing in between
+        with self.store.transaction():
+            # Get the items from the session
+            item_a = self.store.get_item_by_id(session.current_pair[0])
+            item_b = self.store.get_item_by_id(session.current_pair[1])
+            
+            if item_a and item_b:
+                # Determine winner
+                winner = item_a if choice == "1" else item_b
+                
+                # Record vote
+                self.store.record_vote(
+                    user_id=user_id,
+                    item_a_id=item_a.id,
+                    item_b_id=item_b.id,
+                    winner_id=winner.id
+                )
+                
+                # Update Elo ratings
+                a_won = (choice == "1")
+                with span("elo"):
+                    new_elo_a, new_elo_b = self.elo.update_ratings(
+                        item_a.elo,
+                        item_b.elo,
+                        a_won
+                    )
+                
+                self.store.update_item_elo(item_a.id, new_elo_a)
+                self.store.update_item_elo(item_b.id, new_elo_b)
+            
+            # Clear session
+            self.store.clear_session(user_id)
         
         if not item_a or not item_b:
             term = Terminology.load()
             item_cap = term.get('item_name_capitalized', 'Item')
             await self._send_message(room_id, f"❌ Error: {item_cap} not found. Starting over...")
-            self.store.clear_session(user_id)
             await self._start_voting(room_id, user_id)
             return
         
-        # Determine winner
-        winner = item_a if choice == "1" else item_b
-        
-        # Record vote
-        self.store.record_vote(
-            user_id=user_id,
-            item_a_id=item_a.id,
-            item_b_id=item_b.id,
-            winner_id=winner.id
-        )
-        
-        # Update Elo ratings
-        a_won = (choice == "1")
-        new_elo_a, new_elo_b = self.elo.update_ratings(
-            item_a.elo,
-            item_b.elo,
-            a_won
-        )
-        
-        self.store.update_item_elo(item_a.id, new_elo_a)
-        self.store.update_item_elo(item_b.id, new_elo_b)
-        
-        # Clear session
-        self.store.clear_session(user_id)
-        
         # Send confirmation and next pair
         await self._send_message(
             room_id,
             f"✅ Recorded your preference for **{winner.name}**!"
         )
         
-        # Continue to next pair
-        await self._start_voting(room_id, user_id)
+        # Continue to next pair, usually already picked while the user was deciding
+        await self._start_voting(room_id, user_id, self._take_speculative_pair(user_id, session.current_pair))
+    
+    def _format_batch_prompt(self, pairs: List[Tuple], remaining: int) -> str:
+        """Format a prompt listing several pairs to vote on at once."""
+        lines = [Terminology.get('messages.vote_intro'), ""]
+        for i, (item_a, item_b) in enumerate(pairs, 1):
+            lines.append(f"{i}. **{item_a.name}** vs **{item_b.name}**")
+        
+        example = ("ab" * len(pairs))[:len(pairs)]
+        lines.append("")
+        lines.append(f"Reply with one letter per pair: **a** for the first, **b** for the second, "
+                     f"**-** to skip (e.g. `{example}`)")
+        lines.append("")
+        lines.append(f"_({remaining} pair{'s' if remaining != 1 else ''} remaining, "
+                     f"send `single` to go back to one at a time)_")
+        return "\n".join(lines)
+    
+    def _parse_batch_choices(self, message: str, count: int) -> Optional[List[Optional[bool]]]:
+        """
+        Parse a batch reply like "ab ba-" into one choice per pending pair.
+        
+        Returns:
+            True (first item won), False (second won) or None (skipped) per
+            pair, or None if the reply doesn't have exactly one valid letter
+            per pair
+        """
+        letters = re.sub(r'[\s,]+', '', message.lower())
+        if len(letters) != count or any(c not in BATCH_CHOICES for c in letters):
+            return None
+        return [BATCH_CHOICES[c] for c in letters]
+    
+    async def _handle_batch_response(self, room_id: str, user_id: str,
+                                     message: str, session: UserVotingSession):
+        """
+        Apply a reply to a batch prompt as one commit.
+        
+        Args:
+            room_id: The room ID
+            user_id: The user ID
+            message: The message content (one of a/b/- per pending pair)
+            session: The user's current voting session
+        """
+        count = len(session.pending_pairs)
+        choices = self._parse_batch_choices(message, count)
+        
+        if choices is None:
+            example = ("ab" * count)[:count]
+            await self._send_message(
+                room_id,
+                f"Please reply with {count} letter{'s' if count != 1 else ''}, one per pair: "
+                f"**a** or **b**, or **-** to skip (e.g. `{example}`)"
+            )
+            return
+        
+        with self.store.transaction():
+            items = {item.id: item for item in self.store.get_all_items()}
+            now = datetime.now().isoformat()
+            
+            votes = []
+            for (item_a_id, item_b_id), a_won in zip(session.pending_pairs, choices):
+                if a_won is None or item_a_id not in items or item_b_id not in items:
+                    continue
+                votes.append(Vote(
+                    user_id=user_id,
+                    item_a_id=item_a_id,
+                    item_b_id=item_b_id,
+                    winner_id=item_a_id if a_won else item_b_id,
+                    timestamp=now
+                ))
+            
+            # One write for votes and user_votes, one for all rating changes
+            recorded = self.store.record_votes(votes)
+            
+            updates = []
+            with span("elo"):
+                for vote in recorded:
+                    item_a, item_b = items[vote.item_a_id], items[vote.item_b_id]
+                    item_a.elo, item_b.elo = self.elo.update_ratings(
+                        item_a.elo,
+                        item_b.elo,
+                        vote.winner_id == item_a.id
+                    )
+                    updates.append((item_a.id, item_a.elo))
+                    updates.append((item_b.id, item_b.elo))
+            self.store.update_item_elos(updates)
+            
+            # Keep the batch size; the next prompt fills in new pairs
+            self.store.save_session(UserVotingSession(user_id=user_id, batch_size=session.batch_size))
+        
+        if recorded:
+            winners = ", ".join(f"**{items[vote.winner_id].name}**" for vote in recorded)
+            confirmation = f"✅ Recorded {len(recorded)} vote{'s' if len(recorded) != 1 else ''}: {winners}"
+        else:
+            confirmation = "Nothing recorded, all pairs skipped."
+        await self._send_message(room_id, confirmation)
+        
+        await self._start_voting(room_id, user_id, batch_size=session.batch_size)
     
     async def _send_message(self, room_id: str, message: str):
         """Send a message to a room."""
-        await self.client.room_send(
-            room_id=room_id,
-            message_type="m.room.message",
-            content={
-                "msgtype": "m.text",
-                "body": message,
-                "format": "org.matrix.custom.html",
-                "formatted_body": self._markdown_to_html(message)
-            }
-        )
+        await room_send(self.client, room_id, {
+            "msgtype": "m.text",
+            "body": message,
+            "format": "org.matrix.custom.html",
+            "formatted_body": self._markdown_to_html(message)
+        })
     
     def _markdown_to_html(self, text: str) -> str:
         """Convert simple markdown to HTML for Matrix."""
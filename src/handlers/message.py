@@ -5,14 +5,24 @@ from nio import AsyncClient, RoomMessageText
 from storage import JSONStore
 from ranking import EloRanking
 from commands import AddCommand, RevealCommand, ResetCommand
+from commands.metrics import MetricsCommand
+from commands.profile import ProfileCommand
+from commands.merge import MergeCommand
+from commands.stats import StatsCommand
+from commands.rerank import RerankCommand
 from handlers.dm import DMHandler
-from config import Terminology
+from handlers.admission import AdmissionController
+from handlers.outbound import room_send
+from config import Config, Terminology
+from metrics import COMMAND_LATENCY, COMMAND_ERRORS, EVENTS_SHED
+from tracing import Profiler, span, annotate
 
 
 class MessageHandler:
     """Handle incoming Matrix messages."""
     
-    def __init__(self, client: AsyncClient, store: JSONStore, elo: EloRanking, bot_user_id: str):
+    def __init__(self, client: AsyncClient, store: JSONStore, elo: EloRanking, bot_user_id: str,
+                 profiler: Profiler = None, admission: AdmissionController = None):
         self.client = client
         self.store = store
         self.bot_user_id = bot_user_id
@@ -22,16 +32,50 @@ class MessageHandler:
         
         # Initialize command handlers
         self.add_command = AddCommand(store)
-        self.reveal_command = RevealCommand(store)
+        self.reveal_command = RevealCommand(store, elo)
         self.reset_command = ResetCommand(store)
+        self.metrics_command = MetricsCommand()
+        self.profile_command = ProfileCommand(profiler or Profiler(store.data_dir))
+        self.rerank_command = RerankCommand(store, elo)
+        self.merge_command = MergeCommand(store, elo, self.rerank_command)
+        self.stats_command = StatsCommand(store, elo)
         
         # Initialize DM handler
         self.dm_handler = DMHandler(client, store, elo)
         
-        # Track processed events to avoid duplicates
-        self.processed_events = set()
+        # Per-user/per-room rate limits
+        self.admission = admission or AdmissionController(
+            user_rate=Config.USER_MESSAGES_PER_MINUTE / 60,
+            user_burst=Config.USER_BURST,
+            room_rate=Config.ROOM_MESSAGES_PER_MINUTE / 60,
+            room_burst=Config.ROOM_BURST
+        )
+        
+        # Track processed events to avoid duplicates (dict keeps insertion order,
+        # so trimming drops the oldest). Persisted with the sync token so events
+        # replayed after a restart are skipped here.
+        self.processed_events = {}
         self.max_processed_events = 1000  # Prevent memory leak
     
+    async def finish_background_work(self):
+        """Finish background work worth keeping (a rerank in progress) and drop the rest."""
+        self.dm_handler.close()
+        await self.rerank_command.wait()
+    
+    def close(self):
+        """Stop background workers."""
+        self.dm_handler.close()
+        self.reveal_command.close()
+    
+    def load_processed_events(self, event_ids):
+        """Seed the dedup store with event IDs handled before a restart."""
+        for event_id in event_ids[-self.max_processed_events:]:
+            self.processed_events[event_id] = None
+    
+    def get_processed_events(self) -> list:
+        """Get processed event IDs, oldest first, for persisting."""
+        return list(self.processed_events)
+    
     async def handle_message(self, room, event: RoomMessageText):
         """
         Handle a room message event.
@@ -45,7 +89,6 @@ class MessageHandler:
             return
         
         # Security check: only respond to allowed users
-        from config import Config
         if not Config.is_user_allowed(event.sender):
             import logging
             logger = logging.getLogger(__name__)
@@ -57,13 +100,13 @@ class MessageHandler:
         if event_id in self.processed_events:
             return
         
-        # Add to processed set
-        self.processed_events.add(event_id)
+        # Add to processed events
+        self.processed_events[event_id] = None
         
-        # Keep the set from growing unbounded
+        # Keep the dedup store from growing unbounded
         if len(self.processed_events) > self.max_processed_events:
             # Remove oldest half
-            self.processed_events = set(list(self.processed_events)[self.max_processed_events // 2:])
+            self.processed_events = dict.fromkeys(list(self.processed_events)[self.max_processed_events // 2:])
         
         message = event.body
         sender = event.sender
@@ -72,17 +115,35 @@ class MessageHandler:
         # Check if bot is mentioned (priority over DM detection)
         bot_mentioned = f"@{self.bot_name}" in message or self.bot_user_id in message
         
+        # Check if this is a DM (room with only 2 members: bot and user)
+        is_dm = not bot_mentioned and room.member_count == 2
+        
+        if not bot_mentioned and not is_dm:
+            return
+        
+        # Shed floods before they cost any storage work. DM votes skip the
+        # per-user bucket: a voter answers as fast as they can read the pairs,
+        # and their DM room's bucket still caps them
+        shed = self.admission.admit(sender, room_id, per_user=not is_dm)
+        if shed:
+            EVENTS_SHED.inc(reason=shed)
+            annotate(shed=shed)
+            if self.admission.should_notify(sender):
+                await self._send_message(room_id, self._slow_down_message(shed, sender))
+            return
+        
         if bot_mentioned:
             # Handle as a command (even in DM)
             await self._handle_command(room_id, sender, message)
         else:
-            # Check if this is a DM (room with only 2 members: bot and user)
-            members = room.member_count
-            is_dm = members == 2
-            
-            if is_dm:
-                # Handle DM voting
-                await self.dm_handler.handle_dm(room_id, sender, message)
+            # Handle DM voting
+            await self.dm_handler.handle_dm(room_id, sender, message)
+    
+    def _slow_down_message(self, reason: str, sender: str) -> str:
+        """The reply for a shed message."""
+        if reason == "room":
+            return "⏳ This room is sending more than I can keep up with, please slow down a little"
+        return f"⏳ {sender}, you're sending messages faster than I can keep up with. Give me a few seconds and try again"
     
     async def _handle_command(self, room_id: str, sender: str, message: str):
         """
@@ -93,35 +154,110 @@ class MessageHandler:
             sender: The sender's user ID
             message: The message content
         """
-        response = None
-        
         # Debug logging
         import logging
         logger = logging.getLogger(__name__)
         logger.info(f"Processing command from {sender}: {message}")
         logger.info(f"Bot name: {self.bot_name}")
         
+        with span("parse"):
+            command = self._match_command(message)
+        logger.info(f"Parsed {command} command")
+        annotate(command=command)
+        
+        try:
+            with COMMAND_LATENCY.time(command=command):
+                await self._run_command(command, room_id, sender, message)
+        except Exception:
+            COMMAND_ERRORS.inc(command=command)
+            raise
+    
+    def _match_command(self, message: str) -> str:
+        """Work out which command a message is (or "help" if none match)."""
         # Try reset all command
         if self.reset_command.parse_reset_all_command(message, self.bot_name):
-            logger.info(f"Parsed reset all command")
-            response = self.reset_command.execute_reset_all()
+            return "reset"
         
-        # Try rerank command
-        elif self.reset_command.parse_rerank_command(message, self.bot_name):
-            logger.info(f"Parsed rerank command")
-            response = self.reset_command.execute_rerank()
+        # Try rerank command (with parameters: recompute, keeping votes)
+        if self.rerank_command.parse_command(message, self.bot_name):
+            return "recompute"
+        if self.reset_command.parse_rerank_command(message, self.bot_name):
+            return "rerank"
         
         # Try add command
-        elif (item_name := self.add_command.parse_command(message, self.bot_name)):
-            logger.info(f"Parsed add command with item: {item_name}")
-            response = self.add_command.execute(item_name, sender)
+        if self.add_command.parse_command(message, self.bot_name):
+            return "add"
         
         # Try reveal command
-        elif self.reveal_command.parse_command(message, self.bot_name):
-            logger.info(f"Parsed reveal command")
-            response = self.reveal_command.execute()
+        if self.reveal_command.parse_command(message, self.bot_name):
+            return "reveal"
+        
+        # Try metrics command
+        if self.metrics_command.parse_command(message, self.bot_name):
+            return "metrics"
+        
+        # Try profile command
+        if self.profile_command.parse_command(message, self.bot_name) is not None:
+            return "profile"
+        
+        # Try merge command
+        if self.merge_command.parse_command(message, self.bot_name):
+            return "merge"
+        
+        # Try stats and vs commands
+        if self.stats_command.parse_stats_command(message, self.bot_name):
+            return "stats"
+        if self.stats_command.parse_vs_command(message, self.bot_name):
+            return "vs"
         
         # Help message if bot mentioned but no command recognized
+        return "help"
+    
+    async def _run_command(self, command: str, room_id: str, sender: str, message: str):
+        """Execute a matched command and send its response."""
+        response = None
+        
+        if command == "reset":
+            response = self.reset_command.execute_reset_all()
+            
+        elif command == "rerank":
+            response = self.reset_command.execute_rerank()
+            
+        elif command == "recompute":
+            k_factor, half_life = self.rerank_command.parse_command(message, self.bot_name)
+            response = self.rerank_command.execute(
+                k_factor, half_life, sender,
+                lambda text: self._send_message(room_id, text)
+            )
+            
+        elif command == "add":
+            item_names = self.add_command.parse_command(message, self.bot_name)
+            response = self.add_command.execute(item_names, sender)
+            
+        elif command == "reveal":
+            view, seconds = self.reveal_command.parse_view(message, self.bot_name)
+            if view == "ci":
+                response = await self.reveal_command.execute_ci()
+            else:
+                response = self.reveal_command.execute(view, seconds)
+            
+        elif command == "metrics":
+            response = self.metrics_command.execute(sender)
+            
+        elif command == "profile":
+            num_events = self.profile_command.parse_command(message, self.bot_name)
+            response = self.profile_command.execute(num_events, sender)
+            
+        elif command == "merge":
+            source_name, target_name = self.merge_command.parse_command(message, self.bot_name)
+            response = await self.merge_command.execute(source_name, target_name, sender)
+            
+        elif command == "stats":
+            response = self.stats_command.execute_stats(self.stats_command.parse_stats_command(message, self.bot_name))
+            
+        elif command == "vs":
+            response = self.stats_command.execute_vs(self.stats_command.parse_vs_command(message, self.bot_name))
+            
         else:
             response = self._get_help_message()
         
@@ -134,16 +270,12 @@ class MessageHandler:
     
     async def _send_message(self, room_id: str, message: str):
         """Send a message to a room."""
-        await self.client.room_send(
-            room_id=room_id,
-            message_type="m.room.message",
-            content={
-                "msgtype": "m.text",
-                "body": message,
-                "format": "org.matrix.custom.html",
-                "formatted_body": self._markdown_to_html(message)
-            }
-        )
+        await room_send(self.client, room_id, {
+            "msgtype": "m.text",
+            "body": message,
+            "format": "org.matrix.custom.html",
+            "formatted_body": self._markdown_to_html(message)
+        })
     
     def _markdown_to_html(self, text: str) -> str:
         """Convert simple markdown to HTML for Matrix."""
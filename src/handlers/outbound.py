@@ -0,0 +1,56 @@
+"""Outbound message sending with latency metrics and rate-limit handling."""
+
+import asyncio
+import logging
+
+from nio import AsyncClient, RoomSendError
+
+from metrics import SEND_LATENCY, SEND_RATE_LIMITED, SEND_ERRORS
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# How many times to retry a send the homeserver rate limited
+MAX_RATE_LIMIT_RETRIES = 5
+
+
+async def room_send(client: AsyncClient, room_id: str, content: dict):
+    """
+    Send an m.room.message, retrying on 429 / M_LIMIT_EXCEEDED.
+    
+    The client is configured not to retry 429s itself, so they can be
+    counted here and retried after the server's retry_after_ms.
+    
+    Args:
+        client: The Matrix client
+        room_id: The room to send to
+        content: The event content
+        
+    Returns:
+        The final room_send response
+    """
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        with span("room_send"), SEND_LATENCY.time():
+            response = await client.room_send(
+                room_id=room_id,
+                message_type="m.room.message",
+                content=content
+            )
+        
+        if not isinstance(response, RoomSendError):
+            return response
+        
+        if response.status_code == "M_LIMIT_EXCEEDED" and attempt < MAX_RATE_LIMIT_RETRIES:
+            SEND_RATE_LIMITED.inc()
+            retry_after = (response.retry_after_ms or 1000) / 1000.0
+            logger.warning(f"Rate limited sending to {room_id}, retrying in {retry_after:.1f}s")
+            await asyncio.sleep(retry_after)
+            continue
+        
+        if response.status_code == "M_LIMIT_EXCEEDED":
+            SEND_RATE_LIMITED.inc()
+        SEND_ERRORS.inc()
+        logger.error(f"Failed to send message to {room_id}: {response.message}")
+        return response
+    
+    return response
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Offline admin tool for the ranking bot's data directory.
+
+Usage:
+    python3 src/manage.py export items items.csv
+    python3 src/manage.py import items items.jsonl --added-by @admin:example.org
+    python3 src/manage.py export votes votes.jsonl
+    python3 src/manage.py import votes votes.csv
+    python3 src/manage.py check [--repair]
+
+The format (csv or jsonl) is taken from the file extension unless --format is
+given. Use "-" as the path for stdin/stdout.
+"""
+
+import argparse
+import csv
+import json
+import sys
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List
+
+from config import Config
+from ranking import EloRanking
+from storage import JSONStore, Vote
+
+ITEM_FIELDS = ['id', 'name', 'elo', 'votes_count', 'added_by', 'added_at']
+VOTE_FIELDS = ['user_id', 'item_a_id', 'item_a', 'item_b_id', 'item_b', 'winner_id', 'winner', 'timestamp']
+
+
+def _detect_format(path: str, fmt: str) -> str:
+    """Pick csv/jsonl from --format or the file extension."""
+    if fmt:
+        return fmt
+    if path.endswith('.csv'):
+        return 'csv'
+    if path.endswith('.jsonl') or path.endswith('.ndjson'):
+        return 'jsonl'
+    raise SystemExit(f"Can't tell the format of {path}; pass --format csv or --format jsonl")
+
+
+def _open(path: str, mode: str):
+    if path == '-':
+        return sys.stdin if 'r' in mode else sys.stdout
+    return open(path, mode, newline='', encoding='utf-8')
+
+
+def read_rows(path: str, fmt: str) -> Iterator[Dict]:
+    """Stream rows from a CSV (with header) or JSONL file."""
+    f = _open(path, 'r')
+    try:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def write_rows(path: str, fmt: str, fields: List[str], rows: Iterable[Dict]) -> int:
+    """Write rows as CSV (with header) or JSONL; returns the row count."""
+    f = _open(path, 'w')
+    count = 0
+    try:
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in rows:
+                f.write(json.dumps({k: row.get(k) for k in fields}) + '\n')
+                count += 1
+    finally:
+        if f is not sys.stdout:
+            f.close()
+    return count
+
+
+# Items
+
+def export_items(store: JSONStore, path: str, fmt: str):
+    items = store.ranking_snapshot().items
+    count = write_rows(path, fmt, ITEM_FIELDS, (item.to_dict() for item in items))
+    print(f"Exported {count} items", file=sys.stderr)
+
+
+def import_items(store: JSONStore, path: str, fmt: str, added_by: str):
+    names = []
+    for row in read_rows(path, fmt):
+        name = (row.get('name') or '').strip()
+        if name:
+            names.append(name)
+    
+    # Deduped against existing names and within the file, committed in one write
+    added, existing = store.add_items(names, added_by)
+    repeated = len(names) - len(added) - len(existing)
+    print(f"Imported {len(added)} items ({len(existing)} already present, {repeated} repeated in the file)",
+          file=sys.stderr)
+
+
+# Votes
+
+def export_votes(store: JSONStore, path: str, fmt: str):
+    names = {item.id: item.name for item in store.ranking_snapshot().items}
+    
+    def rows():
+        for vote in store.get_all_votes():
+            row = vote.to_dict()
+            row['item_a'] = names.get(vote.item_a_id)
+            row['item_b'] = names.get(vote.item_b_id)
+            row['winner'] = names.get(vote.winner_id)
+            yield row
+    
+    count = write_rows(path, fmt, VOTE_FIELDS, rows())
+    print(f"Exported {count} votes", file=sys.stderr)
+
+
+def import_votes(store: JSONStore, path: str, fmt: str, k_factor: float):
+    items = {item.id: item for item in store.get_all_items()}
+    by_name = {item.name.lower(): item for item in items.values()}
+    
+    def resolve(row: Dict, field: str):
+        """Find an item by <field>_id, falling back to <field> as a name."""
+        item_id = row.get(f'{field}_id')
+        if item_id and item_id in items:
+            return items[item_id]
+        name = (row.get(field) or '').strip().lower()
+        return by_name.get(name)
+    
+    votes = []
+    skipped = 0
+    for row in read_rows(path, fmt):
+        item_a, item_b, winner = resolve(row, 'item_a'), resolve(row, 'item_b'), resolve(row, 'winner')
+        if not item_a or not item_b or item_a.id == item_b.id or winner not in (item_a, item_b) or not row.get('user_id'):
+            skipped += 1
+            continue
+        
+        # Everything downstream (the vote log, time views) parses these as ISO 8601
+        try:
+            timestamp = datetime.fromisoformat(row['timestamp']) if row.get('timestamp') else datetime.now()
+        except (TypeError, ValueError):
+            skipped += 1
+            continue
+        
+        votes.append(Vote(
+            user_id=row['user_id'],
+            item_a_id=item_a.id,
+            item_b_id=item_b.id,
+            winner_id=winner.id,
+            timestamp=timestamp.isoformat()
+        ))
+    
+    # One write for votes and user_votes (repeat user/pair votes are dropped)
+    recorded = store.record_votes(votes)
+    
+    # Apply the recorded votes to the ratings in order, then one write for items
+    elo = EloRanking(k_factor=k_factor)
+    updates = []
+    for vote in recorded:
+        item_a, item_b = items[vote.item_a_id], items[vote.item_b_id]
+        item_a.elo, item_b.elo = elo.update_ratings(item_a.elo, item_b.elo, vote.winner_id == item_a.id)
+        updates.append((item_a.id, item_a.elo))
+        updates.append((item_b.id, item_b.elo))
+    store.update_item_elos(updates)
+    
+    duplicates = len(votes) - len(recorded)
+    print(f"Imported {len(recorded)} votes ({duplicates} repeat pairs, {skipped} unresolvable rows skipped)", file=sys.stderr)
+
+
+# Consistency
+
+def check(store: JSONStore, repair: bool) -> bool:
+    """Report inconsistencies between the data files (and optionally repair them); True if none remain."""
+    report = store.check_consistency(repair=repair)
+    print(report.summary(), file=sys.stderr)
+    if not report.repaired:
+        return report.ok
+    
+    # Votes for missing items and self-votes are history; a repair keeps them
+    remaining = store.check_consistency()
+    print("After repair: " + remaining.summary(), file=sys.stderr)
+    return remaining.ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ranking bot data admin tool")
+    parser.add_argument('--data-dir', default=Config.DATA_DIR, help="Data directory (default: DATA_DIR)")
+    sub = parser.add_subparsers(dest='command', required=True)
+    
+    for action in ('import', 'export'):
+        p = sub.add_parser(action, help=f"{action.capitalize()} items or votes as CSV/JSONL")
+        p.add_argument('kind', choices=['items', 'votes'])
+        p.add_argument('path', help="File path, or - for stdin/stdout")
+        p.add_argument('--format', choices=['csv', 'jsonl'])
+        if action == 'import':
+            p.add_argument('--added-by', default='import', help="added_by for imported items")
+            p.add_argument('--k-factor', type=float,
+                           help="Elo K-factor for imported votes (default: the bot's live K)")
+    
+    p = sub.add_parser('check', help="Check the data files agree with each other (exit status 1 if not)")
+    p.add_argument('--repair', action='store_true',
+                   help="Rebuild vote counts, user_votes and sessions from the votes")
+    
+    args = parser.parse_args()
+    store = JSONStore(args.data_dir, durability=Config.DURABILITY)
+    if args.command == 'check':
+        ok = check(store, args.repair)
+        store.sync()
+        sys.exit(0 if ok else 1)
+    
+    fmt = _detect_format(args.path, args.format)
+    
+    # Safe to run next to the bot: each command is one transaction on the
+    # data directory lock, so a live vote can't land between our read and write
+    if args.command == 'export' and args.kind == 'items':
+        export_items(store, args.path, fmt)
+    elif args.command == 'export':
+        export_votes(store, args.path, fmt)
+    elif args.kind == 'items':
+        with store.transaction():
+            import_items(store, args.path, fmt, args.added_by)
+    else:
+        with store.transaction():
+            k_factor = args.k_factor or store.get_ranking_params().get('k_factor') or Config.ELO_K_FACTOR
+            import_votes(store, args.path, fmt, k_factor)
+    store.sync()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+"""Lightweight in-process metrics with Prometheus text exposition."""
+
+import functools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from tracing import span
+
+if TYPE_CHECKING:
+    import asyncio
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds (upper bounds); +Inf is implicit
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labelnames: Tuple[str, ...], labels: Dict[str, str]) -> Tuple[str, ...]:
+    """Order label values consistently."""
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    """Render {a="x",b="y"} for the exposition format."""
+    parts = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """A monotonically increasing counter, optionally labelled."""
+    
+    kind = "counter"
+    
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+    
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(self.labelnames, labels), 0.0)
+    
+    def total(self) -> float:
+        return sum(self._values.values())
+    
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+                for key, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    """A value that can go up and down."""
+    
+    kind = "gauge"
+    
+    def set(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+    
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """A cumulative-bucket latency histogram, optionally labelled."""
+    
+    kind = "histogram"
+    
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label key -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+    
+    @contextmanager
+    def time(self, **labels):
+        """Context manager observing the elapsed wall time in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+    
+    def count(self, **labels) -> int:
+        series = self._series.get(_label_key(self.labelnames, labels))
+        return int(sum(series[:-1])) if series else 0
+    
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Estimate a quantile by linear interpolation within buckets."""
+        series = self._series.get(_label_key(self.labelnames, labels))
+        if not series:
+            return None
+        counts = series[:-1]
+        total = sum(counts)
+        if not total:
+            return None
+        
+        target = q * total
+        cumulative = 0
+        lower = 0.0
+        for i, count in enumerate(counts):
+            upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+            if cumulative + count >= target and count:
+                return lower + (upper - lower) * (target - cumulative) / count
+            cumulative += count
+            lower = upper
+        return self.buckets[-1]
+    
+    def label_sets(self) -> List[Dict[str, str]]:
+        return [dict(zip(self.labelnames, key)) for key in sorted(self._series)]
+    
+    def render(self) -> List[str]:
+        lines = []
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for i, bound in enumerate(self.buckets):
+                cumulative += series[i]
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            cumulative += series[len(self.buckets)]
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Holds all metrics and renders them in Prometheus text format."""
+    
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+    
+    def _register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+    
+    def gauge(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labelnames))
+    
+    def histogram(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames))
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Commands
+COMMAND_LATENCY = REGISTRY.histogram("rankbot_command_seconds", "Time to handle a command, including replies", ("command",))
+COMMAND_ERRORS = REGISTRY.counter("rankbot_command_errors_total", "Commands that raised an exception", ("command",))
+
+# Storage
+STORE_OP_LATENCY = REGISTRY.histogram("rankbot_store_op_seconds", "JSONStore method latency", ("op",))
+STORE_BYTES_READ = REGISTRY.counter("rankbot_store_read_bytes_total", "Bytes read from data files", ("file",))
+STORE_BYTES_WRITTEN = REGISTRY.counter("rankbot_store_written_bytes_total", "Bytes written to data files", ("file",))
+
+# Sync
+SYNC_LATENCY = REGISTRY.histogram("rankbot_sync_seconds", "Sync round-trip time including event handling")
+SYNC_EVENTS = REGISTRY.gauge("rankbot_sync_batch_events", "Timeline events in the last sync batch")
+EVENTS_IN_FLIGHT = REGISTRY.gauge("rankbot_events_in_flight", "Events currently being handled")
+EVENTS_SHED = REGISTRY.counter("rankbot_events_shed_total", "Messages dropped by admission control", ("reason",))
+
+# Outbound
+SEND_LATENCY = REGISTRY.histogram("rankbot_send_seconds", "room_send latency")
+SEND_RATE_LIMITED = REGISTRY.counter("rankbot_send_rate_limited_total", "room_send responses with 429 / M_LIMIT_EXCEEDED")
+SEND_ERRORS = REGISTRY.counter("rankbot_send_errors_total", "room_send calls that failed")
+
+
+def timed_store_op(func):
+    """Decorator recording a JSONStore method's latency under its name (and as a trace span)."""
+    op = func.__name__
+    stage = f"store.{op}"
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(stage), STORE_OP_LATENCY.time(op=op):
+            return func(*args, **kwargs)
+    
+    return wrapper
+
+
+def summary() -> str:
+    """Human-readable summary for the `metrics` admin command."""
+    def fmt(seconds: Optional[float]) -> str:
+        return f"{seconds * 1000:.1f}ms" if seconds is not None else "-"
+    
+    lines = ["📈 **metrics** 📈", ""]
+    
+    lines.append("**commands** (count, p50, p99)")
+    for labels in COMMAND_LATENCY.label_sets():
+        lines.append(
+            f"- {labels['command']}: {COMMAND_LATENCY.count(**labels)}, "
+            f"{fmt(COMMAND_LATENCY.quantile(0.5, **labels))}, {fmt(COMMAND_LATENCY.quantile(0.99, **labels))}"
+        )
+    
+    lines.append("")
+    lines.append("**storage** (count, p50, p99)")
+    for labels in STORE_OP_LATENCY.label_sets():
+        lines.append(
+            f"- {labels['op']}: {STORE_OP_LATENCY.count(**labels)}, "
+            f"{fmt(STORE_OP_LATENCY.quantile(0.5, **labels))}, {fmt(STORE_OP_LATENCY.quantile(0.99, **labels))}"
+        )
+    lines.append(
+        f"- read {STORE_BYTES_READ.total() / 1024 / 1024:.1f} MiB, "
+        f"written {STORE_BYTES_WRITTEN.total() / 1024 / 1024:.1f} MiB"
+    )
+    
+    lines.append("")
+    lines.append(
+        f"**sync**: {SYNC_LATENCY.count()} syncs, p50 {fmt(SYNC_LATENCY.quantile(0.5))}, "
+        f"last batch {SYNC_EVENTS.total():.0f} events"
+    )
+    lines.append(
+        f"**shed**: {EVENTS_SHED.value(reason='user'):.0f} user rate, {EVENTS_SHED.value(reason='room'):.0f} room rate"
+    )
+    lines.append(
+        f"**sends**: {SEND_LATENCY.count()}, p50 {fmt(SEND_LATENCY.quantile(0.5))}, "
+        f"p99 {fmt(SEND_LATENCY.quantile(0.99))}, {SEND_RATE_LIMITED.total():.0f} rate limited, "
+        f"{SEND_ERRORS.total():.0f} errors"
+    )
+    
+    return "\n".join(lines)
+
+
+class MetricsServer:
+    """Minimal HTTP server exposing /metrics in Prometheus text format."""
+    
+    def __init__(self, host: str, port: int, registry: Registry = REGISTRY):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self._server = None
+    
+    async def start(self):
+        # Imported here: asyncio is a large import that CLI tools loading the store never need
+        import asyncio
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+    
+    async def close(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+    
+    async def _handle(self, reader: "asyncio.StreamReader", writer: "asyncio.StreamWriter"):
+        import asyncio
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            # Drain headers
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (b"\r\n", b"\n", b""):
+                pass
+            
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, body = "200 OK", self.registry.render().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,80 @@
+"""Bootstrap rank intervals: how much the ranking could move with different votes."""
+
+import random
+from array import array
+from typing import List, Sequence, Tuple
+
+
+def bootstrap_ranks(item_a: array, item_b: array, b_won: array, remap: Sequence[int], num_items: int,
+                    k_factor: float, seeds: Sequence[int], initial_rating: float = 1500.0) -> List[List[int]]:
+    """
+    Replay resampled vote histories and rank the items after each.
+    
+    Each resample draws len(votes) votes with replacement, keeps them in
+    their original order and replays Elo from scratch. Runs in a worker
+    process, so it takes plain arrays rather than store objects.
+    
+    Args:
+        item_a, item_b, b_won: VoteLog columns
+        remap: Log item ordinal -> index in the ranking (-1: skip votes on it)
+        num_items: Items being ranked
+        k_factor: Elo K-factor
+        seeds: One random seed per resample
+        initial_rating: Starting rating for every item
+        
+    Returns:
+        Per resample, the rank (1 = best) of each item by index
+    """
+    n = len(item_a)
+    # Votes on items that no longer exist can't affect any rank
+    votes = [(remap[a], remap[b], won) for a, b, won in zip(item_a, item_b, b_won)]
+    samples = []
+    
+    for seed in seeds:
+        rng = random.Random(seed)
+        picks = sorted(rng.randrange(n) for _ in range(n)) if n else []
+        ratings = [initial_rating] * num_items
+        
+        # EloRanking.update_ratings, inlined: this loop is the whole cost
+        for index in picks:
+            a, b, won = votes[index]
+            if a < 0 or b < 0:
+                continue
+            rating_a = ratings[a]
+            rating_b = ratings[b]
+            delta = k_factor * ((0.0 if won else 1.0) - 1.0 / (1.0 + 10.0 ** ((rating_b - rating_a) / 400.0)))
+            ratings[a] = rating_a + delta
+            ratings[b] = rating_b - delta
+        
+        ranks = [0] * num_items
+        for rank, index in enumerate(sorted(range(num_items), key=ratings.__getitem__, reverse=True), 1):
+            ranks[index] = rank
+        samples.append(ranks)
+    
+    return samples
+
+
+def rank_intervals(samples: List[List[int]], num_items: int, level: float = 0.95) -> List[Tuple[int, int]]:
+    """
+    Central `level` interval of each item's rank across resamples.
+    
+    Returns:
+        (best rank, worst rank) per item index
+    """
+    if not samples:
+        return [(i + 1, i + 1) for i in range(num_items)]
+    tail = (1.0 - level) / 2
+    lo = int(tail * (len(samples) - 1))
+    hi = len(samples) - 1 - lo
+    intervals = []
+    for index in range(num_items):
+        ranks = sorted(sample[index] for sample in samples)
+        intervals.append((ranks[lo], ranks[hi]))
+    return intervals
+
+
+def split_seeds(seed: int, count: int, chunks: int) -> List[List[int]]:
+    """`count` resample seeds derived from `seed`, dealt into `chunks` lists."""
+    rng = random.Random(seed)
+    seeds = [rng.getrandbits(32) for _ in range(count)]
+    return [chunk for chunk in (seeds[i::chunks] for i in range(chunks)) if chunk]
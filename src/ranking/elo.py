@@ -1,13 +1,14 @@
 """Elo rating system for pairwise comparisons."""
 
+import itertools
 import math
-from typing import Tuple
+from typing import Dict, Iterable, Optional, Tuple
 
 
 class EloRanking:
     """Elo rating system implementation."""
     
-    def __init__(self, k_factor: float = 32.0):
+    def __init__(self, k_factor: float = 32.0, half_life: Optional[float] = None):
         """
         Initialize Elo ranking system.
         
@@ -15,8 +16,12 @@ class EloRanking:
             k_factor: The K-factor determines how much ratings change after each match.
                      Higher values mean more volatile ratings.
                      Default 32 is standard for most systems.
+            half_life: Decay half-life in seconds the ratings were last replayed
+                     with (None: no decay). Only replays use it; a single vote
+                     is always applied at full weight.
         """
         self.k_factor = k_factor
+        self.half_life = half_life
     
     def expected_score(self, rating_a: float, rating_b: float) -> float:
         """
@@ -71,3 +76,37 @@ class EloRanking:
             Probability that A beats B (0 to 1)
         """
         return 1.0 / (1.0 + math.pow(10, -rating_diff / 400.0))
+    
+    def replay(self, outcomes: Iterable[Tuple[str, str, bool]], item_ids: Iterable[str],
+               initial_rating: float = 1500.0, weights: Optional[Iterable[float]] = None,
+               ratings: Optional[Dict[str, Tuple[float, int]]] = None) -> Dict[str, Tuple[float, int]]:
+        """
+        Recompute ratings by applying votes in order.
+        
+        Args:
+            outcomes: (item_a_id, item_b_id, a_won) per vote, oldest first
+            item_ids: Items to rate; votes mentioning other items are skipped
+            initial_rating: Starting rating for every item
+            weights: Optional per-vote multiplier on the K-factor, lined up with outcomes
+            ratings: Optional item_id -> (rating, count) to continue from instead of
+                     starting every item at initial_rating
+            
+        Returns:
+            item_id -> (rating, number of comparisons)
+        """
+        ratings = ratings or {}
+        state = {item_id: list(ratings.get(item_id, (initial_rating, 0))) for item_id in item_ids}
+        weights = weights if weights is not None else itertools.repeat(1.0)
+        
+        for (item_a_id, item_b_id, a_won), weight in zip(outcomes, weights):
+            a = state.get(item_a_id)
+            b = state.get(item_b_id)
+            if a is None or b is None:
+                continue
+            delta = self.k_factor * weight * ((1.0 if a_won else 0.0) - self.expected_score(a[0], b[0]))
+            a[0] += delta
+            b[0] -= delta
+            a[1] += 1
+            b[1] += 1
+        
+        return {item_id: (rating, count) for item_id, (rating, count) in state.items()}
@@ -1,10 +1,17 @@
 """Logic for selecting pairs for users to vote on."""
 
+import math
 import random
 from typing import List, Optional, Tuple, Set
 
 from storage.models import RankedItem
 
+# Rating uncertainty for top-k pruning: a new item could be off by about 350
+# points (Glicko's starting deviation), shrinking with 1/sqrt(comparisons).
+# The floor reflects that Elo ratings keep drifting even when settled.
+INITIAL_UNCERTAINTY = 350.0
+MIN_UNCERTAINTY = 50.0
+
 
 class PairSelector:
     """Selects pairs of items for users to compare."""
@@ -54,6 +61,78 @@ class PairSelector:
         
         return (selected[0], selected[1])
     
+    @staticmethod
+    def get_next_pairs(items: List[RankedItem], voted_pairs: Set[Tuple[str, str]],
+                       count: int) -> List[Tuple[RankedItem, RankedItem]]:
+        """
+        Get up to `count` distinct pairs for a user to vote on in one batch.
+        
+        Same strategy as get_next_pair, applied repeatedly: each pick is one of
+        the 3 closest remaining unvoted pairs.
+        
+        Args:
+            items: List of all items
+            voted_pairs: Set of (id_a, id_b) tuples the user has already voted on
+            count: Maximum number of pairs to return
+            
+        Returns:
+            List of (RankedItem, RankedItem) tuples, empty if no pairs remain
+        """
+        if len(items) < 2 or count < 1:
+            return []
+        
+        unvoted_pairs = []
+        
+        for i in range(len(items)):
+            for j in range(i + 1, len(items)):
+                p_a, p_b = items[i], items[j]
+                pair_key = tuple(sorted([p_a.id, p_b.id]))
+                
+                if pair_key not in voted_pairs:
+                    unvoted_pairs.append((p_a, p_b, abs(p_a.elo - p_b.elo)))
+        
+        unvoted_pairs.sort(key=lambda x: x[2])
+        
+        selected = []
+        while unvoted_pairs and len(selected) < count:
+            index = random.randrange(min(3, len(unvoted_pairs)))
+            p_a, p_b, _ = unvoted_pairs.pop(index)
+            selected.append((p_a, p_b))
+        
+        return selected
+    
+    @staticmethod
+    def rating_uncertainty(item: RankedItem) -> float:
+        """Rough standard deviation of an item's rating, from how often it was compared."""
+        return max(MIN_UNCERTAINTY, INITIAL_UNCERTAINTY / math.sqrt(1 + item.votes_count))
+    
+    @staticmethod
+    def top_k_contenders(items: List[RankedItem], k: int, z: float = 2.0) -> List[RankedItem]:
+        """
+        Items that could still finish in the top k.
+        
+        An item is out of contention when even its optimistic rating
+        (elo + z * uncertainty) is below the pessimistic rating of the
+        current k-th item. Selecting pairs among the contenders only spends
+        votes where they can change the top of the board.
+        
+        Args:
+            items: List of all items
+            k: Size of the top of the board that matters
+            z: How many standard deviations count as "could still"
+            
+        Returns:
+            The contenders, highest rated first
+        """
+        ranked = sorted(items, key=lambda item: item.elo, reverse=True)
+        if len(ranked) <= k + 1:
+            return ranked
+        
+        kth = ranked[k - 1]
+        threshold = kth.elo - z * PairSelector.rating_uncertainty(kth)
+        return [item for item in ranked
+                if item.elo + z * PairSelector.rating_uncertainty(item) >= threshold]
+    
     @staticmethod
     def get_random_pair(items: List[RankedItem]) -> Optional[Tuple[RankedItem, RankedItem]]:
         """
@@ -1,6 +1,10 @@
 """Storage module initialization."""
 
 from .json_store import JSONStore
-from .models import RankedItem, Vote, UserVotingSession
+from .locking import DataDirLock, Lease
+from .vote_log import VoteLog
+from .win_matrix import WinMatrix
+from .consistency import ConsistencyReport
+from .models import RankedItem, Vote, UserVotingSession, RankingSnapshot
 
-__all__ = ['JSONStore', 'RankedItem', 'Vote', 'UserVotingSession']
+__all__ = ['JSONStore', 'DataDirLock', 'Lease', 'RankedItem', 'Vote', 'UserVotingSession', 'RankingSnapshot', 'VoteLog', 'WinMatrix', 'ConsistencyReport']
@@ -0,0 +1,158 @@
+"""Consistency checks between the data files, and the derived state to repair them with."""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Set, Tuple
+
+from .models import UserVotingSession
+from .vote_log import VoteLog
+
+# Examples kept per kind of problem (the counts are always complete)
+_MAX_EXAMPLES = 3
+
+# Problem kinds, in report order
+PROBLEMS = {
+    'duplicate_item': "items listed more than once",
+    'votes_count': "items whose votes_count doesn't match the votes",
+    'vote_missing_item': "votes for items that don't exist",
+    'self_vote': "votes comparing an item with itself",
+    'user_votes_missing_item': "user_votes pairs with a deleted item",
+    'user_votes_without_vote': "user_votes pairs with no vote behind them",
+    'vote_not_in_user_votes': "voted pairs missing from user_votes (the user would be asked again)",
+    'session_missing_item': "voting sessions offering a deleted item",
+}
+
+
+@dataclass
+class ConsistencyReport:
+    """What a consistency check found (and, after a repair, what it fixed)."""
+    items: int = 0
+    votes: int = 0
+    counts: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    examples: Dict[str, List[str]] = field(default_factory=lambda: defaultdict(list))
+    repaired: bool = False
+    
+    @property
+    def ok(self) -> bool:
+        return not self.counts
+    
+    def add(self, kind: str, example: str):
+        self.counts[kind] += 1
+        if len(self.examples[kind]) < _MAX_EXAMPLES:
+            self.examples[kind].append(example)
+    
+    def summary(self) -> str:
+        """One line per kind of problem, with a few examples."""
+        header = f"{self.items} items, {self.votes} votes: "
+        if self.ok:
+            return header + "consistent"
+        lines = [header + f"{sum(self.counts.values())} problems" + (" (repaired)" if self.repaired else "")]
+        for kind, description in PROBLEMS.items():
+            if kind in self.counts:
+                lines.append(f"  {self.counts[kind]} {description}, e.g. {', '.join(self.examples[kind])}")
+        return "\n".join(lines)
+
+
+@dataclass
+class DerivedState:
+    """What the check worked out from the vote log, for repairs."""
+    votes_count: Dict[str, int]  # item ID -> votes mentioning it, for every existing item
+    stale_sessions: Set[str]  # user IDs whose session offers a missing item
+
+
+def check_consistency(items: List[dict], log: VoteLog, user_votes: Dict[str, List[List[str]]],
+                      sessions: Iterable[UserVotingSession]) -> Tuple[ConsistencyReport, DerivedState]:
+    """
+    Cross-check the data files against the vote log.
+    
+    The vote log is the source of truth: votes_count and user_votes are
+    derived from it. It's walked once, column by column, so besides the
+    inputs memory goes to one counter per item and one entry per distinct
+    (user, pair) voted on, the same as user_votes itself.
+    
+    Args:
+        items: items.json contents
+        log: Every vote
+        user_votes: user_votes.json contents
+        sessions: Active voting sessions
+        
+    Returns:
+        (report, state to repair with)
+    """
+    report = ConsistencyReport(items=len(items), votes=len(log))
+    
+    item_ids: Set[str] = set()
+    for item in items:
+        if item['id'] in item_ids:
+            report.add('duplicate_item', item['id'])
+        item_ids.add(item['id'])
+    
+    # One pass over the log: per-item counts and each user's pairs, as ordinals
+    log_item_ids = log.item_ids
+    counts = [0] * len(log_item_ids)
+    voted: Set[Tuple[int, int, int]] = set()
+    for user, a, b in zip(log.user, log.item_a, log.item_b):
+        counts[a] += 1
+        if a == b:
+            report.add('self_vote', log_item_ids[a])
+            continue
+        counts[b] += 1
+        voted.add((user, a, b) if a < b else (user, b, a))
+    
+    votes_count = {item_id: 0 for item_id in item_ids}
+    for ordinal, count in enumerate(counts):
+        item_id = log_item_ids[ordinal]
+        if item_id in item_ids:
+            votes_count[item_id] = count
+        else:
+            report.add('vote_missing_item', f"{item_id} ({count} votes)")
+    
+    for item in items:
+        if item.get('votes_count', 0) != votes_count[item['id']]:
+            report.add('votes_count', f"{item['id']} ({item.get('votes_count', 0)}, votes say {votes_count[item['id']]})")
+    
+    # user_votes against the log: drop each listed pair from `voted` as it's
+    # matched, so what's left over was voted on but never recorded
+    user_ordinals = {user_id: ordinal for ordinal, user_id in enumerate(log.user_ids)}
+    item_ordinal = log.item_ordinal
+    for user_id, pairs in user_votes.items():
+        user = user_ordinals.get(user_id, -1)
+        for x, y in pairs:
+            if x not in item_ids or y not in item_ids:
+                report.add('user_votes_missing_item', f"{user_id} {x}/{y}")
+                continue
+            a, b = item_ordinal(x), item_ordinal(y)
+            key = (user, a, b) if a < b else (user, b, a)
+            if key in voted:
+                voted.discard(key)
+            else:
+                report.add('user_votes_without_vote', f"{user_id} {x}/{y}")
+    
+    for user, a, b in voted:
+        pair = (log_item_ids[a], log_item_ids[b])
+        if pair[0] in item_ids and pair[1] in item_ids:
+            report.add('vote_not_in_user_votes', f"{log.user_ids[user]} {pair[0]}/{pair[1]}")
+    
+    stale_sessions = set()
+    for session in sessions:
+        if any(item_id not in item_ids for pair in session.pending_pairs for item_id in pair):
+            report.add('session_missing_item', session.user_id)
+            stale_sessions.add(session.user_id)
+    
+    return report, DerivedState(votes_count, stale_sessions)
+
+
+def user_votes_from_log(log: VoteLog, item_ids: Set[str]) -> Dict[str, List[List[str]]]:
+    """user_votes.json as the log says it should be, oldest vote first, skipping missing items."""
+    user_votes: Dict[str, List[List[str]]] = {}
+    seen: Set[Tuple[int, int, int]] = set()
+    log_item_ids, user_ids = log.item_ids, log.user_ids
+    for user, a, b in zip(log.user, log.item_a, log.item_b):
+        key = (user, a, b) if a < b else (user, b, a)
+        if a == b or key in seen:
+            continue
+        seen.add(key)
+        pair = sorted((log_item_ids[a], log_item_ids[b]))
+        if pair[0] in item_ids and pair[1] in item_ids:
+            user_votes.setdefault(user_ids[user], []).append(pair)
+    return user_votes
@@ -0,0 +1,103 @@
+"""fsync policy for JSONStore writes."""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DURABILITY_MODES = ('strict', 'batched', 'relaxed')
+
+
+class SyncPolicy:
+    """
+    When data files written by atomic rename get fsynced.
+    
+    - strict: each temp file is fsynced before its rename, and the directory
+      once per commit (the outermost exclusive hold). A commit that returned
+      survives power loss.
+    - batched: renames are not waited on; renamed files and the directory are
+      fsynced together at most every `interval` seconds (group commit), by
+      the next commit or a timer. Up to `interval` of commits can be lost, and
+      a file renamed in that window may come back empty.
+    - relaxed: no fsync; the OS writes back when it likes (typically within
+      30 seconds on Linux) with the same risks for that whole window.
+    """
+    
+    def __init__(self, directory: Path, mode: str = 'relaxed', interval: float = 0.1):
+        if mode not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode {mode!r} (expected one of {', '.join(DURABILITY_MODES)})")
+        self.directory = Path(directory)
+        self.mode = mode
+        self.interval = interval
+        self._pending: Set[Path] = set()
+        self._pending_lock = threading.Lock()
+        self._last_sync = time.monotonic()
+        self._timer: Optional[threading.Timer] = None
+    
+    def before_rename(self, f):
+        """Called with the open temp file once its contents are written."""
+        if self.mode == 'strict':
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def after_rename(self, path: Path):
+        """Called once a data file has been replaced."""
+        if self.mode != 'relaxed':
+            with self._pending_lock:
+                self._pending.add(path)
+    
+    def commit(self):
+        """Called when the outermost write transaction ends."""
+        if self.mode == 'strict':
+            self.sync()
+        elif self.mode == 'batched':
+            due = self._last_sync + self.interval - time.monotonic()
+            if due <= 0:
+                self.sync()
+            elif self._timer is None:
+                self._timer = threading.Timer(due, self._sync_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+    
+    def sync(self):
+        """fsync every pending file (batched mode) and the directory."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, set()
+            self._last_sync = time.monotonic()
+        if not pending:
+            return
+        
+        if self.mode == 'batched':
+            for path in pending:
+                try:
+                    fd = os.open(path, os.O_RDONLY)
+                except FileNotFoundError:
+                    continue
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+        
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    
+    def _sync_from_timer(self):
+        self._timer = None
+        try:
+            self.sync()
+        except OSError as e:
+            logger.error(f"Group commit fsync failed: {e}")
+    
+    def close(self):
+        """Cancel the timer and sync anything still pending."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self.sync()
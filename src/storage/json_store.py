@@ -1,37 +1,136 @@
 """JSON-based storage for the ranking bot."""
 
+import functools
 import json
 import os
-from typing import List, Dict, Optional, Set, Tuple
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Optional, Set, Tuple, Union
 from pathlib import Path
 from datetime import datetime
 import uuid
-import asyncio
+from collections import OrderedDict
 
-from .models import RankedItem, Vote, UserVotingSession
+from metrics import STORE_BYTES_READ, STORE_BYTES_WRITTEN, timed_store_op
+from .locking import DataDirLock
+from .models import RankedItem, Vote, UserVotingSession, RankingSnapshot
+from .name_index import NameIndex
+from .vote_log import VoteLog
+from .win_matrix import WinMatrix
+from .consistency import ConsistencyReport, check_consistency, user_votes_from_log
+from .time_views import WindowedCounts, DecayedCounts
+from .sessions import SessionManager
+from .durability import SyncPolicy
+
+# Windowed/decayed views kept up to date at once; each is updated on every
+# vote, and `reveal` takes any duration, so the least recently read go
+_MAX_TIME_VIEWS = 4
+
+
+def _reader(func):
+    """Run a JSONStore method under the shared data directory lock."""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self._lock.hold(exclusive=False):
+            return func(self, *args, **kwargs)
+    return wrapper
+
+
+def _writer(func):
+    """Run a JSONStore method under the exclusive data directory lock."""
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        with self._exclusive():
+            return func(self, *args, **kwargs)
+    return wrapper
 
 
 class JSONStore:
-    """Simple JSON file-based storage."""
+    """
+    Simple JSON file-based storage.
+    
+    Several processes (the bot, manage.py, read-only tools) can share one
+    data directory: every method runs under an fcntl lock on data/.lock, and
+    parsed files are cached until another writer bumps their version.
+    
+    After each committed write to items or votes, a new RankingSnapshot is
+    published; ranking_snapshot() hands it out without taking the lock.
+    
+    Voting sessions live in memory and reach sessions.json only through
+    flush_sessions(), which layers them over whatever another process (an
+    admin tool) wrote there in the meantime.
     
-    def __init__(self, data_dir: str = "./data"):
+    `durability` ("strict", "batched" or "relaxed") picks the fsync policy;
+    see SyncPolicy.
+    """
+    
+    def __init__(self, data_dir: str = "./data", session_ttl: float = 24 * 3600,
+                 durability: str = "strict", fsync_interval: float = 0.1):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
+        self.session_ttl = session_ttl
+        self._sync_policy = SyncPolicy(self.data_dir, durability, fsync_interval)
         
         self.items_file = self.data_dir / "items.json"
         self.votes_file = self.data_dir / "votes.json"
         self.user_votes_file = self.data_dir / "user_votes.json"
         self.sessions_file = self.data_dir / "sessions.json"
+        self.sync_state_file = self.data_dir / "sync_state.json"
+        self.ranking_file = self.data_dir / "ranking.json"
+        
+        # Lock shared with other processes using this data directory
+        self._lock = DataDirLock(self.data_dir / ".lock")
+        
+        # Parsed file contents: file name -> (version, data)
+        self._cache: Dict[str, Tuple[Tuple, any]] = {}
+        
+        # Latest published ranking, replaced (never modified) after writes;
+        # built on first use rather than on startup
+        self._snapshot: Optional[RankingSnapshot] = None
+        self._snapshot_stale = False
+        
+        # Columnar vote history: (votes.json version, log), extended in place by our own writes
+        self._vote_log: Optional[Tuple[Tuple, VoteLog]] = None
+        
+        # Head-to-head counts, same scheme (rebuilt after resets and merges)
+        self._win_matrix: Optional[Tuple[Tuple, WinMatrix]] = None
+        
+        # Windowed/decayed counts, same scheme: (kind, seconds) -> (version, view),
+        # least recently read first
+        self._time_views: "OrderedDict[Tuple[str, float], Tuple[Tuple, Union[WindowedCounts, DecayedCounts]]]" = OrderedDict()
         
-        # Locks to prevent concurrent file access
-        self._items_lock = asyncio.Lock()
-        self._votes_lock = asyncio.Lock()
-        self._user_votes_lock = asyncio.Lock()
-        self._sessions_lock = asyncio.Lock()
+        # Trigram index of item names: (items.json version, index), same scheme
+        self._name_index: Optional[Tuple[Tuple, NameIndex]] = None
+        
+        # Voting sessions, loaded from sessions.json on first use, and the
+        # sessions.json write version they were last loaded from or saved as
+        self._session_manager: Optional[SessionManager] = None
+        self._sessions_version: Optional[Tuple[str, int]] = None
         
         # Initialize files if they don't exist
         self._initialize_files()
     
+    def transaction(self):
+        """
+        Hold the exclusive lock across several store calls.
+        
+        Use for read-compute-write sequences (e.g. read ratings, apply a
+        vote, write ratings) that must not interleave with other processes.
+        """
+        return self._exclusive()
+    
+    @contextmanager
+    def _exclusive(self):
+        """Exclusive lock; publishes a new snapshot when the outermost hold commits."""
+        outermost = not self._lock.held
+        with self._lock.hold(exclusive=True):
+            yield
+            if outermost:
+                self._sync_policy.commit()
+                if self._snapshot_stale:
+                    self._publish_snapshot()
+    
+    @_writer
     def _initialize_files(self):
         """Create empty JSON files if they don't exist."""
         if not self.items_file.exists():
@@ -42,55 +141,264 @@ class JSONStore:
             self._write_json(self.user_votes_file, {})
         if not self.sessions_file.exists():
             self._write_json(self.sessions_file, {})
+        if not self.sync_state_file.exists():
+            self._write_json(self.sync_state_file, {})
+        if not self.ranking_file.exists():
+            self._write_json(self.ranking_file, {})
+    
+    def _file_version(self, file_path: Path) -> Tuple:
+        """
+        Cache key for a data file's contents.
+        
+        The lock file's write counter catches writes by other processes; the
+        stat fields catch hand edits made without the lock.
+        """
+        st = os.stat(file_path)
+        return self._lock.version(file_path.name) + (st.st_ino, st.st_mtime_ns, st.st_size)
     
     def _read_json(self, file_path: Path) -> any:
-        """Read and parse JSON file."""
-        with open(file_path, 'r') as f:
-            return json.load(f)
+        """
+        Read and parse JSON file.
+        
+        While the data directory lock is held, an unchanged file is served
+        from cache. Callers may modify the result in place, but only to
+        write it straight back with _write_json.
+        """
+        name = file_path.name
+        if self._lock.held:
+            version = self._file_version(file_path)
+            cached = self._cache.get(name)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+        
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        STORE_BYTES_READ.inc(len(raw), file=name)
+        data = json.loads(raw)
+        
+        if self._lock.held:
+            self._cache[name] = (version, data)
+        return data
     
     def _write_json(self, file_path: Path, data: any):
         """Write data to JSON file atomically."""
+        raw = json.dumps(data, indent=2).encode()
+        
         # Write to a temporary file first, then rename (atomic operation)
         temp_file = file_path.with_suffix('.tmp')
         try:
-            with open(temp_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            with open(temp_file, 'wb') as f:
+                f.write(raw)
+                self._sync_policy.before_rename(f)
+            STORE_BYTES_WRITTEN.inc(len(raw), file=file_path.name)
             # Atomic rename
             temp_file.replace(file_path)
+            self._sync_policy.after_rename(file_path)
+            self._lock.bump(file_path.name)
+            self._cache[file_path.name] = (self._file_version(file_path), data)
+            if file_path in (self.items_file, self.votes_file):
+                self._snapshot_stale = True
         except Exception as e:
-            # Clean up temp file on error
+            # Clean up temp file on error; the cached copy may have been modified
+            self._cache.pop(file_path.name, None)
             if temp_file.exists():
                 temp_file.unlink()
             raise e
     
     # Item operations
     
+    @timed_store_op
+    @_writer
     def add_item(self, name: str, added_by: str) -> RankedItem:
-        """Add a new item."""
+        """Add a new item (or return the existing one with the same name)."""
+        added, existing = self.add_items([name], added_by)
+        return (added or existing)[0]
+    
+    @timed_store_op
+    @_writer
+    def add_items(self, names: List[str], added_by: str) -> Tuple[List[RankedItem], List[RankedItem]]:
+        """
+        Add several items in a single write.
+        
+        Names are deduplicated case-insensitively against existing items and
+        within the batch itself. A name repeated in the batch is only counted
+        once, so it's in neither list the second time.
+        
+        Args:
+            names: Item names to add
+            added_by: User ID who is adding them
+            
+        Returns:
+            Tuple of (newly added items, existing items that matched a name)
+        """
+        index_version = self._file_version(self.items_file)
         items = self._read_json(self.items_file)
         
-        # Check if item with same name already exists
-        for item in items:
-            if item['name'].lower() == name.lower():
-                return RankedItem.from_dict(item)
-        
-        new_item = RankedItem(
-            id=str(uuid.uuid4()),
-            name=name,
-            added_by=added_by,
-            added_at=datetime.now().isoformat()
+        # Name index of existing items
+        by_name = {item['name'].lower(): item for item in items}
+        
+        added = []
+        existing = []
+        seen = set()
+        now = datetime.now().isoformat()
+        
+        for name in names:
+            key = name.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            if key in by_name:
+                match = by_name[key]
+                existing.append(match if isinstance(match, RankedItem) else RankedItem.from_dict(match))
+                continue
+            
+            new_item = RankedItem(
+                id=str(uuid.uuid4()),
+                name=name,
+                added_by=added_by,
+                added_at=now
+            )
+            by_name[key] = new_item
+            added.append(new_item)
+        
+        if added:
+            items.extend(item.to_dict() for item in added)
+            self._write_json(self.items_file, items)
+            
+            # Keep the trigram index current without a rebuild
+            cached = self._name_index
+            if cached is not None and cached[0] == index_version:
+                for item in added:
+                    cached[1].add(item.id, item.name)
+                self._name_index = (self._file_version(self.items_file), cached[1])
+        
+        return added, existing
+    
+    def _get_name_index(self) -> NameIndex:
+        """Trigram index of the current item names. Must hold the lock."""
+        version = self._file_version(self.items_file)
+        cached = self._name_index
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        index = NameIndex()
+        for item in self._read_json(self.items_file):
+            index.add(item['id'], item['name'])
+        self._name_index = (version, index)
+        return index
+    
+    @timed_store_op
+    def find_item_by_name(self, name: str) -> Optional[RankedItem]:
+        """
+        Find an item by name: an exact case-insensitive match, else the only
+        item with the same normalized name ("Matrix, The" for "The Matrix").
+        """
+        with self._lock.hold(exclusive=False):
+            item_id = self._get_name_index().lookup(name)
+            return self.ranking_snapshot().get_item(item_id) if item_id else None
+    
+    @timed_store_op
+    @_reader
+    def find_similar_items(self, name: str, threshold: float = 0.5,
+                           exclude: Set[str] = frozenset()) -> List[Tuple[RankedItem, float]]:
+        """
+        Find items whose names look like near-duplicates of `name`.
+        
+        Catches variants an exact match misses, like "Matrix, The" or
+        "the matrix (1999)" for "The Matrix".
+        
+        Args:
+            name: The name to match
+            threshold: Minimum trigram similarity (0-1)
+            exclude: Item IDs to leave out (e.g. the item itself)
+            
+        Returns:
+            (item, similarity) pairs, most similar first
+        """
+        matches = self._get_name_index().similar(name, threshold, limit=5 + len(exclude))
+        if not matches:
+            return []
+        
+        items = {item['id']: item for item in self._read_json(self.items_file)}
+        return [(RankedItem.from_dict(items[item_id]), score)
+                for item_id, score in matches if item_id not in exclude]
+    
+    @timed_store_op
+    @_writer
+    def merge_items(self, source_id: str, target_id: str) -> int:
+        """
+        Fold one item into another: its votes become the target's, and it's deleted.
+        
+        Votes between the two items are dropped (they compared an item with
+        itself). Sessions offering the source item are cleared. Ratings are
+        left as they were; recompute them from the merged history with
+        set_item_ratings.
+        
+        Args:
+            source_id: Item to remove
+            target_id: Item that takes over its votes
+            
+        Returns:
+            Number of votes moved to the target
+        """
+        items = self._read_json(self.items_file)
+        self._write_json(self.items_file, [item for item in items if item['id'] != source_id])
+        
+        moved = 0
+        merged_votes = []
+        for vote in self._read_json(self.votes_file):
+            ids = {vote['item_a_id'], vote['item_b_id']}
+            if ids == {source_id, target_id}:
+                continue
+            if source_id in ids:
+                vote = {key: (target_id if value == source_id else value) for key, value in vote.items()}
+                moved += 1
+            merged_votes.append(vote)
+        self._write_json(self.votes_file, merged_votes)
+        
+        user_votes = {}
+        for user_id, pairs in self._read_json(self.user_votes_file).items():
+            merged_pairs = []
+            seen = set()
+            for pair in pairs:
+                pair = tuple(sorted(target_id if item_id == source_id else item_id for item_id in pair))
+                if pair[0] != pair[1] and pair not in seen:
+                    seen.add(pair)
+                    merged_pairs.append(list(pair))
+            user_votes[user_id] = merged_pairs
+        self._write_json(self.user_votes_file, user_votes)
+        
+        self._sessions().discard_where(
+            lambda session: any(source_id in pair for pair in session.pending_pairs)
         )
+        self.flush_sessions()
         
-        items.append(new_item.to_dict())
-        self._write_json(self.items_file, items)
+        return moved
+    
+    @timed_store_op
+    @_writer
+    def set_item_ratings(self, ratings: Dict[str, Tuple[float, int]]):
+        """
+        Overwrite Elo ratings and vote counts in a single write.
         
-        return new_item
+        Args:
+            ratings: item_id -> (elo, votes_count); items not listed are left alone
+        """
+        items = self._read_json(self.items_file)
+        for item in items:
+            if item['id'] in ratings:
+                item['elo'], item['votes_count'] = ratings[item['id']]
+        self._write_json(self.items_file, items)
     
+    @timed_store_op
+    @_reader
     def get_all_items(self) -> List[RankedItem]:
         """Get all items."""
         items_data = self._read_json(self.items_file)
         return [RankedItem.from_dict(item) for item in items_data]
     
+    @timed_store_op
+    @_reader
     def get_item_by_id(self, item_id: str) -> Optional[RankedItem]:
         """Get a specific item by ID."""
         items = self.get_all_items()
@@ -99,6 +407,8 @@ class JSONStore:
                 return item
         return None
     
+    @timed_store_op
+    @_writer
     def update_item_elo(self, item_id: str, new_elo: float):
         """Update an item's Elo rating."""
         items = self._read_json(self.items_file)
@@ -111,16 +421,96 @@ class JSONStore:
         
         self._write_json(self.items_file, items)
     
+    @timed_store_op
+    @_writer
+    def update_item_elos(self, updates: List[Tuple[str, float]]):
+        """
+        Apply several Elo updates in a single write.
+        
+        Each (item_id, new_elo) is applied in order exactly like
+        update_item_elo, including bumping votes_count once per update.
+        
+        Args:
+            updates: List of (item_id, new_elo) tuples
+        """
+        if not updates:
+            return
+        
+        items = self._read_json(self.items_file)
+        by_id = {item['id']: item for item in items}
+        
+        for item_id, new_elo in updates:
+            item = by_id.get(item_id)
+            if item is not None:
+                item['elo'] = new_elo
+                item['votes_count'] = item.get('votes_count', 0) + 1
+        
+        self._write_json(self.items_file, items)
+    
+    @timed_store_op
+    @_reader
     def get_items_sorted_by_elo(self) -> List[RankedItem]:
         """Get all items sorted by Elo rating (highest first)."""
         items = self.get_all_items()
         return sorted(items, key=lambda item: item.elo, reverse=True)
     
+    # Ranking snapshots
+    
+    def _snapshot_signature(self) -> Tuple:
+        """
+        Write counters of the files a snapshot is built from, as of now.
+        
+        Every locked write bumps these, so unlike file stats they can't miss
+        a write that reused an inode with the same size and mtime. None if
+        they couldn't be read (the snapshot is then rebuilt).
+        """
+        return self._lock.peek_versions(self.items_file.name, self.votes_file.name)
+    
+    def _publish_snapshot(self) -> RankingSnapshot:
+        """Build a snapshot from the current files. Must hold the lock."""
+        items = sorted((RankedItem.from_dict(item) for item in self._read_json(self.items_file)),
+                       key=lambda item: item.elo, reverse=True)
+        votes = self._read_json(self.votes_file)
+        epoch, items_version = self._lock.version(self.items_file.name)
+        votes_version = self._lock.version(self.votes_file.name)[1]
+        
+        snapshot = RankingSnapshot(
+            version=items_version + votes_version,
+            items=tuple(items),
+            total_votes=len(votes),
+            signature=(epoch, items_version, votes_version),
+            by_id={item.id: item for item in items},
+            ranks={item.id: rank for rank, item in enumerate(items, 1)}
+        )
+        # A single reference swap: readers see either the old or the new snapshot
+        self._snapshot = snapshot
+        self._snapshot_stale = False
+        return snapshot
+    
+    @timed_store_op
+    def ranking_snapshot(self) -> RankingSnapshot:
+        """
+        Latest immutable view of the rankings (sorted items, ratings, counts).
+        
+        Normally just returns the snapshot published by the last write, without
+        locking. If another process has written since, a fresh one is built
+        under the shared lock.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.signature == self._snapshot_signature():
+            return snapshot
+        
+        with self._lock.hold(exclusive=False):
+            return self._publish_snapshot()
+    
     # Vote operations
     
+    @timed_store_op
+    @_writer
     def record_vote(self, user_id: str, item_a_id: str, 
                    item_b_id: str, winner_id: str) -> Vote:
         """Record a pairwise vote."""
+        log_version = self._file_version(self.votes_file)
         votes = self._read_json(self.votes_file)
         
         vote = Vote(
@@ -133,17 +523,146 @@ class JSONStore:
         
         votes.append(vote.to_dict())
         self._write_json(self.votes_file, votes)
+        self._extend_vote_log(log_version, [vote])
         
         # Update user votes tracking
         self._add_user_vote(user_id, item_a_id, item_b_id)
         
         return vote
     
+    @timed_store_op
+    @_writer
+    def record_votes(self, votes: List[Vote]) -> List[Vote]:
+        """
+        Record several votes in a single write per file.
+        
+        Votes for a pair the user has already voted on are skipped, as are
+        repeats within the batch.
+        
+        Args:
+            votes: Votes to record (timestamps are kept as given)
+            
+        Returns:
+            The votes that were recorded
+        """
+        user_votes = self._read_json(self.user_votes_file)
+        voted = {user: {tuple(p) for p in pairs} for user, pairs in user_votes.items()}
+        
+        recorded = []
+        for vote in votes:
+            pair = tuple(sorted([vote.item_a_id, vote.item_b_id]))
+            user_pairs = voted.setdefault(vote.user_id, set())
+            if pair in user_pairs:
+                continue
+            
+            user_pairs.add(pair)
+            user_votes.setdefault(vote.user_id, []).append(list(pair))
+            recorded.append(vote)
+        
+        if not recorded:
+            return recorded
+        
+        log_version = self._file_version(self.votes_file)
+        all_votes = self._read_json(self.votes_file)
+        all_votes.extend(vote.to_dict() for vote in recorded)
+        self._write_json(self.votes_file, all_votes)
+        self._extend_vote_log(log_version, recorded)
+        self._write_json(self.user_votes_file, user_votes)
+        
+        return recorded
+    
+    @timed_store_op
+    @_reader
     def get_all_votes(self) -> List[Vote]:
         """Get all votes."""
         votes_data = self._read_json(self.votes_file)
         return [Vote.from_dict(v) for v in votes_data]
     
+    @timed_store_op
+    @_reader
+    def get_vote_log(self) -> VoteLog:
+        """
+        All votes as a compact columnar VoteLog.
+        
+        Built by streaming votes.json (no list of dicts in between) and kept
+        until another process writes votes; votes recorded through this store
+        are appended to it in place.
+        """
+        version = self._file_version(self.votes_file)
+        cached = self._vote_log
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        log = VoteLog.load(self.votes_file)
+        self._vote_log = (version, log)
+        return log
+    
+    @timed_store_op
+    @_reader
+    def get_win_matrix(self) -> WinMatrix:
+        """
+        Head-to-head win/loss counts for every compared pair.
+        
+        Built from the vote log once, then updated as votes are recorded
+        through this store; rebuilt when votes.json changes any other way
+        (resets, merges, other processes).
+        """
+        version = self._file_version(self.votes_file)
+        cached = self._win_matrix
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        matrix = WinMatrix.from_log(self.get_vote_log())
+        self._win_matrix = (version, matrix)
+        return matrix
+    
+    @timed_store_op
+    @_reader
+    def get_time_view(self, kind: str, seconds: float) -> Union[WindowedCounts, DecayedCounts]:
+        """
+        Win/loss counts over recent votes.
+        
+        Args:
+            kind: "window" for the last `seconds` only, "decay" for every vote
+                  weighted by a half-life of `seconds`
+            seconds: Window length or half-life
+        
+        Built from the vote log once, then updated as votes are recorded
+        through this store (the window drops old votes as it's read). Only
+        the _MAX_TIME_VIEWS most recently read views are kept.
+        """
+        version = self._file_version(self.votes_file)
+        cached = self._time_views.get((kind, seconds))
+        if cached is not None and cached[0] == version:
+            self._time_views.move_to_end((kind, seconds))
+            return cached[1]
+        
+        view_class = {'window': WindowedCounts, 'decay': DecayedCounts}[kind]
+        view = view_class.from_log(self.get_vote_log(), seconds, time.time())
+        self._time_views[(kind, seconds)] = (version, view)
+        self._time_views.move_to_end((kind, seconds))
+        while len(self._time_views) > _MAX_TIME_VIEWS:
+            self._time_views.popitem(last=False)
+        return view
+    
+    def _extend_vote_log(self, version_before: Tuple, votes: List[Vote]):
+        """Apply just-written votes to the cached log, win matrix and time views if they were current before the write."""
+        version_after = None
+        for attr in ('_vote_log', '_win_matrix'):
+            cached = getattr(self, attr)
+            if cached is not None and cached[0] == version_before:
+                cached[1].extend(votes)
+                version_after = version_after or self._file_version(self.votes_file)
+                setattr(self, attr, (version_after, cached[1]))
+        
+        for key, cached in list(self._time_views.items()):
+            if cached[0] == version_before:
+                cached[1].extend(votes)
+                version_after = version_after or self._file_version(self.votes_file)
+                self._time_views[key] = (version_after, cached[1])
+            else:
+                del self._time_views[key]
+    
     # User vote tracking
     
     def _add_user_vote(self, user_id: str, item_a_id: str, item_b_id: str):
@@ -160,6 +679,8 @@ class JSONStore:
         
         self._write_json(self.user_votes_file, user_votes)
     
+    @timed_store_op
+    @_reader
     def get_user_voted_pairs(self, user_id: str) -> Set[Tuple[str, str]]:
         """Get all pairs a user has voted on."""
         user_votes = self._read_json(self.user_votes_file)
@@ -171,38 +692,187 @@ class JSONStore:
     
     # Session management
     
+    def _sessions(self) -> SessionManager:
+        """The session manager, seeded from sessions.json (dropping expired sessions) on first use."""
+        if self._session_manager is None:
+            manager = SessionManager(self.session_ttl)
+            with self._lock.hold(exclusive=False):
+                manager.load(self._read_json(self.sessions_file))
+                self._sessions_version = self._lock.version(self.sessions_file.name)
+            self._session_manager = manager
+        return self._session_manager
+    
+    @timed_store_op
     def save_session(self, session: UserVotingSession):
-        """Save a user's voting session."""
-        sessions = self._read_json(self.sessions_file)
-        sessions[session.user_id] = session.to_dict()
-        self._write_json(self.sessions_file, sessions)
+        """Save a user's voting session (in memory until the next flush_sessions)."""
+        self._sessions().put(session)
     
+    @timed_store_op
     def get_session(self, user_id: str) -> Optional[UserVotingSession]:
-        """Get a user's voting session."""
-        sessions = self._read_json(self.sessions_file)
-        
-        if user_id in sessions:
-            return UserVotingSession.from_dict(sessions[user_id])
-        
-        return None
+        """Get a user's voting session, unless it has been idle longer than the TTL."""
+        return self._sessions().get(user_id)
     
+    @timed_store_op
     def clear_session(self, user_id: str):
         """Clear a user's voting session."""
-        sessions = self._read_json(self.sessions_file)
+        self._sessions().discard(user_id)
+    
+    # Consistency
+    
+    @timed_store_op
+    def check_consistency(self, repair: bool = False) -> ConsistencyReport:
+        """
+        Cross-check items, votes, user_votes and sessions.
+        
+        A vote touches several files in separate writes, so a crash or a hand
+        edit can leave them disagreeing. With `repair`, the state derived from
+        the vote log is rebuilt: votes_count, user_votes (pairs with deleted
+        items dropped) and sessions offering deleted items. Votes and Elo
+        ratings are left alone; `rerank` recomputes ratings from the votes.
         
-        if user_id in sessions:
-            del sessions[user_id]
-            self._write_json(self.sessions_file, sessions)
+        Args:
+            repair: Fix what was found, in one transaction
+            
+        Returns:
+            What was found (before repairing)
+        """
+        with (self._exclusive() if repair else self._lock.hold(exclusive=False)):
+            items = self._read_json(self.items_file)
+            log = self.get_vote_log()
+            sessions = self._sessions()
+            report, derived = check_consistency(items, log, self._read_json(self.user_votes_file), sessions)
+            if not repair or report.ok:
+                return report
+            
+            counts = report.counts
+            if counts.keys() & {'duplicate_item', 'votes_count'}:
+                repaired_items, seen = [], set()
+                for item in items:
+                    if item['id'] not in seen:
+                        seen.add(item['id'])
+                        item['votes_count'] = derived.votes_count[item['id']]
+                        repaired_items.append(item)
+                self._write_json(self.items_file, repaired_items)
+            
+            if counts.keys() & {'user_votes_missing_item', 'user_votes_without_vote', 'vote_not_in_user_votes'}:
+                self._write_json(self.user_votes_file, user_votes_from_log(log, set(derived.votes_count)))
+            
+            if derived.stale_sessions:
+                sessions.discard_where(lambda session: session.user_id in derived.stale_sessions)
+                self.flush_sessions()
+            
+            report.repaired = True
+            return report
+    
+    def warmup(self):
+        """
+        Parse the data files and build the in-memory views the first events need.
+        
+        Everything here would otherwise be built lazily on first use; the bot
+        runs this in a thread while it logs in and syncs so that the first
+        reply doesn't pay for it.
+        """
+        self.ranking_snapshot()
+        self.get_vote_log()
+        self._sessions()
+        with self._lock.hold(exclusive=False):
+            self._read_json(self.user_votes_file)
+            self._get_name_index()
+    
+    def sync(self):
+        """fsync anything a batched group commit hasn't yet (call on shutdown)."""
+        self._sync_policy.close()
+    
+    @timed_store_op
+    @_writer
+    def flush_sessions(self) -> bool:
+        """
+        Expire idle sessions and write the rest to sessions.json if anything changed.
+        
+        If another process rewrote sessions.json since we loaded or last
+        saved it (`manage.py check --repair`, a reset), its version is taken
+        first and only the sessions changed here since go on top, so the
+        flush doesn't undo it.
+        
+        Returns:
+            True if the file was written
+        """
+        manager = self._session_manager
+        if manager is None:
+            return False
+        if self._lock.version(self.sessions_file.name) != self._sessions_version:
+            manager.merge_saved(self._read_json(self.sessions_file))
+            self._sessions_version = self._lock.version(self.sessions_file.name)
+        manager.expire()
+        if not manager.dirty:
+            return False
+        self._write_json(self.sessions_file, manager.to_dict())
+        manager.mark_saved()
+        self._sessions_version = self._lock.version(self.sessions_file.name)
+        return True
+    
+    # Sync state
+    
+    @timed_store_op
+    @_reader
+    def get_sync_state(self) -> Tuple[Optional[str], List[str]]:
+        """
+        Get the persisted sync position.
+        
+        Returns:
+            Tuple of (next_batch token or None, recently processed event IDs)
+        """
+        state = self._read_json(self.sync_state_file)
+        return state.get('next_batch'), state.get('processed_events', [])
+    
+    @timed_store_op
+    @_writer
+    def save_sync_state(self, next_batch: str, processed_events: List[str]):
+        """
+        Persist the sync position so a restart resumes from it.
+        
+        Args:
+            next_batch: The next_batch token from the last handled sync
+            processed_events: Recently processed event IDs (oldest first)
+        """
+        self._write_json(self.sync_state_file, {
+            'next_batch': next_batch,
+            'processed_events': processed_events
+        })
+    
+    # Rating parameters
+    
+    @timed_store_op
+    @_reader
+    def get_ranking_params(self) -> Dict[str, Optional[float]]:
+        """
+        The K-factor and decay half-life chosen by the last `rerank k=... decay=...`.
+        
+        Returns:
+            {'k_factor': ..., 'half_life': ...}, or {} if never reranked
+            (use the configured defaults)
+        """
+        return dict(self._read_json(self.ranking_file))
+    
+    @timed_store_op
+    @_writer
+    def save_ranking_params(self, k_factor: float, half_life: Optional[float]):
+        """Persist the K-factor and decay half-life the ratings were computed with."""
+        self._write_json(self.ranking_file, {'k_factor': k_factor, 'half_life': half_life})
     
     # Reset operations
     
+    @timed_store_op
+    @_writer
     def reset_all(self):
         """Reset everything: delete all items, votes, and user vote history."""
         self._write_json(self.items_file, [])
         self._write_json(self.votes_file, [])
         self._write_json(self.user_votes_file, {})
-        self._write_json(self.sessions_file, {})
+        self._clear_sessions()
     
+    @timed_store_op
+    @_writer
     def reset_rankings(self):
         """Reset all Elo rankings and votes, but keep the items."""
         # Reset all items to default Elo
@@ -215,4 +885,11 @@ class JSONStore:
         # Clear all votes and user vote history
         self._write_json(self.votes_file, [])
         self._write_json(self.user_votes_file, {})
+        self._clear_sessions()
+    
+    def _clear_sessions(self):
         self._write_json(self.sessions_file, {})
+        if self._session_manager is not None:
+            self._session_manager.clear()
+            self._session_manager.mark_saved()
+            self._sessions_version = self._lock.version(self.sessions_file.name)
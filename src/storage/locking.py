@@ -0,0 +1,162 @@
+"""Cross-process coordination for a shared data directory (fcntl advisory locks)."""
+
+import fcntl
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+class DataDirLock:
+    """
+    Reentrant shared/exclusive lock on a data directory.
+    
+    Safe across threads (an RLock) and processes (flock on a lock file). The
+    lock file also holds a write counter per data file, bumped by writers
+    under the exclusive lock, so other processes can tell which files changed
+    without re-reading them.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._owner: Optional[int] = None
+        self._exclusive = False
+        self._versions: Dict[str, int] = {}
+        self._epoch = ""
+    
+    @property
+    def held(self) -> bool:
+        """Whether the current thread holds the lock (shared or exclusive)."""
+        return self._depth > 0 and self._owner == threading.get_ident()
+    
+    @contextmanager
+    def hold(self, exclusive: bool = False):
+        """
+        Hold the lock for the duration of the block.
+        
+        Nested holds are free. A shared hold can't be upgraded to exclusive
+        (two processes upgrading at once would deadlock), so take the
+        exclusive lock up front for anything that may write.
+        
+        Args:
+            exclusive: True for writers, False for readers
+        """
+        with self._thread_lock:
+            if self._depth == 0:
+                fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                self._owner = threading.get_ident()
+                self._exclusive = exclusive
+                self._load_versions()
+            elif exclusive and not self._exclusive:
+                raise RuntimeError("Can't upgrade a shared data directory lock to exclusive")
+            
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._owner = None
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+    
+    def version(self, name: str) -> Tuple[str, int]:
+        """Current write version of a data file (valid while the lock is held)."""
+        return (self._epoch, self._versions.get(name, 0))
+    
+    def peek_versions(self, *names: str) -> Optional[Tuple]:
+        """
+        Write versions of several data files, read from the lock file without locking.
+        
+        For cheap "has anything changed?" checks; a writer may be rewriting
+        the counters at that moment, in which case this returns None.
+        """
+        raw = os.pread(self._fd, 1 << 16, 0)
+        try:
+            state = json.loads(raw)
+        except ValueError:
+            return None
+        if not isinstance(state, dict) or not state.get('epoch'):
+            return None
+        versions = state.get('versions', {})
+        return (state['epoch'],) + tuple(versions.get(name, 0) for name in names)
+    
+    def bump(self, name: str) -> Tuple[str, int]:
+        """Record a write to a data file. Must hold the exclusive lock."""
+        if not (self.held and self._exclusive):
+            raise RuntimeError("Writes require the exclusive data directory lock")
+        
+        self._versions[name] = self._versions.get(name, 0) + 1
+        self._save_versions()
+        return self.version(name)
+    
+    def _load_versions(self):
+        raw = os.pread(self._fd, 1 << 16, 0)
+        try:
+            state = json.loads(raw) if raw else {}
+        except ValueError:
+            state = {}
+        
+        if not state.get('epoch'):
+            # New or damaged lock file: a fresh epoch invalidates every cache
+            state = {'epoch': uuid.uuid4().hex, 'versions': {}}
+            if self._exclusive:
+                self._epoch, self._versions = state['epoch'], state['versions']
+                self._save_versions()
+        
+        self._epoch = state['epoch']
+        self._versions = state.get('versions', {})
+    
+    def _save_versions(self):
+        raw = json.dumps({'epoch': self._epoch, 'versions': self._versions}).encode()
+        os.ftruncate(self._fd, 0)
+        os.pwrite(self._fd, raw, 0)
+    
+    def close(self):
+        os.close(self._fd)
+
+
+class Lease:
+    """
+    Exclusive, non-blocking lease held for a process's lifetime.
+    
+    Used so only one bot instance syncs against a data directory, while
+    admin tools and readers can still use it through DataDirLock.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._fd: Optional[int] = None
+    
+    def acquire(self) -> bool:
+        """Try to take the lease; returns False if another process holds it."""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        
+        # Record who holds it, for humans
+        os.ftruncate(fd, 0)
+        os.pwrite(fd, f"{os.getpid()}\n".encode(), 0)
+        self._fd = fd
+        return True
+    
+    def holder(self) -> Optional[str]:
+        """PID written by the current holder, if any."""
+        try:
+            return self.path.read_text().strip() or None
+        except OSError:
+            return None
+    
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
@@ -1,11 +1,16 @@
-"""Data models for the ranking bot."""
+"""
+Data models for the ranking bot.
 
-from dataclasses import dataclass, asdict
-from typing import Optional
-from datetime import datetime
+Models are slotted (no per-instance __dict__) and intern their IDs, so the
+same item or user ID shared across many votes is stored once.
+"""
 
+import sys
+from dataclasses import dataclass, asdict, field
+from typing import Dict, List, Optional, Tuple
 
-@dataclass
+
+@dataclass(slots=True)
 class RankedItem:
     """An item to be ranked with Elo rating."""
     id: str
@@ -20,10 +25,17 @@ class RankedItem:
     
     @classmethod
     def from_dict(cls, data):
-        return cls(**data)
+        return cls(
+            id=sys.intern(data['id']),
+            name=data['name'],
+            elo=data.get('elo', 1500.0),
+            votes_count=data.get('votes_count', 0),
+            added_by=data.get('added_by'),
+            added_at=data.get('added_at')
+        )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Vote:
     """A pairwise vote record."""
     user_id: str
@@ -33,31 +45,80 @@ class Vote:
     timestamp: str
     
     def to_dict(self):
-        return asdict(self)
+        return {
+            'user_id': self.user_id,
+            'item_a_id': self.item_a_id,
+            'item_b_id': self.item_b_id,
+            'winner_id': self.winner_id,
+            'timestamp': self.timestamp
+        }
     
     @classmethod
     def from_dict(cls, data):
-        return cls(**data)
+        intern = sys.intern
+        return cls(
+            user_id=intern(data['user_id']),
+            item_a_id=intern(data['item_a_id']),
+            item_b_id=intern(data['item_b_id']),
+            winner_id=intern(data['winner_id']),
+            timestamp=data['timestamp']
+        )
 
 
-@dataclass
+@dataclass(slots=True)
 class UserVotingSession:
     """Tracks a user's current voting session in DM."""
     user_id: str
-    current_pair: Optional[tuple[str, str]] = None  # (item_a_id, item_b_id)
+    pending_pairs: List[Tuple[str, str]] = field(default_factory=list)  # (item_a_id, item_b_id) awaiting a vote
+    batch_size: int = 1  # Pairs shown per prompt (1 = one at a time)
+    updated_at: float = 0.0  # Epoch seconds of the last save (for TTL expiry)
+    
+    @property
+    def current_pair(self) -> Optional[Tuple[str, str]]:
+        """The first pending pair (the only one outside batch mode)."""
+        return self.pending_pairs[0] if self.pending_pairs else None
     
     def to_dict(self):
         return {
             'user_id': self.user_id,
-            'current_pair': list(self.current_pair) if self.current_pair else None
+            'pending_pairs': [list(pair) for pair in self.pending_pairs],
+            'batch_size': self.batch_size,
+            'updated_at': self.updated_at
         }
     
     @classmethod
     def from_dict(cls, data):
-        current_pair = data.get('current_pair')
-        if current_pair:
-            current_pair = tuple(current_pair)
+        pending_pairs = data.get('pending_pairs')
+        if pending_pairs is None:
+            # Sessions saved before batch voting held a single current_pair
+            current_pair = data.get('current_pair')
+            pending_pairs = [current_pair] if current_pair else []
         return cls(
             user_id=data['user_id'],
-            current_pair=current_pair
+            pending_pairs=[tuple(pair) for pair in pending_pairs],
+            batch_size=data.get('batch_size', 1),
+            updated_at=data.get('updated_at', 0.0)
         )
+
+
+@dataclass(frozen=True, slots=True)
+class RankingSnapshot:
+    """
+    Immutable view of the rankings as of one committed write.
+    
+    Shared between readers without copying, so the items in it must not be
+    modified.
+    """
+    version: int  # Grows with every committed write to items or votes
+    items: Tuple[RankedItem, ...]  # Sorted by Elo, highest first
+    total_votes: int
+    signature: Tuple = field(default=(), repr=False, compare=False)  # Lock file write counters it was built from
+    by_id: Dict[str, RankedItem] = field(default_factory=dict, repr=False, compare=False)
+    ranks: Dict[str, int] = field(default_factory=dict, repr=False, compare=False)  # item ID -> 1-based rank
+    
+    def get_item(self, item_id: str) -> Optional[RankedItem]:
+        return self.by_id.get(item_id)
+    
+    def rank_of(self, item_id: str) -> Optional[int]:
+        """An item's position in the rankings, starting at 1."""
+        return self.ranks.get(item_id)
@@ -0,0 +1,135 @@
+"""Trigram index over item names for near-duplicate detection."""
+
+import re
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+# Articles moved from the end ("Matrix, The") and dropped from the front
+_ARTICLES = ('the', 'a', 'an')
+
+
+def normalize_name(name: str) -> str:
+    """
+    Reduce a name to a canonical form for similarity matching.
+    
+    "The Matrix", "Matrix, The" and "the matrix (1999)" all become "matrix":
+    accents, punctuation, bracketed asides and leading/trailing articles
+    are dropped, and whitespace is collapsed.
+    """
+    text = unicodedata.normalize('NFKD', name)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    text = re.sub(r'[(\[].*?[)\]]', ' ', text)
+    
+    # "matrix, the" -> "the matrix"
+    match = re.match(rf'^(.*),\s*({"|".join(_ARTICLES)})\s*$', text)
+    if match:
+        text = f"{match.group(2)} {match.group(1)}"
+    
+    words = re.findall(r'\w+', text)
+    if len(words) > 1 and words[0] in _ARTICLES:
+        words = words[1:]
+    return ' '.join(words)
+
+
+def trigrams(normalized: str) -> Set[str]:
+    """Character trigrams of a normalized name, padded so short names still get some."""
+    if not normalized:
+        return set()
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """
+    Inverted index from name trigrams to item IDs.
+    
+    similar() only visits the posting lists of the query's own trigrams, so
+    its cost depends on how many items share trigrams with the name, not on
+    the size of the list. lookup() is a dict lookup.
+    """
+    
+    def __init__(self):
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._grams: Dict[str, Set[str]] = {}
+        self._normalized: Dict[str, str] = {}
+        self._lower: Dict[str, str] = {}
+        
+        # Item IDs by lowercased and by normalized name, in the order added
+        self._by_lower: Dict[str, Dict[str, None]] = defaultdict(dict)
+        self._by_normalized: Dict[str, Dict[str, None]] = defaultdict(dict)
+    
+    def __len__(self) -> int:
+        return len(self._grams)
+    
+    def add(self, item_id: str, name: str):
+        if item_id in self._grams:
+            self.remove(item_id)
+        normalized = normalize_name(name)
+        grams = trigrams(normalized)
+        self._grams[item_id] = grams
+        self._normalized[item_id] = normalized
+        self._lower[item_id] = name.lower()
+        self._by_lower[name.lower()][item_id] = None
+        self._by_normalized[normalized][item_id] = None
+        for gram in grams:
+            self._postings[gram].add(item_id)
+    
+    def remove(self, item_id: str):
+        for gram in self._grams.pop(item_id, ()):
+            posting = self._postings[gram]
+            posting.discard(item_id)
+            if not posting:
+                del self._postings[gram]
+        for by_name, name in ((self._by_normalized, self._normalized.pop(item_id, None)),
+                              (self._by_lower, self._lower.pop(item_id, None))):
+            if name is not None:
+                by_name[name].pop(item_id, None)
+                if not by_name[name]:
+                    del by_name[name]
+    
+    def lookup(self, name: str) -> Optional[str]:
+        """
+        ID of the item called `name`: an exact case-insensitive match, else
+        the only item with the same normalized name ("Matrix, The" for "The Matrix").
+        """
+        exact = self._by_lower.get(name.lower())
+        if exact:
+            return next(iter(exact))
+        matches = self._by_normalized.get(normalize_name(name))
+        return next(iter(matches)) if matches and len(matches) == 1 else None
+    
+    def similar(self, name: str, threshold: float = 0.5, limit: int = 5) -> List[Tuple[str, float]]:
+        """
+        Items whose names look like `name`.
+        
+        Args:
+            name: The name to match
+            threshold: Minimum trigram Jaccard similarity (0-1)
+            limit: Maximum number of matches
+            
+        Returns:
+            (item_id, similarity) pairs, most similar first. Identical
+            normalized names score 1.0.
+        """
+        normalized = normalize_name(name)
+        grams = trigrams(normalized)
+        if not grams:
+            return []
+        
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in grams:
+            for item_id in self._postings.get(gram, ()):
+                shared[item_id] += 1
+        
+        matches = []
+        for item_id, count in shared.items():
+            if self._normalized[item_id] == normalized:
+                score = 1.0
+            else:
+                score = count / (len(grams) + len(self._grams[item_id]) - count)
+            if score >= threshold:
+                matches.append((item_id, score))
+        
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches[:limit]
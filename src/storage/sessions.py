@@ -0,0 +1,132 @@
+"""In-memory voting sessions with TTL expiry."""
+
+import heapq
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .models import UserVotingSession
+
+
+class SessionManager:
+    """
+    Active voting sessions, kept in memory and expired after `ttl` seconds
+    without activity.
+    
+    Expiry times go on a min-heap, so expiring is O(log n) per session that
+    actually expires instead of a scan. Saving a session again pushes a new
+    entry; the old one is recognized as stale when it reaches the top (its
+    timestamp no longer matches) and skipped.
+    
+    Nothing here touches the disk: JSONStore seeds it from sessions.json and
+    writes to_dict() back when `dirty` is set. The users whose sessions
+    changed since then are tracked, so if another process rewrote the file
+    meanwhile its contents can be taken with just those changes on top.
+    """
+    
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.dirty = False
+        self._sessions: Dict[str, UserVotingSession] = {}
+        self._expiry: List[Tuple[float, str, float]] = []  # (expires_at, user_id, updated_at)
+        self._changed: Set[str] = set()  # Users whose session changed since the last save
+    
+    def __len__(self) -> int:
+        return len(self._sessions)
+    
+    def __iter__(self) -> Iterator[UserVotingSession]:
+        return iter(list(self._sessions.values()))
+    
+    def load(self, data: Dict[str, dict], now: Optional[float] = None):
+        """
+        Replace the sessions with those saved in `data`, dropping expired ones.
+        
+        Sessions saved before timestamps were recorded count as updated now.
+        """
+        now = time.time() if now is None else now
+        self._sessions.clear()
+        self._expiry.clear()
+        for user_id, session_data in data.items():
+            session = UserVotingSession.from_dict(session_data)
+            session.updated_at = session.updated_at or now
+            if session.updated_at + self.ttl > now:
+                self._sessions[user_id] = session
+                self._expiry.append((session.updated_at + self.ttl, user_id, session.updated_at))
+        heapq.heapify(self._expiry)
+        self.dirty = len(self._sessions) != len(data)
+    
+    def get(self, user_id: str, now: Optional[float] = None) -> Optional[UserVotingSession]:
+        """A user's session, or None if they have none or it has expired."""
+        self.expire(now)
+        return self._sessions.get(user_id)
+    
+    def put(self, session: UserVotingSession, now: Optional[float] = None):
+        """Save a session and restart its TTL."""
+        session.updated_at = time.time() if now is None else now
+        self._sessions[session.user_id] = session
+        heapq.heappush(self._expiry, (session.updated_at + self.ttl, session.user_id, session.updated_at))
+        self._changed.add(session.user_id)
+        self.dirty = True
+        
+        # Stale heap entries pile up when users keep voting; rebuild now and then
+        if len(self._expiry) > 2 * len(self._sessions) + 64:
+            self._expiry = [(s.updated_at + self.ttl, user_id, s.updated_at)
+                            for user_id, s in self._sessions.items()]
+            heapq.heapify(self._expiry)
+    
+    def discard(self, user_id: str):
+        """Drop a user's session (its heap entry goes stale)."""
+        if self._sessions.pop(user_id, None) is not None:
+            self._changed.add(user_id)
+            self.dirty = True
+    
+    def discard_where(self, predicate: Callable[[UserVotingSession], bool]) -> int:
+        """Drop every session matching `predicate`; returns how many."""
+        matching = [user_id for user_id, session in self._sessions.items() if predicate(session)]
+        for user_id in matching:
+            self.discard(user_id)
+        return len(matching)
+    
+    def clear(self):
+        """Drop every session."""
+        if self._sessions:
+            self.dirty = True
+        self._changed.update(self._sessions)
+        self._sessions.clear()
+        self._expiry.clear()
+    
+    def expire(self, now: Optional[float] = None) -> int:
+        """Drop sessions idle for longer than the TTL; returns how many."""
+        now = time.time() if now is None else now
+        expired = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            _, user_id, updated_at = heapq.heappop(self._expiry)
+            session = self._sessions.get(user_id)
+            if session is not None and session.updated_at == updated_at:
+                del self._sessions[user_id]
+                self._changed.add(user_id)
+                self.dirty = True
+                expired += 1
+        return expired
+    
+    def merge_saved(self, data: Dict[str, dict], now: Optional[float] = None):
+        """
+        Take the sessions in `data` (sessions.json as another process left it),
+        keeping this manager's changes since the last save on top.
+        """
+        ours = {user_id: self._sessions.get(user_id) for user_id in self._changed}
+        self.load(data, now)
+        for user_id, session in ours.items():
+            if session is None:
+                self._sessions.pop(user_id, None)
+            else:
+                self._sessions[user_id] = session
+                heapq.heappush(self._expiry, (session.updated_at + self.ttl, user_id, session.updated_at))
+        self.dirty = self.dirty or bool(ours)
+    
+    def mark_saved(self):
+        """Record that to_dict() has been written."""
+        self.dirty = False
+        self._changed.clear()
+    
+    def to_dict(self) -> Dict[str, dict]:
+        return {user_id: session.to_dict() for user_id, session in self._sessions.items()}
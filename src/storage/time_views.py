@@ -0,0 +1,166 @@
+"""Win/loss counts over a sliding time window or with exponential decay."""
+
+import bisect
+import heapq
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Tuple
+
+from .models import Vote
+
+# Rebase DecayedCounts once its scale factor passes 2**this, long before floats overflow
+_MAX_EXPONENT = 256
+
+
+class WindowedCounts:
+    """
+    Wins and losses from the last `seconds` only.
+    
+    Votes sit in a deque in time order; reading at time `now` first pops the
+    ones that have aged out and subtracts them, so each vote is added and
+    removed once rather than the window being recounted.
+    """
+    
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self._votes: Deque[Tuple[float, str, str]] = deque()
+        self.wins: Dict[str, float] = defaultdict(int)
+        self.losses: Dict[str, float] = defaultdict(int)
+    
+    def __len__(self) -> int:
+        return len(self._votes)
+    
+    def add(self, timestamp: float, winner_id: str, loser_id: str):
+        """Count one vote cast at `timestamp` (epoch seconds)."""
+        if self._votes and timestamp < self._votes[-1][0]:
+            # Out of order; keep the deque sorted so expiry stays a popleft
+            bisect.insort(self._votes, (timestamp, winner_id, loser_id))
+        else:
+            self._votes.append((timestamp, winner_id, loser_id))
+        self.wins[winner_id] += 1
+        self.losses[loser_id] += 1
+    
+    def extend(self, votes: Iterable[Vote]):
+        """Count several votes, sorting the batch once and merging it in if it's out of order (imports)."""
+        batch = sorted(_decode(vote) for vote in votes)
+        if not batch:
+            return
+        if self._votes and batch[0][0] < self._votes[-1][0]:
+            self._votes = deque(heapq.merge(self._votes, batch))
+        else:
+            self._votes.extend(batch)
+        for _, winner_id, loser_id in batch:
+            self.wins[winner_id] += 1
+            self.losses[loser_id] += 1
+    
+    def expire(self, now: float):
+        """Drop votes older than the window."""
+        cutoff = now - self.seconds
+        while self._votes and self._votes[0][0] < cutoff:
+            _, winner_id, loser_id = self._votes.popleft()
+            _decrement(self.wins, winner_id)
+            _decrement(self.losses, loser_id)
+    
+    def counts(self, now: float) -> Dict[str, Tuple[float, float]]:
+        """item_id -> (wins, losses) within the window ending at `now`."""
+        self.expire(now)
+        return {item_id: (self.wins.get(item_id, 0), self.losses.get(item_id, 0))
+                for item_id in self.wins.keys() | self.losses.keys()}
+    
+    @classmethod
+    def from_log(cls, log, seconds: float, now: float) -> 'WindowedCounts':
+        """Build from a VoteLog, touching only votes inside the window."""
+        view = cls(seconds)
+        cutoff = now - seconds
+        item_ids = log.item_ids
+        recent = sorted(
+            (log.timestamp[i], log.item_b[i] if log.b_won[i] else log.item_a[i],
+             log.item_a[i] if log.b_won[i] else log.item_b[i])
+            for i in range(len(log)) if log.timestamp[i] >= cutoff
+        )
+        for timestamp, winner, loser in recent:
+            view.add(timestamp, item_ids[winner], item_ids[loser])
+        return view
+
+
+class DecayedCounts:
+    """
+    Wins and losses where each vote's weight halves every `half_life` seconds.
+    
+    Instead of decaying every count as time passes, a vote at time t is
+    added with weight 2**((t - origin) / half_life) and reads divide by the
+    same factor for `now`. Adding a vote is O(1) and nothing is ever replayed;
+    the origin is moved forward (one pass over the items) when the weights
+    get large.
+    """
+    
+    def __init__(self, half_life: float, origin: float = 0.0):
+        self.half_life = half_life
+        self.origin = origin
+        self.wins: Dict[str, float] = defaultdict(float)
+        self.losses: Dict[str, float] = defaultdict(float)
+    
+    def add(self, timestamp: float, winner_id: str, loser_id: str):
+        """Count one vote cast at `timestamp` (epoch seconds)."""
+        exponent = (timestamp - self.origin) / self.half_life
+        if exponent > _MAX_EXPONENT:
+            self._rebase(timestamp)
+            exponent = 0.0
+        weight = 2.0 ** exponent
+        self.wins[winner_id] += weight
+        self.losses[loser_id] += weight
+    
+    def extend(self, votes: Iterable[Vote]):
+        """Count several votes."""
+        for vote in votes:
+            self.add(*_decode(vote))
+    
+    def _rebase(self, origin: float):
+        scale = 2.0 ** ((self.origin - origin) / self.half_life)
+        for counts in (self.wins, self.losses):
+            for item_id in counts:
+                counts[item_id] *= scale
+        self.origin = origin
+    
+    def counts(self, now: float) -> Dict[str, Tuple[float, float]]:
+        """item_id -> (decayed wins, decayed losses) as of `now`."""
+        scale = 2.0 ** ((self.origin - now) / self.half_life)
+        return {item_id: (self.wins.get(item_id, 0.0) * scale, self.losses.get(item_id, 0.0) * scale)
+                for item_id in self.wins.keys() | self.losses.keys()}
+    
+    @classmethod
+    def from_log(cls, log, half_life: float, now: float) -> 'DecayedCounts':
+        """Build from a VoteLog's columns."""
+        view = cls(half_life, origin=now)
+        item_ids = log.item_ids
+        for a, b, b_won, timestamp in zip(log.item_a, log.item_b, log.b_won, log.timestamp):
+            if b_won:
+                view.add(timestamp, item_ids[b], item_ids[a])
+            else:
+                view.add(timestamp, item_ids[a], item_ids[b])
+        return view
+
+
+def standings(counts: Dict[str, Tuple[float, float]]) -> List[Tuple[str, float, float, float]]:
+    """
+    Rank items by win rate with one win and one loss added, so a 1-0 item
+    doesn't outrank a 20-2 one.
+    
+    Returns:
+        (item_id, score, wins, losses), best first
+    """
+    ranked = [(item_id, (wins + 1) / (wins + losses + 2), wins, losses)
+              for item_id, (wins, losses) in counts.items() if wins + losses > 0]
+    ranked.sort(key=lambda row: (row[1], row[2] + row[3]), reverse=True)
+    return ranked
+
+
+def _decode(vote: Vote) -> Tuple[float, str, str]:
+    loser_id = vote.item_b_id if vote.winner_id == vote.item_a_id else vote.item_a_id
+    return datetime.fromisoformat(vote.timestamp).timestamp(), vote.winner_id, loser_id
+
+
+def _decrement(counts: Dict[str, float], item_id: str):
+    counts[item_id] -= 1
+    if counts[item_id] <= 0:
+        del counts[item_id]
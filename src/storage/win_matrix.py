@@ -0,0 +1,71 @@
+"""Sparse head-to-head win/loss counts between items."""
+
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple
+
+from .models import Vote
+
+
+class WinMatrix:
+    """
+    Pairwise win counts as dicts of dicts: wins[a][b] = times a beat b, and
+    the transpose losses[b][a].
+    
+    Only pairs that were actually compared have entries, so memory grows
+    with distinct compared pairs rather than items squared. Head-to-head
+    lookups are O(1) and an item's opponents are O(its number of opponents).
+    """
+    
+    def __init__(self):
+        self.wins: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.losses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.total_wins: Dict[str, int] = defaultdict(int)
+        self.total_losses: Dict[str, int] = defaultdict(int)
+    
+    def record(self, winner_id: str, loser_id: str):
+        """Count one win."""
+        self.wins[winner_id][loser_id] += 1
+        self.losses[loser_id][winner_id] += 1
+        self.total_wins[winner_id] += 1
+        self.total_losses[loser_id] += 1
+    
+    def extend(self, votes: Iterable[Vote]):
+        """Count several votes."""
+        for vote in votes:
+            loser_id = vote.item_b_id if vote.winner_id == vote.item_a_id else vote.item_a_id
+            self.record(vote.winner_id, loser_id)
+    
+    def head_to_head(self, item_a_id: str, item_b_id: str) -> Tuple[int, int]:
+        """(wins of a over b, wins of b over a)."""
+        a_wins = self.wins.get(item_a_id)
+        b_wins = self.wins.get(item_b_id)
+        return (a_wins.get(item_b_id, 0) if a_wins else 0,
+                b_wins.get(item_a_id, 0) if b_wins else 0)
+    
+    def record_of(self, item_id: str) -> Tuple[int, int]:
+        """(total wins, total losses) of an item."""
+        return self.total_wins.get(item_id, 0), self.total_losses.get(item_id, 0)
+    
+    def opponents(self, item_id: str) -> Dict[str, Tuple[int, int]]:
+        """
+        Every item this one was compared with.
+        
+        Returns:
+            opponent_id -> (wins against it, losses to it)
+        """
+        wins = self.wins.get(item_id, {})
+        losses = self.losses.get(item_id, {})
+        return {opponent: (wins.get(opponent, 0), losses.get(opponent, 0))
+                for opponent in wins.keys() | losses.keys()}
+    
+    @classmethod
+    def from_log(cls, log) -> 'WinMatrix':
+        """Build from a VoteLog's columns (no Vote objects)."""
+        matrix = cls()
+        item_ids = log.item_ids
+        for a, b, b_won in zip(log.item_a, log.item_b, log.b_won):
+            if b_won:
+                matrix.record(item_ids[b], item_ids[a])
+            else:
+                matrix.record(item_ids[a], item_ids[b])
+        return matrix
@@ -0,0 +1,179 @@
+"""Per-event tracing spans and an on-demand profiler."""
+
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import cProfile
+
+logger = logging.getLogger(__name__)
+
+# The trace for the event currently being handled, if any
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """Timing breakdown of handling one event."""
+    
+    def __init__(self, name: str, **attrs):
+        self.name = name
+        self.attrs = dict(attrs)
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        # (stage, offset from start, duration, nesting depth)
+        self.spans: List[Tuple[str, float, float, int]] = []
+        self._depth = 0
+    
+    @property
+    def duration(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+    
+    def format(self) -> str:
+        """Render as a single multi-line log entry."""
+        attrs = " ".join(f"{k}={v}" for k, v in self.attrs.items())
+        lines = [f"{self.name} took {self.duration * 1000:.1f}ms {attrs}".rstrip()]
+        # Spans are recorded as they finish; show them in start order
+        for stage, offset, duration, depth in sorted(self.spans, key=lambda s: (s[1], s[3])):
+            indent = "  " * (depth + 1)
+            lines.append(f"{indent}{stage}: {duration * 1000:.1f}ms (at +{offset * 1000:.1f}ms)")
+        return "\n".join(lines)
+
+
+@contextmanager
+def start_trace(name: str, slow_threshold_ms: Optional[float] = None, **attrs):
+    """
+    Trace everything handled inside this block.
+    
+    Args:
+        name: What is being traced (e.g. "event")
+        slow_threshold_ms: Log the full breakdown if the block takes longer than this
+        **attrs: Attributes to include in the log line (event ID, room, ...)
+    """
+    trace = Trace(name, **attrs)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        trace.end = time.perf_counter()
+        _current_trace.reset(token)
+        if slow_threshold_ms is not None and trace.duration * 1000 >= slow_threshold_ms:
+            logger.warning(f"Slow {trace.format()}")
+
+
+@contextmanager
+def span(stage: str):
+    """Time a stage of the current trace (no-op when nothing is being traced)."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    
+    start = time.perf_counter()
+    depth = trace._depth
+    trace._depth += 1
+    try:
+        yield
+    finally:
+        trace._depth -= 1
+        trace.spans.append((stage, start - trace.start, time.perf_counter() - start, depth))
+
+
+def annotate(**attrs):
+    """Attach attributes to the current trace, if any."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attrs.update(attrs)
+
+
+class Profiler:
+    """cProfile the next N events on demand and dump a .pstats file."""
+    
+    def __init__(self, output_dir: str):
+        self.output_dir = Path(output_dir)
+        self._profile: Optional["cProfile.Profile"] = None
+        self._remaining = 0
+    
+    @property
+    def active(self) -> bool:
+        return self._profile is not None
+    
+    def arm(self, num_events: int) -> bool:
+        """
+        Profile the next num_events events.
+        
+        Returns:
+            False if a profile is already in progress
+        """
+        if self.active:
+            return False
+        import cProfile
+        self._profile = cProfile.Profile()
+        self._remaining = num_events
+        logger.info(f"Profiling the next {num_events} events")
+        return True
+    
+    @contextmanager
+    def profile_event(self):
+        """Profile handling of one event if armed."""
+        profile = self._profile
+        if profile is None:
+            yield
+            return
+        
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self._remaining -= 1
+            if self._remaining <= 0:
+                self._finish()
+    
+    def _finish(self):
+        profile, self._profile = self._profile, None
+        path = self.output_dir / f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.pstats"
+        profile.dump_stats(str(path))
+        logger.info(f"Wrote profile to {path} (inspect with: python -m pstats {path})")
+
+
+class StartupTimer:
+    """Wall-clock time of each startup phase, reported by `bot.py --measure-startup`."""
+    
+    def __init__(self, started: Optional[float] = None):
+        self.started = time.perf_counter() if started is None else started
+        # (name, offset from start, duration), in the order phases finished
+        self.phases: List[Tuple[str, float, float]] = []
+    
+    def record(self, name: str, start: float, end: Optional[float] = None):
+        """Record a phase that ran from perf_counter() `start` to `end` (default: now)."""
+        end = time.perf_counter() if end is None else end
+        self.phases.append((name, start - self.started, end - start))
+    
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as one phase."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+    
+    def report(self) -> str:
+        """
+        Table of phases by start time.
+        
+        Phases that ran concurrently (the store warmup) overlap, so the
+        durations can add up to more than the total.
+        """
+        total = time.perf_counter() - self.started
+        lines = [f"{'phase':<20} {'start ms':>9} {'ms':>9}"]
+        for name, offset, duration in sorted(self.phases, key=lambda phase: phase[1]):
+            lines.append(f"{name:<20} {offset * 1000:>9.1f} {duration * 1000:>9.1f}")
+        lines.append(f"{'total':<20} {'':>9} {total * 1000:>9.1f}")
+        return "\n".join(lines)
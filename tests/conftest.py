@@ -0,0 +1,87 @@
+"""Shared fixtures: the real bot against the in-process fake homeserver."""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+for path in (ROOT, ROOT / "src"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from benchmarks.fake_homeserver import FakeHomeserver  # noqa: E402
+from config import Config  # noqa: E402
+
+
+class BotHarness:
+    """A fake homeserver plus RankingBot instances started and stopped on it."""
+    
+    def __init__(self, data_dir: Path):
+        self.data_dir = data_dir
+        self.hs: Optional[FakeHomeserver] = None
+        self.bot_id: Optional[str] = None
+        self.bot = None
+        self._task: Optional[asyncio.Task] = None
+    
+    async def start_homeserver(self):
+        self.hs = FakeHomeserver()
+        url = await self.hs.start()
+        self.bot_id = self.hs.register("rankbot", "botpass")
+        Config.HOMESERVER = url
+        Config.USER_ID = self.bot_id
+    
+    async def start_bot(self, timeout: float = 10.0):
+        """Run a bot until it's ready to handle events."""
+        from bot import RankingBot
+        
+        self.bot = RankingBot()
+        self._task = asyncio.create_task(self.bot.run())
+        deadline = time.monotonic() + timeout
+        while not self.bot.ready:
+            if self._task.done() or time.monotonic() > deadline:
+                raise RuntimeError("Bot failed to start against the fake homeserver")
+            await asyncio.sleep(0.02)
+    
+    async def stop_bot(self):
+        """Shut the bot down as on SIGTERM."""
+        self.bot.request_shutdown()
+        await self._task
+    
+    async def close(self):
+        if self._task and not self._task.done():
+            await self.stop_bot()
+        if self.hs:
+            await self.hs.stop()
+    
+    async def next_reply(self, queue: asyncio.Queue, timeout: float = 5.0) -> Dict:
+        """The next event the bot sends to a subscribed room."""
+        deadline = time.monotonic() + timeout
+        while True:
+            event = await asyncio.wait_for(queue.get(), deadline - time.monotonic())
+            if event["sender"] == self.bot_id:
+                return event
+
+
+@pytest.fixture
+def harness(tmp_path, monkeypatch):
+    """Bot configuration pointed at a fresh data directory (Config is read at import)."""
+    data_dir = tmp_path / "data"
+    settings = {
+        "PASSWORD": "botpass",
+        "ACCESS_TOKEN": None,
+        "DISPLAY_NAME": None,
+        "ALLOWED_USERS": "",
+        "DATA_DIR": str(data_dir),
+        "STORE_DIR": str(data_dir / "store"),
+        "METRICS_PORT": "",
+        "CHECK_ON_STARTUP": "off",
+    }
+    for name in ("HOMESERVER", "USER_ID"):
+        monkeypatch.setattr(Config, name, getattr(Config, name))
+    for name, value in settings.items():
+        monkeypatch.setattr(Config, name, value)
+    return BotHarness(data_dir)
@@ -0,0 +1,18 @@
+"""Adding items."""
+
+from commands.add import AddCommand
+from storage import JSONStore
+
+
+def test_repeat_within_batch_not_reported_as_existing(tmp_path):
+    store = JSONStore(str(tmp_path))
+    store.add_items(["Heat"], "@admin:localhost")
+    
+    added, existing = store.add_items(["Alien", "heat", "alien", "Heat"], "@admin:localhost")
+    assert [item.name for item in added] == ["Alien"]
+    assert [item.name for item in existing] == ["Heat"]
+    
+    reply = AddCommand(store).execute(["Ran", "Brazil", "ran"], "@admin:localhost")
+    assert "Already in the list" not in reply
+    assert "Listed more than once: ran" in reply
+    assert len(store.get_all_items()) == 4
@@ -0,0 +1,27 @@
+"""Per-user and per-room rate limits."""
+
+from handlers.admission import AdmissionController
+
+
+def test_dm_votes_only_count_against_the_room():
+    admission = AdmissionController(user_rate=0.5, user_burst=10, room_rate=2.0, room_burst=30)
+    
+    # A voter answering a pair a second is never shed in their DM
+    for second in range(120):
+        assert admission.admit("@voter:localhost", "!dm:localhost", now=float(second), per_user=False) is None
+    
+    # The same pace of commands runs out of the sender's bucket
+    shed = [admission.admit("@spammer:localhost", "!room:localhost", now=float(second)) for second in range(20)]
+    assert shed[:10] == [None] * 10 and "user" in shed
+
+
+def test_dm_votes_still_limited_by_the_room():
+    admission = AdmissionController(user_rate=0.5, user_burst=10, room_rate=1.0, room_burst=5)
+    
+    # Five at once fit the room's burst; the sixth is shed by the room, not the user
+    results = [admission.admit("@voter:localhost", "!dm:localhost", now=0.0, per_user=False) for _ in range(6)]
+    assert results == [None] * 5 + ["room"]
+    
+    # and the voter's own bucket was never drawn from
+    assert "@voter:localhost" not in admission._users
+    assert admission.admit("@voter:localhost", "!dm:localhost", now=1.0, per_user=False) is None
@@ -0,0 +1,99 @@
+"""DM voting flow."""
+
+import asyncio
+import time
+
+from handlers.dm import DMHandler
+from ranking import EloRanking
+from storage import JSONStore
+
+USER = "@voter:localhost"
+ROOM = "!dm:localhost"
+
+
+class RecordingClient:
+    """Stands in for AsyncClient: keeps what would have been sent."""
+    
+    def __init__(self):
+        self.sent = []
+    
+    async def room_send(self, room_id, message_type, content):
+        self.sent.append(content["body"])
+        return object()
+
+
+def test_speculative_pair_skipped_if_already_voted(tmp_path):
+    """A pair precomputed while the user decided isn't offered if they voted on it meanwhile."""
+    async def scenario():
+        store = JSONStore(str(tmp_path / "data"))
+        items, _ = store.add_items(["Alien", "Heat", "Ran"], USER)
+        dm = DMHandler(RecordingClient(), store, EloRanking())
+        
+        await dm.handle_dm(ROOM, USER, "hi")
+        await asyncio.gather(*dm._speculation_tasks)
+        current = tuple(sorted(store.get_session(USER).current_pair))
+        _, speculated = dm._speculative[USER]
+        
+        # e.g. answered in a batch from another session in the meantime
+        store.record_vote(USER, speculated[0], speculated[1], speculated[0])
+        
+        await dm.handle_dm(ROOM, USER, "1")
+        offered = tuple(sorted(store.get_session(USER).current_pair))
+        assert offered not in {current, tuple(sorted(speculated))}
+        dm.close()
+    
+    asyncio.run(scenario())
+
+
+def _slow_selection(dm, delays):
+    """Make each speculative selection sleep (in its worker thread) for the next delay."""
+    select = dm._select_next_ids
+    delays = list(delays)
+    
+    def slow(user_id, pending):
+        time.sleep(delays.pop(0))
+        return select(user_id, pending)
+    dm._select_next_ids = slow
+
+
+def test_speculation_runs_off_the_loop(tmp_path):
+    """A slow pair selection for the next prompt doesn't stall other events."""
+    async def scenario():
+        store = JSONStore(str(tmp_path / "data"))
+        store.add_items(["Alien", "Heat", "Ran", "Brazil"], USER)
+        dm = DMHandler(RecordingClient(), store, EloRanking())
+        
+        await dm.handle_dm(ROOM, USER, "hi")
+        _slow_selection(dm, [0.5])
+        
+        started = time.monotonic()
+        await asyncio.sleep(0.05)
+        assert time.monotonic() - started < 0.3
+        
+        await asyncio.gather(*dm._speculation_tasks)
+        assert USER in dm._speculative
+        dm.close()
+    
+    asyncio.run(scenario())
+
+
+def test_stale_speculation_discarded(tmp_path):
+    """A speculation finishing after the user already answered isn't kept."""
+    async def scenario():
+        store = JSONStore(str(tmp_path / "data"))
+        store.add_items(["Alien", "Heat", "Ran", "Brazil"], USER)
+        dm = DMHandler(RecordingClient(), store, EloRanking())
+        
+        await dm.handle_dm(ROOM, USER, "hi")
+        _slow_selection(dm, [0.5, 0.05])
+        await asyncio.sleep(0)
+        
+        # Answered before the first speculation is done
+        await dm.handle_dm(ROOM, USER, "1")
+        await asyncio.gather(*dm._speculation_tasks)
+        
+        current = tuple(sorted(store.get_session(USER).current_pair))
+        assert dm._speculative[USER][0] == current
+        dm.close()
+    
+    asyncio.run(scenario())
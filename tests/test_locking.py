@@ -0,0 +1,11 @@
+"""Several processes writing one data directory."""
+
+from benchmarks.multiprocess_stress import stress
+
+
+def test_concurrent_writers_lose_no_votes(tmp_path):
+    result = stress(str(tmp_path / "data"), num_items=20, num_writers=4, num_votes=25, num_readers=2)
+    
+    assert result["failed"] == []
+    assert result["votes"] == result["expected_votes"] == 100
+    assert result["votes_count"] == result["expected_votes_count"] == 200
@@ -0,0 +1,31 @@
+"""Offline import/export tool."""
+
+import json
+
+import manage
+from storage import JSONStore
+
+
+def test_import_votes_skips_bad_timestamps(tmp_path, capsys):
+    store = JSONStore(str(tmp_path / "data"))
+    store.add_items(["Alien", "Heat"], "@admin:localhost")
+    
+    path = tmp_path / "votes.jsonl"
+    rows = [
+        {"user_id": "@a:localhost", "item_a": "Alien", "item_b": "Heat", "winner": "Alien",
+         "timestamp": "2024-01-02T03:04:05"},
+        {"user_id": "@b:localhost", "item_a": "Alien", "item_b": "Heat", "winner": "Heat",
+         "timestamp": "01/02/2024"},
+        {"user_id": "@c:localhost", "item_a": "Alien", "item_b": "Heat", "winner": "Heat",
+         "timestamp": "2024-01-02 03:04:05+00:00"},
+    ]
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+    
+    manage.import_votes(store, str(path), "jsonl", k_factor=32.0)
+    assert "1 unresolvable rows skipped" in capsys.readouterr().err
+    
+    votes = store.get_all_votes()
+    assert [vote.user_id for vote in votes] == ["@a:localhost", "@c:localhost"]
+    assert votes[1].timestamp == "2024-01-02T03:04:05+00:00"
+    assert len(store.get_vote_log()) == 2
+    assert store.check_consistency().ok
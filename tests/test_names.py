@@ -0,0 +1,30 @@
+"""Looking items up by name."""
+
+from commands.stats import StatsCommand
+from ranking import EloRanking
+from storage import JSONStore
+
+
+def test_find_item_by_name(tmp_path):
+    store = JSONStore(str(tmp_path / "data"))
+    (matrix, heat, pizza, pizza2), _ = store.add_items(
+        ["The Matrix", "Heat", "Pizza (NY)", "Pizza (Chicago)"], "@admin:localhost")
+    
+    assert store.find_item_by_name("the matrix").id == matrix.id
+    assert store.find_item_by_name("Matrix, The").id == matrix.id
+    assert store.find_item_by_name("pizza (ny)").id == pizza.id
+    assert store.find_item_by_name("Pizza") is None  # two items normalize to "pizza"
+    assert store.find_item_by_name("Alien") is None
+    
+    store.merge_items(pizza2.id, pizza.id)
+    assert store.find_item_by_name("Pizza").id == pizza.id
+    assert store.find_item_by_name("Pizza (Chicago)").id == pizza.id  # normalizes like the survivor
+
+
+def test_vs_splits_multiword_names(tmp_path):
+    store = JSONStore(str(tmp_path / "data"))
+    (matrix, heat), _ = store.add_items(["The Matrix", "Heat"], "@admin:localhost")
+    stats = StatsCommand(store, EloRanking())
+    
+    item_a, item_b = stats._split_pair("The Matrix Heat")
+    assert (item_a.id, item_b.id) == (matrix.id, heat.id)
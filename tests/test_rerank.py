@@ -0,0 +1,52 @@
+"""Recomputing ratings with new parameters."""
+
+import asyncio
+
+from bot import RankingBot
+from commands.merge import MergeCommand
+from commands.rerank import RerankCommand
+from config import Config
+from ranking import EloRanking
+from storage import JSONStore
+from storage.models import Vote
+
+
+def test_rerank_params_survive_restart(harness):
+    store = JSONStore(str(harness.data_dir))
+    items, _ = store.add_items(["Alien", "Heat"], "@admin:localhost")
+    store.record_votes([Vote(user_id="@a:localhost", item_a_id=items[0].id, item_b_id=items[1].id,
+                             winner_id=items[0].id, timestamp="2024-01-02T03:04:05")])
+    
+    elo = EloRanking(k_factor=32.0)
+    asyncio.run(RerankCommand(store, elo).recompute(16.0, 86400.0))
+    assert (elo.k_factor, elo.half_life) == (16.0, 86400.0)
+    
+    # A restarted bot picks them up instead of ELO_K_FACTOR
+    Config.USER_ID = "@rankbot:localhost"
+    bot = RankingBot()
+    assert (bot.elo.k_factor, bot.elo.half_life) == (16.0, 86400.0)
+
+
+def test_merge_replays_with_live_params(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "ADMIN_USERS", "@admin:localhost")
+    store = JSONStore(str(tmp_path))
+    items, _ = store.add_items(["Alien", "Heat", "Heat (1995)"], "@admin:localhost")
+    alien, heat, duplicate = (item.id for item in items)
+    store.record_votes([
+        Vote(user_id="@a:localhost", item_a_id=alien, item_b_id=heat, winner_id=heat,
+             timestamp="2024-01-02T03:04:05"),
+        Vote(user_id="@b:localhost", item_a_id=alien, item_b_id=duplicate, winner_id=duplicate,
+             timestamp="2024-01-03T03:04:05"),
+    ])
+    
+    elo = EloRanking(k_factor=16.0)
+    reply = asyncio.run(MergeCommand(store, elo, RerankCommand(store, elo)).execute(
+        "Heat (1995)", "Heat", "@admin:localhost"
+    ))
+    assert "1 vote moved" in reply
+    
+    # Both votes now count for Heat, at the live K rather than ELO_K_FACTOR
+    expected = EloRanking(k_factor=16.0).replay(
+        [(alien, heat, False), (alien, heat, False)], [alien, heat]
+    )
+    assert {item.id: (item.elo, item.votes_count) for item in store.get_all_items()} == expected
@@ -0,0 +1,72 @@
+"""Revealing rankings."""
+
+import asyncio
+import dataclasses
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from commands.reveal import RevealCommand
+from config import Config
+from storage import JSONStore
+from storage.models import Vote
+
+
+def test_broken_bootstrap_pool_is_replaced(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "BOOTSTRAP_WORKERS", 1)
+    monkeypatch.setattr(Config, "BOOTSTRAP_SAMPLES", 10)
+    store = JSONStore(str(tmp_path))
+    items, _ = store.add_items(["Alien", "Heat"], "@admin:localhost")
+    store.record_votes([Vote(user_id="@a:localhost", item_a_id=items[0].id, item_b_id=items[1].id,
+                             winner_id=items[0].id, timestamp="2024-01-02T03:04:05")])
+    reveal = RevealCommand(store)
+    
+    async def scenario():
+        snapshot = store.ranking_snapshot()
+        await reveal._compute_intervals(snapshot)
+        
+        # A worker dying breaks the pool for good
+        broken = reveal._pool
+        for process in list(broken._processes.values()):
+            process.kill()
+            process.join()
+        with pytest.raises(BrokenProcessPool):
+            await reveal._compute_intervals(snapshot)
+        assert reveal._pool is None
+        
+        # The next request starts a fresh pool
+        intervals = await reveal._compute_intervals(snapshot)
+        assert set(intervals) == {item.id for item in items}
+        assert reveal._pool is not broken
+    
+    try:
+        asyncio.run(scenario())
+    finally:
+        reveal.close()
+
+
+def test_interval_cache_keyed_by_signature(tmp_path):
+    """Snapshots with the same version sum but different data don't share intervals."""
+    store = JSONStore(str(tmp_path))
+    store.add_items(["Alien", "Heat"], "@admin:localhost")
+    reveal = RevealCommand(store)
+    computed = []
+    
+    async def compute(snapshot):
+        computed.append(snapshot.signature)
+        return {}
+    reveal._compute_intervals = compute
+    
+    async def scenario():
+        snapshot = store.ranking_snapshot()
+        await reveal._rank_intervals(snapshot)
+        await reveal._rank_intervals(snapshot)
+        
+        # e.g. the lock file was recreated and its counters restarted
+        epoch, items_version, votes_version = snapshot.signature
+        other = dataclasses.replace(snapshot, signature=(epoch + "-new", items_version, votes_version))
+        assert other.version == snapshot.version
+        await reveal._rank_intervals(other)
+    
+    asyncio.run(scenario())
+    assert len(computed) == 2
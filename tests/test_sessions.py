@@ -0,0 +1,73 @@
+"""Voting sessions held in memory by the bot and saved to sessions.json."""
+
+import json
+import multiprocessing
+
+import manage
+from storage import JSONStore, UserVotingSession
+
+
+def _session(user_id: str, pair) -> UserVotingSession:
+    return UserVotingSession(user_id=user_id, pending_pairs=[tuple(pair)])
+
+
+def _delete_item_and_repair(data_dir: str, item_id: str):
+    """What an admin might do from another process: hand-delete an item, then `manage.py check --repair`."""
+    store = JSONStore(data_dir)
+    with store.transaction():
+        items = [item for item in store._read_json(store.items_file) if item['id'] != item_id]
+        store._write_json(store.items_file, items)
+    manage.check(store, repair=True)
+
+
+def test_flush_keeps_changes_made_by_another_process(tmp_path):
+    data_dir = str(tmp_path / "data")
+    bot = JSONStore(data_dir)
+    items, _ = bot.add_items(["Alien", "Heat", "Ran"], "@admin:localhost")
+    pair = (items[0].id, items[1].id)
+    for user_id in ("@x:localhost", "@y:localhost"):
+        bot.save_session(_session(user_id, pair))
+    bot.flush_sessions()
+    
+    # Another process (e.g. a repair) drops @x's session
+    other = JSONStore(data_dir)
+    other.clear_session("@x:localhost")
+    assert other.flush_sessions()
+    
+    # The bot's next flush only adds what changed on its side
+    bot.save_session(_session("@z:localhost", (items[1].id, items[2].id)))
+    assert bot.flush_sessions()
+    saved = json.loads((tmp_path / "data" / "sessions.json").read_text())
+    assert set(saved) == {"@y:localhost", "@z:localhost"}
+    assert bot.get_session("@x:localhost") is None
+    
+    # A flush with nothing new on the bot's side still picks up outside writes
+    other.clear_session("@y:localhost")
+    other.flush_sessions()
+    assert not bot.flush_sessions()
+    assert bot.get_session("@y:localhost") is None
+
+
+def test_repair_survives_bot_flush(tmp_path):
+    """A repair run while the bot holds sessions in memory isn't undone by the bot's next flush."""
+    data_dir = str(tmp_path / "data")
+    bot = JSONStore(data_dir)
+    items, _ = bot.add_items(["Alien", "Heat", "Ran"], "@admin:localhost")
+    alien, heat, ran = (item.id for item in items)
+    bot.save_session(_session("@x:localhost", (alien, heat)))
+    bot.save_session(_session("@y:localhost", (heat, ran)))
+    bot.flush_sessions()
+    
+    p = multiprocessing.Process(target=_delete_item_and_repair, args=(data_dir, alien))
+    p.start()
+    p.join()
+    assert p.exitcode == 0
+    
+    # The bot carries on with the session it had in memory for @x unflushed
+    bot.save_session(_session("@w:localhost", (heat, ran)))
+    bot.flush_sessions()
+    
+    saved = json.loads((tmp_path / "data" / "sessions.json").read_text())
+    assert set(saved) == {"@y:localhost", "@w:localhost"}
+    assert bot.get_session("@x:localhost") is None
+    assert JSONStore(data_dir).check_consistency().ok
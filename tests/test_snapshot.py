@@ -0,0 +1,38 @@
+"""Ranking snapshots shared between processes."""
+
+import multiprocessing
+
+from storage import JSONStore
+
+
+def _add_item(data_dir: str, name: str):
+    JSONStore(data_dir).add_item(name, "@other:localhost")
+
+
+def test_snapshot_sees_writes_from_other_processes(tmp_path):
+    data_dir = str(tmp_path / "data")
+    store = JSONStore(data_dir)
+    store.add_items(["Alien", "Heat"], "@admin:localhost")
+    before = store.ranking_snapshot()
+    assert store.ranking_snapshot() is before
+    
+    # Each locked write elsewhere bumps the counters the snapshot was built from
+    for name in ("Ran", "Rio"):
+        p = multiprocessing.Process(target=_add_item, args=(data_dir, name))
+        p.start()
+        p.join()
+        snapshot = store.ranking_snapshot()
+        assert snapshot is not before
+        assert name in {item.name for item in snapshot.items}
+        before = snapshot
+
+
+def test_snapshot_ranks(tmp_path):
+    store = JSONStore(str(tmp_path / "data"))
+    items, _ = store.add_items(["Alien", "Heat", "Ran"], "@admin:localhost")
+    store.update_item_elos([(items[2].id, 1600.0), (items[0].id, 1400.0)])
+    
+    snapshot = store.ranking_snapshot()
+    assert [snapshot.rank_of(item.id) for item in snapshot.items] == [1, 2, 3]
+    assert snapshot.rank_of(items[2].id) == 1 and snapshot.rank_of(items[0].id) == 3
+    assert snapshot.rank_of("missing") is None
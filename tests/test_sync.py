@@ -0,0 +1,99 @@
+"""Sync behaviour against the fake homeserver."""
+
+import asyncio
+import time
+
+from storage import JSONStore
+
+
+def test_dm_recognized_after_resume(harness):
+    """A restarted bot still treats two-member rooms as DMs and answers votes there."""
+    async def scenario():
+        await harness.start_homeserver()
+        try:
+            voter = harness.hs.register("voter")
+            room_id = harness.hs.create_room([voter, harness.bot_id])
+            queue = harness.hs.subscribe(room_id)
+            
+            await harness.start_bot()
+            await harness.stop_bot()
+            
+            # Sent while the bot is down: the resumed sync is incremental
+            await harness.hs.inject_message(room_id, voter, "hi")
+            await harness.start_bot()
+            reply = await harness.next_reply(queue)
+            assert reply["content"]["body"]
+            assert harness.bot.client.rooms[room_id].member_count == 2
+        finally:
+            await harness.close()
+    
+    asyncio.run(scenario())
+
+
+def test_every_sync_uses_uploaded_filter(harness):
+    """The uploaded filter ID goes on every sync, and still lets through what the bot handles."""
+    async def scenario():
+        await harness.start_homeserver()
+        try:
+            voter = harness.hs.register("voter")
+            others = [harness.hs.register(f"member{i}") for i in range(2)]
+            dm_id = harness.hs.create_room([voter, harness.bot_id])
+            room_id = harness.hs.create_room(others + [voter, harness.bot_id])
+            dm_queue = harness.hs.subscribe(dm_id)
+            room_queue = harness.hs.subscribe(room_id)
+            
+            JSONStore(str(harness.data_dir)).add_items(["Alien", "Heat", "Ran"], voter)
+            
+            await harness.start_bot()
+            assert len(harness.hs.filters) == 1
+            filter_id = next(iter(harness.hs.filters))
+            
+            # Events the filter drops shouldn't hide the messages around them
+            await harness.hs.inject_event(dm_id, voter, "m.reaction", {})
+            await harness.hs.inject_message(dm_id, voter, "hi")
+            assert "Reply with" in (await harness.next_reply(dm_queue))["content"]["body"]
+            
+            await harness.hs.inject_event(room_id, others[0], "m.room.topic", {"topic": "films"})
+            await harness.hs.inject_message(room_id, voter, "@rankbot help")
+            assert (await harness.next_reply(room_queue))["content"]["body"]
+            
+            await harness.stop_bot()
+            bot_syncs = [used for user_id, used in harness.hs.sync_filters if user_id == harness.bot_id]
+            assert len(bot_syncs) >= 3
+            assert all(used == filter_id for used in bot_syncs)
+        finally:
+            await harness.close()
+    
+    asyncio.run(scenario())
+
+
+def test_loop_not_blocked_by_warmup(harness, monkeypatch):
+    """The store warmup holds the data directory lock in a thread; the loop mustn't wait on it."""
+    def slow_warmup(self):
+        with self._lock.hold(exclusive=False):
+            time.sleep(1.0)
+    monkeypatch.setattr(JSONStore, "warmup", slow_warmup)
+    
+    async def scenario():
+        await harness.start_homeserver()
+        gaps = []
+        
+        async def tick():
+            last = time.monotonic()
+            while True:
+                await asyncio.sleep(0.01)
+                now = time.monotonic()
+                gaps.append(now - last)
+                last = now
+        
+        ticker = asyncio.create_task(tick())
+        try:
+            # First run: the initial sync finishes well before the warmup
+            await harness.start_bot()
+            await harness.stop_bot()
+        finally:
+            ticker.cancel()
+            await harness.close()
+        assert max(gaps) < 0.5
+    
+    asyncio.run(scenario())
@@ -0,0 +1,39 @@
+"""Windowed and decayed vote counts."""
+
+from datetime import datetime, timezone
+
+from storage import JSONStore
+from storage.json_store import _MAX_TIME_VIEWS
+from storage.models import Vote
+from storage.time_views import WindowedCounts
+
+
+def test_time_views_are_bounded(tmp_path):
+    store = JSONStore(str(tmp_path))
+    for days in range(1, 20):
+        store.get_time_view('window', days * 86400.0)
+    assert len(store._time_views) == _MAX_TIME_VIEWS
+    
+    # The most recently read survive, so a re-read one isn't rebuilt
+    recent = store.get_time_view('window', 19 * 86400.0)
+    store.get_time_view('decay', 86400.0)
+    assert store.get_time_view('window', 19 * 86400.0) is recent
+    assert ('window', 16 * 86400.0) not in store._time_views
+
+
+def _vote(seconds: float, winner: str, loser: str) -> Vote:
+    timestamp = datetime.fromtimestamp(seconds, timezone.utc).isoformat()
+    return Vote(user_id="@a:localhost", item_a_id=winner, item_b_id=loser, winner_id=winner, timestamp=timestamp)
+
+
+def test_window_merges_out_of_order_votes():
+    view = WindowedCounts(100.0)
+    view.extend([_vote(t, "a", "b") for t in (50, 60, 70)])
+    
+    # An imported batch older than what's there, itself unsorted
+    view.extend([_vote(t, "b", "a") for t in (40, 10, 30, 55)])
+    view.add(20.0, "a", "b")
+    assert [vote[0] for vote in view._votes] == [10, 20, 30, 40, 50, 55, 60, 70]
+    
+    # Expiry pops from the oldest end
+    assert view.counts(135.0) == {"a": (3, 2), "b": (2, 3)}